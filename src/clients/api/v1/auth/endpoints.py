@@ -9,6 +9,7 @@ from schemas.request.user import UserLoginSchema, UserRegistrationSchema
 from schemas.response.token import TokensResponse
 from schemas.response.user import UserResponse
 from services.auth.abc_auth import AbstractAuthService
+from services.auth.token_codec import TokenClaims
 from services.user.abc_user import AbstractUserService
 
 router = APIRouter(prefix="/auth", tags=["Auth actions"])
@@ -100,14 +101,14 @@ async def refresh_token(
 async def logout(
         request: Request,
         auth_service: AbstractAuthService = Depends(),
-        auth_data: AuthEntity = Depends(JWTBearer()),
+        auth_data: TokenClaims = Depends(JWTBearer()),
 ):
     """
     Logout of the user
     Args:
         request: Request
         auth_service: AuthService
-        auth_data: AuthEntity
+        auth_data: TokenClaims
     Returns:
         HTTP_204_NO_CONTENT
     """
@@ -115,3 +116,30 @@ async def logout(
     await auth_service.revoke_refresh_token(auth_data.user_id, access_token)
     logger.info(f"Logout: user_id - {auth_data.user_id}")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post(
+    "/logout_all",
+    summary="Logout of all sessions",
+    description="Logout of the user account on every device",
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+)
+async def logout_all(
+        request: Request,
+        auth_service: AbstractAuthService = Depends(),
+        auth_data: TokenClaims = Depends(JWTBearer()),
+):
+    """
+    Logout of the user on every device
+    Args:
+        request: Request
+        auth_service: AuthService
+        auth_data: TokenClaims
+    Returns:
+        HTTP_204_NO_CONTENT
+    """
+    access_token = request.headers.get("Authorization").replace("Bearer ", "")
+    await auth_service.revoke_all_tokens(auth_data.user_id, access_token)
+    logger.info(f"Logout of all sessions: user_id - {auth_data.user_id}")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
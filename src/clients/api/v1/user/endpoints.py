@@ -4,9 +4,9 @@ from loguru import logger
 
 from common.dependencies.auth import JWTBearer
 from common.exceptions import UserException
-from schemas.entities.auth_entity import AuthEntity
 from schemas.request.user import UserChangeInfoSchema, UserChangePasswordSchema
 from schemas.response.user import UserResponse
+from services.auth.token_codec import TokenClaims
 from services.user.abc_user import AbstractUserService
 
 router = APIRouter(prefix="/user", tags=["User actions"])
@@ -15,13 +15,13 @@ router = APIRouter(prefix="/user", tags=["User actions"])
 @router.get("/info", summary="Profile", description="Getting user Information", response_model=UserResponse)
 async def user_info(
         service: AbstractUserService = Depends(),
-        auth_data: AuthEntity = Depends(JWTBearer()),
+        auth_data: TokenClaims = Depends(JWTBearer()),
 ) -> UserResponse:
     """
     Getting authorized user Information
     Args:
         service: UserService
-        auth_data: AuthEntity
+        auth_data: TokenClaims
     Returns:
         UserResponse
     """
@@ -37,14 +37,14 @@ async def user_info(
 async def change_user_info(
         request_user_info: UserChangeInfoSchema,
         service: AbstractUserService = Depends(),
-        auth_data: AuthEntity = Depends(JWTBearer()),
+        auth_data: TokenClaims = Depends(JWTBearer()),
 ) -> UserResponse:
     """
     Changing information about authorized user
     Args:
         request_user_info: UserChangeInfoSchema
         service: UserService
-        auth_data: AuthEntity
+        auth_data: TokenClaims
     Returns:
         UserResponse
     """
@@ -65,7 +65,7 @@ async def change_user_info(
 async def password_change(
         request_change_password: UserChangePasswordSchema,
         user_service: AbstractUserService = Depends(),
-        auth_data: AuthEntity = Depends(JWTBearer()),
+        auth_data: TokenClaims = Depends(JWTBearer()),
 ):
     """
     Changing the password of an authorized user
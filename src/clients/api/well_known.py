@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response
+
+from core.config import settings
+from services.auth.key_ring import get_key_ring
+
+router = APIRouter(prefix="/.well-known", tags=["JWKS"])
+
+
+@router.get("/jwks.json", summary="JWKS", description="Public keys verifying access and refresh tokens")
+async def jwks(request: Request):
+    """
+    Public keys of the key ring by kid, cached by clients for JWT_JWKS_MAX_AGE and revalidated with ETag
+    Args:
+        request: Request
+    Returns:
+        JWK set
+    """
+    if (key_ring := get_key_ring()) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tokens are signed with a shared secret")
+    headers = {"Cache-Control": f"public, max-age={settings.jwt_config.jwks_max_age}", "ETag": key_ring.jwks_etag}
+    if request.headers.get("If-None-Match") == key_ring.jwks_etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=key_ring.jwks_json, media_type="application/json", headers=headers)
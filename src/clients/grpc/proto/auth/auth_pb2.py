@@ -6,26 +6,40 @@
 """Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
 from google.protobuf import symbol_database as _symbol_database
 from google.protobuf.internal import builder as _builder
-
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    5,
+    27,
+    2,
+    '',
+    'auth.proto'
+)
 # @@protoc_insertion_point(imports)
 
 _sym_db = _symbol_database.Default()
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
-    b'\n\nauth.proto\x12\x04\x61uth\"+\n\x18\x43heckUserExistingRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\"\xae\x01\n\x19\x43heckUserExistingResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\x12\x12\n\nfirst_name\x18\x03 \x01(\t\x12\x11\n\tlast_name\x18\x04 \x01(\t\x12\x14\n\x0cis_superuser\x18\x05 \x01(\x08\x12\x11\n\tis_active\x18\x06 \x01(\x08\x12\x12\n\ncreated_at\x18\x07 \x01(\t\x12\x12\n\nupdated_at\x18\x08 \x01(\t2^\n\x04\x41uth\x12V\n\x11\x43heckUserExisting\x12\x1e.auth.CheckUserExistingRequest\x1a\x1f.auth.CheckUserExistingResponse\"\x00\x42\x08Z\x06./authb\x06proto3')
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nauth.proto\x12\x04\x61uth\"+\n\x18\x43heckUserExistingRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\"\xae\x01\n\x19\x43heckUserExistingResponse\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\x12\x12\n\nfirst_name\x18\x03 \x01(\t\x12\x11\n\tlast_name\x18\x04 \x01(\t\x12\x14\n\x0cis_superuser\x18\x05 \x01(\x08\x12\x11\n\tis_active\x18\x06 \x01(\x08\x12\x12\n\ncreated_at\x18\x07 \x01(\t\x12\x12\n\nupdated_at\x18\x08 \x01(\t\"-\n\x19\x43heckUsersExistingRequest\x12\x10\n\x08user_ids\x18\x01 \x03(\t\"L\n\x1a\x43heckUsersExistingResponse\x12.\n\x05users\x18\x01 \x03(\x0b\x32\x1f.auth.CheckUserExistingResponse2\x96\x02\n\x04\x41uth\x12V\n\x11\x43heckUserExisting\x12\x1e.auth.CheckUserExistingRequest\x1a\x1f.auth.CheckUserExistingResponse\"\x00\x12Y\n\x12\x43heckUsersExisting\x12\x1f.auth.CheckUsersExistingRequest\x1a .auth.CheckUsersExistingResponse\"\x00\x12[\n\x13StreamUsersExisting\x12\x1f.auth.CheckUsersExistingRequest\x1a\x1f.auth.CheckUserExistingResponse\"\x00\x30\x01\x42\x08Z\x06./authb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'auth_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
-    _globals['DESCRIPTOR']._loaded_options = None
-    _globals['DESCRIPTOR']._serialized_options = b'Z\006./auth'
-    _globals['_CHECKUSEREXISTINGREQUEST']._serialized_start = 20
-    _globals['_CHECKUSEREXISTINGREQUEST']._serialized_end = 63
-    _globals['_CHECKUSEREXISTINGRESPONSE']._serialized_start = 66
-    _globals['_CHECKUSEREXISTINGRESPONSE']._serialized_end = 240
-    _globals['_AUTH']._serialized_start = 242
-    _globals['_AUTH']._serialized_end = 336
+  _globals['DESCRIPTOR']._loaded_options = None
+  _globals['DESCRIPTOR']._serialized_options = b'Z\006./auth'
+  _globals['_CHECKUSEREXISTINGREQUEST']._serialized_start=20
+  _globals['_CHECKUSEREXISTINGREQUEST']._serialized_end=63
+  _globals['_CHECKUSEREXISTINGRESPONSE']._serialized_start=66
+  _globals['_CHECKUSEREXISTINGRESPONSE']._serialized_end=240
+  _globals['_CHECKUSERSEXISTINGREQUEST']._serialized_start=242
+  _globals['_CHECKUSERSEXISTINGREQUEST']._serialized_end=287
+  _globals['_CHECKUSERSEXISTINGRESPONSE']._serialized_start=289
+  _globals['_CHECKUSERSEXISTINGRESPONSE']._serialized_end=365
+  _globals['_AUTH']._serialized_start=368
+  _globals['_AUTH']._serialized_end=646
 # @@protoc_insertion_point(module_scope)
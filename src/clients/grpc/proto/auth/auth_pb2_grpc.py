@@ -1,6 +1,7 @@
 # Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
 """Client and server classes corresponding to protobuf-defined services."""
 import grpc
+import warnings
 
 from . import auth_pb2 as auth__pb2
 
@@ -10,7 +11,6 @@ _version_not_supported = False
 
 try:
     from grpc._utilities import first_version_is_lower
-
     _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
 except ImportError:
     _version_not_supported = True
@@ -35,10 +35,20 @@ class AuthStub(object):
             channel: A grpc.Channel.
         """
         self.CheckUserExisting = channel.unary_unary(
-            '/auth.Auth/CheckUserExisting',
-            request_serializer=auth__pb2.CheckUserExistingRequest.SerializeToString,
-            response_deserializer=auth__pb2.CheckUserExistingResponse.FromString,
-            _registered_method=True)
+                '/auth.Auth/CheckUserExisting',
+                request_serializer=auth__pb2.CheckUserExistingRequest.SerializeToString,
+                response_deserializer=auth__pb2.CheckUserExistingResponse.FromString,
+                _registered_method=True)
+        self.CheckUsersExisting = channel.unary_unary(
+                '/auth.Auth/CheckUsersExisting',
+                request_serializer=auth__pb2.CheckUsersExistingRequest.SerializeToString,
+                response_deserializer=auth__pb2.CheckUsersExistingResponse.FromString,
+                _registered_method=True)
+        self.StreamUsersExisting = channel.unary_stream(
+                '/auth.Auth/StreamUsersExisting',
+                request_serializer=auth__pb2.CheckUsersExistingRequest.SerializeToString,
+                response_deserializer=auth__pb2.CheckUserExistingResponse.FromString,
+                _registered_method=True)
 
 
 class AuthServicer(object):
@@ -50,36 +60,58 @@ class AuthServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CheckUsersExisting(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamUsersExisting(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_AuthServicer_to_server(servicer, server):
     rpc_method_handlers = {
-        'CheckUserExisting': grpc.unary_unary_rpc_method_handler(
-            servicer.CheckUserExisting,
-            request_deserializer=auth__pb2.CheckUserExistingRequest.FromString,
-            response_serializer=auth__pb2.CheckUserExistingResponse.SerializeToString,
-        ),
+            'CheckUserExisting': grpc.unary_unary_rpc_method_handler(
+                    servicer.CheckUserExisting,
+                    request_deserializer=auth__pb2.CheckUserExistingRequest.FromString,
+                    response_serializer=auth__pb2.CheckUserExistingResponse.SerializeToString,
+            ),
+            'CheckUsersExisting': grpc.unary_unary_rpc_method_handler(
+                    servicer.CheckUsersExisting,
+                    request_deserializer=auth__pb2.CheckUsersExistingRequest.FromString,
+                    response_serializer=auth__pb2.CheckUsersExistingResponse.SerializeToString,
+            ),
+            'StreamUsersExisting': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamUsersExisting,
+                    request_deserializer=auth__pb2.CheckUsersExistingRequest.FromString,
+                    response_serializer=auth__pb2.CheckUserExistingResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
-        'auth.Auth', rpc_method_handlers)
+            'auth.Auth', rpc_method_handlers)
     server.add_generic_rpc_handlers((generic_handler,))
     server.add_registered_method_handlers('auth.Auth', rpc_method_handlers)
 
 
-# This class is part of an EXPERIMENTAL API.
+ # This class is part of an EXPERIMENTAL API.
 class Auth(object):
     """Missing associated documentation comment in .proto file."""
 
     @staticmethod
     def CheckUserExisting(request,
-                          target,
-                          options=(),
-                          channel_credentials=None,
-                          call_credentials=None,
-                          insecure=False,
-                          compression=None,
-                          wait_for_ready=None,
-                          timeout=None,
-                          metadata=None):
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
         return grpc.experimental.unary_unary(
             request,
             target,
@@ -95,3 +127,57 @@ class Auth(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def CheckUsersExisting(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/auth.Auth/CheckUsersExisting',
+            auth__pb2.CheckUsersExistingRequest.SerializeToString,
+            auth__pb2.CheckUsersExistingResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamUsersExisting(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/auth.Auth/StreamUsersExisting',
+            auth__pb2.CheckUsersExistingRequest.SerializeToString,
+            auth__pb2.CheckUserExistingResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,23 +1,29 @@
 from functools import lru_cache
-from typing import Optional
+from typing import AsyncContextManager, Callable
 
 import grpc
 from loguru import logger
 
 from clients.grpc.proto.auth import auth_pb2
 from clients.grpc.proto.auth.auth_pb2_grpc import AuthServicer
+from common.exceptions import IntegrityDataError
 from common.exceptions.user import UserNotExists
+from core.config import settings
 from schemas.response.user import UserResponse
 from services.user.abc_user import AbstractUserService
 from services.user.user import get_user_service
 
 
 class AuthServicer(AuthServicer):
-    def __init__(self):
-        self.user_service: Optional[AbstractUserService] = None
-
-    async def init_services(self):
-        self.user_service = await get_user_service()
+    def __init__(
+            self, user_service_factory: Callable[[], AsyncContextManager[AbstractUserService]] = get_user_service
+    ):
+        """
+        Args:
+            user_service_factory: context manager of the user service with its own database session,
+                entered on every call so concurrent calls do not share a session
+        """
+        self.user_service_factory = user_service_factory
 
     async def CheckUserExisting(self, request, context) -> auth_pb2.CheckUserExistingResponse:
         """
@@ -30,7 +36,9 @@ class AuthServicer(AuthServicer):
             context INTERNAL if error in service working
         """
         try:
-            if user_info := await self.user_service.check_user_existing(request.user_id):
+            async with self.user_service_factory() as user_service:
+                user_info = await user_service.check_user_existing(request.user_id)
+            if user_info:
                 return auth_pb2.CheckUserExistingResponse(**UserResponse.to_grpc(user_info))
             return auth_pb2.CheckUserExistingResponse()
         except UserNotExists as e:
@@ -44,9 +52,64 @@ class AuthServicer(AuthServicer):
             logger.opt(exception=e).error(error_msg)
             context.set_code(grpc.StatusCode.INTERNAL)
 
+    async def CheckUsersExisting(self, request, context) -> auth_pb2.CheckUsersExistingResponse:
+        """
+        GRPC check existing of several users by user_ids method, all users are fetched in one lookup
+        Args:
+            request: GRPC request object
+            context: GRPC context object for response
+        Returns:
+            CheckUsersExistingResponse with existing users, missing ones are skipped
+            context INVALID_ARGUMENT if some user_id is not valid, INTERNAL if error in service working
+        """
+        try:
+            async with self.user_service_factory() as user_service:
+                users = await user_service.check_users_existing(request.user_ids)
+            return auth_pb2.CheckUsersExistingResponse(
+                users=[auth_pb2.CheckUserExistingResponse(**UserResponse.to_grpc(user_info)) for user_info in users]
+            )
+        except IntegrityDataError as e:
+            error_msg = "Error occurred: " + str(e)
+            context.set_details(error_msg)
+            logger.warning(error_msg)
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        except Exception as e:
+            error_msg = "Error occurred: " + str(e)
+            context.set_details(error_msg)
+            logger.opt(exception=e).error(error_msg)
+            context.set_code(grpc.StatusCode.INTERNAL)
+
+    async def StreamUsersExisting(self, request, context):
+        """
+        GRPC server streaming check existing of several users by user_ids method,
+        users are fetched by batches of GRPC_USERS_BATCH_SIZE ids and sent as soon as the batch is ready
+        Args:
+            request: GRPC request object
+            context: GRPC context object for response
+        Yields:
+            CheckUserExistingResponse of every existing user
+            context INVALID_ARGUMENT if some user_id is not valid, INTERNAL if error in service working
+        """
+        batch_size = settings.grpc_server.users_batch_size
+        user_ids = list(dict.fromkeys(request.user_ids))
+        try:
+            for start in range(0, len(user_ids), batch_size):
+                async with self.user_service_factory() as user_service:
+                    users = await user_service.check_users_existing(user_ids[start:start + batch_size])
+                for user_info in users:
+                    yield auth_pb2.CheckUserExistingResponse(**UserResponse.to_grpc(user_info))
+        except IntegrityDataError as e:
+            error_msg = "Error occurred: " + str(e)
+            context.set_details(error_msg)
+            logger.warning(error_msg)
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        except Exception as e:
+            error_msg = "Error occurred: " + str(e)
+            context.set_details(error_msg)
+            logger.opt(exception=e).error(error_msg)
+            context.set_code(grpc.StatusCode.INTERNAL)
+
 
 @lru_cache
-async def get_auth_servicer():
-    servicer = AuthServicer()
-    await servicer.init_services()
-    return servicer
+def get_auth_servicer() -> AuthServicer:
+    return AuthServicer()
@@ -1,2 +1,4 @@
 EXPIRE_ACCESS_TOKEN = 60 * 60  # 1 час
 EXPIRE_REFRESH_TOKEN = 60 * 60 * 24 * 10  # 10 дней
+OUTBOX_CREATE_USER_BALANCE = "create_user_balance"
+SECRET_SIGNED_ALGORITHM = "HS256"  # алгоритм токенов, подписанных JWT_SECRET_KEY до перехода на ключи
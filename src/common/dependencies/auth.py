@@ -5,8 +5,8 @@ from fastapi.security import APIKeyHeader, HTTPAuthorizationCredentials, HTTPBea
 from loguru import logger
 from starlette.status import HTTP_401_UNAUTHORIZED
 
-from schemas.entities.auth_entity import AuthEntity
 from services.auth.abc_auth import AbstractAuthService
+from services.auth.token_codec import TokenClaims
 
 api_key_header = APIKeyHeader(name="Authorization", scheme_name="Bearer", auto_error=False)
 
@@ -26,20 +26,20 @@ class JWTBearer(HTTPBearer):
             request: Request,
             auth_service: AbstractAuthService = Depends(),
             fp: dict = Depends(Fingerprint()),
-    ) -> Optional[AuthEntity]:
+    ) -> Optional[TokenClaims]:
         credentials: HTTPAuthorizationCredentials = await super().__call__(request)
         if not credentials:
             raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Not authorized!")
         if not credentials.scheme == 'Bearer':
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Only Bearer token might be accepted')
-        auth_data: AuthEntity = await auth_service.get_auth_data(credentials.credentials)
-        await auth_service.get_fingerprint_by_access_token(auth_data.user_id, credentials.credentials)
+        auth_data: TokenClaims = await auth_service.get_auth_data(credentials.credentials)
+        await auth_service.check_session(auth_data, credentials.credentials, fp)
         logger.debug(f"User request: user_id - {auth_data.user_id}")
         return auth_data
 
 
 class JWTBearerAdmin:
-    async def __call__(self, auth_data: AuthEntity = Depends(JWTBearer())) -> AuthEntity:
+    async def __call__(self, auth_data: TokenClaims = Depends(JWTBearer())) -> TokenClaims:
         if not auth_data.is_superuser:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
         return auth_data
@@ -8,6 +8,9 @@ from repository.postgres_implementation.user_repository import SQLUserRepository
 from repository.redis_implementation.session_repository import SessionRepository
 from services import AuthService
 from services.auth.abc_auth import AbstractAuthService
+from services.auth.auth import get_revocation_cache
+from services.auth.revocation import get_revocation_filter
+from services.auth.token_codec import get_token_codec, get_verified_token_cache
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -22,4 +25,9 @@ def create_auth_service(
         cache_client=cache_client,
         jwt_secret_key=settings.jwt_config.jwt_secret_key,
         user_repository=SQLUserRepository(session=session),
+        stateless_access=settings.jwt_config.stateless_access,
+        revocation_cache=get_revocation_cache(),
+        revocation_filter=get_revocation_filter(),
+        token_codec=get_token_codec(),
+        verified_token_cache=get_verified_token_cache(),
     )
@@ -1,10 +1,13 @@
 from common.dependencies.registrator import add_factory_to_mapper
 from db.postgres.connection import get_async_session
+from db.redis.connection import get_async_redis_client
 from fastapi import Depends
+from redis.asyncio import Redis
 
-from repository.grpc_implementation.transaction_repository import get_grpc_transaction_repository
-from repository.postgres_implementation.user_repository import SQLUserRepository
+from repository.postgres_implementation.cached_user_repository import get_user_repository
+from repository.postgres_implementation.outbox_repository import SQLOutboxRepository
 from services.user.abc_user import AbstractUserService
+from services.user.password_hasher import get_password_hasher
 from services.user.user import UserService
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,8 +15,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 @add_factory_to_mapper(AbstractUserService)
 def create_user_service(
     session: AsyncSession = Depends(get_async_session),
+    redis_client: Redis = Depends(get_async_redis_client),
 ):
     return UserService(
-        user_repository=SQLUserRepository(session=session),
-        transaction_repository=get_grpc_transaction_repository(),
+        user_repository=get_user_repository(session, redis_client),
+        outbox_repository=SQLOutboxRepository(session),
+        password_hasher=get_password_hasher(),
     )
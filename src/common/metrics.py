@@ -0,0 +1,249 @@
+import asyncio
+import functools
+import math
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CALLS_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, values are kept per tuple of label values"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Histogram:
+    """Histogram with fixed buckets, observe costs one bisect and a few additions"""
+
+    kind = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        series = self._values.get(labelvalues)
+        if series is None:
+            series = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[float, int]]:
+        """
+        Returns:
+            sum and count of observations per tuple of label values
+        """
+        return {labels: (total, count) for labels, (_, total, count) in self._values.items()}
+
+    def collect(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metrics of the process in the Prometheus text format. Besides counters and histograms it reads stats()
+    of pools and caches on scrape, their numeric values are exposed as gauges
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._collectors: Dict[str, Callable[[], dict]] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, documentation, labelnames))
+
+    def histogram(
+            self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, prefix: str, stats: Callable[[], dict]) -> None:
+        """
+        Expose stats as gauges on every scrape
+        Args:
+            prefix: prefix of names of the gauges
+            stats: returns dict of stats, nested dicts are joined into the names
+        """
+        self._collectors[prefix] = stats
+
+    @staticmethod
+    def _flatten(prefix: str, stats: dict) -> List[Tuple[str, float]]:
+        values = []
+        for key, value in stats.items():
+            name = f"{prefix}_{key}"
+            if isinstance(value, dict):
+                values.extend(MetricsRegistry._flatten(name, value))
+            elif isinstance(value, (int, float)):
+                values.append((name, value))
+        return values
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        for prefix, stats in self._collectors.items():
+            for name, value in self._flatten(prefix, stats()):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_latency = registry.histogram(
+    "auth_stage_duration_seconds", "Duration of stages of services", ("service", "stage")
+)
+stage_errors = registry.counter(
+    "auth_stage_errors_total", "Stages of services finished with an exception", ("service", "stage", "error")
+)
+
+
+class RequestCalls:
+    """Count of redis commands and SQL statements made while serving one request"""
+
+    __slots__ = ("redis", "sql")
+
+    def __init__(self) -> None:
+        self.redis = 0
+        self.sql = 0
+
+
+request_calls: ContextVar[Optional[RequestCalls]] = ContextVar("request_calls", default=None)
+
+
+def count_redis_call(commands: int = 1) -> None:
+    if (calls := request_calls.get()) is not None:
+        calls.redis += commands
+
+
+def count_sql_statement(*args) -> None:
+    if (calls := request_calls.get()) is not None:
+        calls.sql += 1
+
+
+class timed:
+    """
+    Record duration of a stage of a service into auth_stage_duration_seconds, exceptions are counted
+    in auth_stage_errors_total. Works as a context manager or a decorator of sync and async functions:
+
+        @timed("user", "login")
+        async def login(...): ...
+
+        with timed("auth", "jwt_encode"):
+            ...
+    """
+
+    __slots__ = ("service", "stage", "_started")
+
+    def __init__(self, service: str, stage: str) -> None:
+        self.service = service
+        self.stage = stage
+
+    def __enter__(self) -> "timed":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        stage_latency.observe(time.perf_counter() - self._started, self.service, self.stage)
+        if exc_type is not None:
+            stage_errors.inc(self.service, self.stage, exc_type.__name__)
+
+    def __call__(self, func: Callable) -> Callable:
+        service, stage = self.service, self.stage
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timed(service, stage):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(service, stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+request_latency = registry.histogram(
+    "request_duration_seconds", "Duration of HTTP and gRPC requests", ("transport", "handler")
+)
+requests_total = registry.counter("requests_total", "Served requests by status", ("transport", "handler", "status"))
+request_redis_calls = registry.histogram(
+    "request_redis_calls", "Redis commands per request", ("transport", "handler"), CALLS_BUCKETS
+)
+request_sql_statements = registry.histogram(
+    "request_sql_statements", "SQL statements per request", ("transport", "handler"), CALLS_BUCKETS
+)
+
+
+def observe_request(transport: str, handler: str, status: str, seconds: float, calls: RequestCalls) -> None:
+    """
+    Record a served request
+    Args:
+        transport: http or grpc
+        handler: name of the endpoint or the rpc
+        status: HTTP status or gRPC status code
+        seconds: duration of the request
+        calls: redis and SQL calls made by the request
+    """
+    request_latency.observe(seconds, transport, handler)
+    requests_total.inc(transport, handler, status)
+    request_redis_calls.observe(calls.redis, transport, handler)
+    request_sql_statements.observe(calls.sql, transport, handler)
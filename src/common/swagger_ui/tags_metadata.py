@@ -7,6 +7,10 @@ tags_metadata = [
         "name": "Auth actions",
         "description": "Allows the user to registration, login, refresh tokens, logout.",
     },
+    {
+        "name": "JWKS",
+        "description": "Public keys of tokens for their local verification by other services.",
+    },
     {
         "name": "Test route",
         "description": "Just a healthcheck of the connection.",
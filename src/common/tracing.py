@@ -0,0 +1,296 @@
+import contextlib
+import json
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Iterator, List, Optional
+
+from loguru import logger
+
+from core.config import settings
+
+KIND_SERVER = "server"
+KIND_CLIENT = "client"
+KIND_INTERNAL = "internal"
+KIND_CONSUMER = "consumer"
+
+TRACEPARENT = "traceparent"
+
+
+class SpanContext:
+    """Identity of a span propagated between services in the W3C traceparent header"""
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool) -> None:
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """
+    Parse the W3C traceparent header: 00-<32 hex trace id>-<16 hex parent span id>-<2 hex flags>
+    Args:
+        value: value of the header
+    Returns:
+        context of the remote parent span or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        if not int(parts[1], 16) or not int(parts[2], 16):
+            return None
+    except ValueError:
+        return None
+    return SpanContext(parts[1].lower(), parts[2].lower(), bool(flags & 1))
+
+
+class Span:
+    """Timed operation of a trace, fields follow the OpenTelemetry span model"""
+
+    __slots__ = ("name", "kind", "context", "parent_span_id", "start_time_ns", "end_time_ns", "attributes", "error")
+
+    def __init__(
+            self, name: str, kind: str, context: SpanContext, parent_span_id: Optional[str], attributes: dict
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.context = context
+        self.parent_span_id = parent_span_id
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.error = f"{type(exception).__name__}: {exception}"
+
+    def as_dict(self) -> dict:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_ns": self.start_time_ns,
+            "end_time_ns": self.end_time_ns,
+            "duration_ms": (self.end_time_ns - self.start_time_ns) / 1e6 if self.end_time_ns else None,
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        }
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class SpanExporter:
+    """Receives ended sampled spans, export is called on the event loop and must not block"""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the last max_spans spans, for tests and local debugging"""
+
+    def __init__(self, max_spans: int = 10_000) -> None:
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+        if len(self.spans) > self.max_spans:
+            del self.spans[: len(self.spans) - self.max_spans]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends spans to a JSONL file through a buffered writer, the file is flushed on shutdown"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8", buffering=1 << 16)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.as_dict(), default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class LogSpanExporter(SpanExporter):
+    """Writes spans to the log, with LOG_SINK_MODE=async they are serialized off the event loop"""
+
+    def export(self, span: Span) -> None:
+        logger.bind(span=span.as_dict()).info(f"span {span.name} {span.context.trace_id}")
+
+
+class Tracer:
+    """
+    Creates spans and exports the sampled ones. Sampling is head based: a root span is sampled with
+    probability sample_ratio and its children follow the decision, remote parents pass it in the traceparent flags
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter], sample_ratio: float = 1.0) -> None:
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(
+            self,
+            name: str,
+            kind: str = KIND_INTERNAL,
+            parent: Optional[SpanContext] = None,
+            attributes: Optional[dict] = None,
+    ) -> Span:
+        """
+        Start a span without making it current, suits leaf spans such as SQL statements
+        Args:
+            name: name of the span
+            kind: server, client, consumer or internal
+            parent: remote parent, the current span is the parent by default
+            attributes: attributes of the span
+        Returns:
+            started span
+        """
+        if parent is None and (parent_span := current_span.get()) is not None:
+            parent = parent_span.context
+        span_id = os.urandom(8).hex()
+        if parent is None:
+            context = SpanContext(os.urandom(16).hex(), span_id, random.random() < self.sample_ratio)
+        else:
+            context = SpanContext(parent.trace_id, span_id, parent.sampled)
+        return Span(name, kind, context, parent.span_id if parent else None, attributes or {})
+
+    def end_span(self, span: Span) -> None:
+        span.end_time_ns = time.time_ns()
+        if span.context.sampled:
+            self.exporter.export(span)
+
+    @contextlib.contextmanager
+    def span(
+            self,
+            name: str,
+            kind: str = KIND_INTERNAL,
+            parent: Optional[SpanContext] = None,
+            attributes: Optional[dict] = None,
+    ) -> Iterator[Optional[Span]]:
+        """
+        Run the block in a current span, exceptions are recorded in the span and reraised.
+        Yields None when tracing is disabled
+        """
+        if not self.enabled:
+            yield None
+            return
+        span = self.start_span(name, kind, parent, attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            current_span.reset(token)
+            self.end_span(span)
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent of the current span to pass to other services or to store with deferred work"""
+    span = current_span.get()
+    return span.context.traceparent if span is not None else None
+
+
+@contextlib.contextmanager
+def client_span(name: str, attributes: dict) -> Iterator[Optional[Span]]:
+    """
+    Leaf span of a call to another system, recorded only inside a sampled trace, yields None otherwise
+    Args:
+        name: name of the span
+        attributes: attributes of the span
+    """
+    parent = current_span.get()
+    if parent is None or not parent.context.sampled:
+        yield None
+        return
+    tracer = get_tracer()
+    span = tracer.start_span(name, KIND_CLIENT, attributes=attributes)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        tracer.end_span(span)
+
+
+def start_sql_span(conn, cursor, statement: str, parameters, context, executemany) -> None:
+    """before_cursor_execute listener, statements are traced only inside a traced request"""
+    parent = current_span.get()
+    if parent is None or not parent.context.sampled:
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._trace_span = get_tracer().start_span(
+        f"SQL {operation}", KIND_CLIENT, attributes={"db.system": "postgresql", "db.statement": statement[:500]}
+    )
+
+
+def end_sql_span(conn, cursor, statement: str, parameters, context, executemany) -> None:
+    """after_cursor_execute listener"""
+    if (span := getattr(context, "_trace_span", None)) is not None:
+        context._trace_span = None
+        get_tracer().end_span(span)
+
+
+def fail_sql_span(exception_context) -> None:
+    """handle_error listener"""
+    context = exception_context.execution_context
+    if context is not None and (span := getattr(context, "_trace_span", None)) is not None:
+        context._trace_span = None
+        span.record_exception(exception_context.original_exception)
+        get_tracer().end_span(span)
+
+
+@lru_cache()
+def get_tracer() -> Tracer:
+    config = settings.tracing
+    exporters = {
+        "none": lambda: None,
+        "memory": InMemorySpanExporter,
+        "file": lambda: FileSpanExporter(config.file_path),
+        "log": LogSpanExporter,
+    }
+    if config.exporter not in exporters:
+        raise ValueError(f"Unknown TRACING_EXPORTER {config.exporter}, available: {', '.join(exporters)}")
+    return Tracer(exporters[config.exporter](), config.sample_ratio)
@@ -0,0 +1,96 @@
+import sys
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Callable, Hashable, Optional
+
+MEMORY_SAMPLE_SIZE = 16
+
+
+def _sizeof(value: Any) -> int:
+    """Size of the value with its items and slots, shared objects are counted every time"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        return size + sum(_sizeof(item) for item in value)
+    for slot in getattr(type(value), "__slots__", ()):
+        size += _sizeof(getattr(value, slot, None))
+    return size
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, max_size: int, ttl: float, timer: Callable[[], float] = time.monotonic) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._timer = timer
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get value of the key, expired entries are removed on read
+        Args:
+            key: key of the entry
+            default: returned if the key is missing or expired
+        Returns:
+            value
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= self._timer():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Set value of the key, the least recently used entry is evicted when the cache is full
+        Args:
+            key: key of the entry
+            value: value of the entry
+            ttl: lifetime of the entry, default ttl of the cache if not set
+        """
+        self._data[key] = (self._timer() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate memory of the cache, sizes of the entries are extrapolated from the recently used ones"""
+        sample = list(islice(reversed(self._data.items()), MEMORY_SAMPLE_SIZE))
+        if not sample:
+            return sys.getsizeof(self._data)
+        sample_size = sum(_sizeof(key) + _sizeof(entry) for key, entry in sample)
+        return sys.getsizeof(self._data) + sample_size * len(self._data) // len(sample)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "memory_bytes": self.memory_bytes,
+        }
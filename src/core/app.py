@@ -3,6 +3,8 @@ from common.dependencies.main import setup_dependencies
 from common.exception_handlers.init_handlers import init_handlers
 from common.swagger_ui.tags_metadata import tags_metadata
 from core.logguru_config import init_logging
+from core.metrics import setup_metrics
+from core.tracing import setup_tracing
 from fastapi import FastAPI
 from lifespan import lifespan
 
@@ -13,6 +15,8 @@ def create_app():
     setup_routers(app)
     setup_dependencies(app)
     init_handlers(app)
+    setup_metrics(app)
+    setup_tracing(app)
     return app
 
 
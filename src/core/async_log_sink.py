@@ -0,0 +1,119 @@
+import json
+import sys
+import threading
+import traceback
+from collections import deque
+from typing import TextIO
+
+DROP_NEW = "drop_new"
+DROP_OLDEST = "drop_oldest"
+# only these extra fields are written to JSON logs, others like request_headers and request_body
+# of the logging dependency may hold tokens and passwords
+SERIALIZED_EXTRA = ("trace_id", "span")
+
+
+def serialize_record(time, level: str, message: str, extra: dict, exception_text) -> str:
+    """
+    JSON line of the record with the allowed extra fields only
+    Args:
+        time: time of the record
+        level: name of the level
+        message: message
+        extra: extra fields of the record
+        exception_text: formatted exception or None
+    Returns:
+        str: JSON line
+    """
+    request_id = extra.get("request_id")
+    return json.dumps(
+        {
+            "time": time.isoformat(),
+            "level": level,
+            "request_id": str(request_id) if request_id is not None else None,
+            "message": message,
+            "extra": {key: extra[key] for key in SERIALIZED_EXTRA if key in extra},
+            "exception": exception_text,
+        },
+        default=str,
+        ensure_ascii=False,
+    ) + "\n"
+
+
+class AsyncLogSink:
+    """
+    Loguru sink which only puts records into a bounded buffer, they are formatted or serialized to JSON
+    and written by a background thread. When the buffer is full new records are dropped (drop_new)
+    or replace the oldest ones (drop_oldest), dropped records are counted
+    """
+
+    def __init__(
+            self, max_size: int = 10_000, drop_policy: str = DROP_NEW, serialize: bool = False, stream: TextIO = None
+    ) -> None:
+        if drop_policy not in (DROP_NEW, DROP_OLDEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.max_size = max_size
+        self.drop_policy = drop_policy
+        self.serialize = serialize
+        self._stream = stream or sys.stdout
+        self._buffer: deque = deque()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self.dropped = 0
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name="async_log_sink", daemon=True)
+        self._thread.start()
+
+    def write(self, message) -> None:
+        record = message.record
+        entry = (
+            record["time"],
+            record["level"].name,
+            record["message"],
+            dict(record["extra"]),
+            record["exception"],
+        )
+        with self._condition:
+            if len(self._buffer) >= self.max_size:
+                self.dropped += 1
+                if self.drop_policy == DROP_NEW:
+                    return
+                self._buffer.popleft()
+            self._buffer.append(entry)
+            self._condition.notify()
+
+    def _format(self, entry: tuple) -> str:
+        time, level, message, extra, exception = entry
+        request_id = extra.get("request_id")
+        exception_text = "".join(traceback.format_exception(*exception)) if exception else None
+        if self.serialize:
+            return serialize_record(time, level, message, extra, exception_text)
+        line = f"{time} | {level} | {request_id} | {message}\n"
+        return line + exception_text if exception_text else line
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._buffer and not self._stopped:
+                    self._condition.wait()
+                if not self._buffer and self._stopped:
+                    return
+                entries = list(self._buffer)
+                self._buffer.clear()
+            self._stream.write("".join(self._format(entry) for entry in entries))
+            self._stream.flush()
+            self.written += len(entries)
+
+    def stop(self) -> None:
+        """Write the buffered records and stop the thread, called by loguru when the handler is removed"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+
+    def stats(self) -> dict:
+        return {
+            "max_size": self.max_size,
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
@@ -1,3 +1,4 @@
+import json
 import os
 from functools import lru_cache
 from typing import Optional
@@ -14,6 +15,33 @@ class PostgresConfig(BaseSettings):
     database: str = Field(default="auth_database", env="DB_NAME")
     user: str = Field(default="user", env="DB_USERNAME")
     password: str = Field(default="changeme", env="DB_PASSWORD")
+    pool_size: int = Field(default=10, env="DB_POOL_SIZE")
+    max_overflow: int = Field(default=20, env="DB_MAX_OVERFLOW")
+    pool_timeout: float = Field(default=30, env="DB_POOL_TIMEOUT")
+    pool_recycle: int = Field(default=1800, env="DB_POOL_RECYCLE")
+    pool_pre_ping: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    # "pgbouncer" - through pgbouncer in transaction mode, prepared statements can't be used,
+    # "direct" - straight to postgres, prepared statements are cached per connection
+    connection_mode: str = Field(default="pgbouncer", env="DB_CONNECTION_MODE")
+    statement_cache_size: int = Field(default=100, env="DB_STATEMENT_CACHE_SIZE")
+
+    @property
+    def pool_params(self):
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+
+    @property
+    def connect_args(self):
+        statement_cache_size = self.statement_cache_size if self.connection_mode == "direct" else 0
+        return {
+            "statement_cache_size": statement_cache_size,
+            "prepared_statement_cache_size": statement_cache_size,
+        }
 
     @property
     def database_url(self):
@@ -37,6 +65,7 @@ class GRPServerConfig(BaseSettings):
     host: str = Field(default="0.0.0.0", env="GRPC_HOST")
     port: int = Field(default=50051, env="GRPC_PORT")
     auth_token: str = Field(default="", env="GRPC_AUTH_TOKEN")
+    users_batch_size: int = Field(default=500, env="GRPC_USERS_BATCH_SIZE")
 
 
 class TransactionGRPCConfig(BaseSettings):
@@ -44,11 +73,41 @@ class TransactionGRPCConfig(BaseSettings):
     port: int = Field(default=50051, env="TRANSACTION_GRPC_PORT")
     postfix: Optional[str] = Field(default=None, env="TRANSACTION_GRPC_POSTFIX")
     auth_token: str = Field(default="", env="TRANSACTION_GRPC_TOKEN")
+    timeout: float = Field(default=5, env="TRANSACTION_GRPC_TIMEOUT")
+    # gRPC servers reject pings more often than every 5 minutes by default (min_recv_ping_interval_without_data_ms)
+    # and close the connection with ENHANCE_YOUR_CALM, lower values need the matching settings on the server
+    keepalive_time_ms: int = Field(default=300_000, env="TRANSACTION_GRPC_KEEPALIVE_TIME_MS")
+    keepalive_timeout_ms: int = Field(default=10_000, env="TRANSACTION_GRPC_KEEPALIVE_TIMEOUT_MS")
+    max_concurrent_streams: int = Field(default=100, env="TRANSACTION_GRPC_MAX_CONCURRENT_STREAMS")
+    retry_max_attempts: int = Field(default=3, env="TRANSACTION_GRPC_RETRY_MAX_ATTEMPTS")
 
     @property
     def metadata(self):
         return [("authorization", f"Bearer {self.auth_token}")]
 
+    @property
+    def channel_options(self):
+        service_config = {
+            "methodConfig": [
+                {
+                    "name": [{"service": "transaction.Transaction"}],
+                    "retryPolicy": {
+                        "maxAttempts": self.retry_max_attempts,
+                        "initialBackoff": "0.1s",
+                        "maxBackoff": "1s",
+                        "backoffMultiplier": 2,
+                        "retryableStatusCodes": ["UNAVAILABLE"],
+                    },
+                }
+            ]
+        }
+        return [
+            ("grpc.keepalive_time_ms", self.keepalive_time_ms),
+            ("grpc.keepalive_timeout_ms", self.keepalive_timeout_ms),
+            ("grpc.enable_retries", 1),
+            ("grpc.service_config", json.dumps(service_config)),
+        ]
+
     @property
     def url(self):
         return f"{self.host}:{self.port}" + (f"/{self.postfix}" if self.postfix else "")
@@ -57,11 +116,125 @@ class TransactionGRPCConfig(BaseSettings):
 class JWTConfig(BaseSettings):
     jwt_secret_key: str = Field("abtghjkgvbm425632dfg5gjg", env="JWT_SECRET_KEY")
     encode_algorithm: str = Field("HS256", env="ENCODE_ALGORITHM")
+    signing_keys_dir: str = Field("keys", env="JWT_SIGNING_KEYS_DIR")
+    active_kid: str = Field("", env="JWT_ACTIVE_KID")
+    accept_secret_signed: bool = Field(True, env="JWT_ACCEPT_SECRET_SIGNED")
+    jwks_max_age: int = Field(300, env="JWT_JWKS_MAX_AGE")
+    stateless_access: bool = Field(False, env="JWT_STATELESS_ACCESS")
+    revocation_cache_ttl: float = Field(5, env="JWT_REVOCATION_CACHE_TTL")
+    revocation_cache_size: int = Field(100_000, env="JWT_REVOCATION_CACHE_SIZE")
+    revocation_filter_capacity: int = Field(1_000_000, env="JWT_REVOCATION_FILTER_CAPACITY")
+    revocation_filter_error_rate: float = Field(0.001, env="JWT_REVOCATION_FILTER_ERROR_RATE")
+    verified_token_cache_size: int = Field(10_000, env="JWT_VERIFIED_TOKEN_CACHE_SIZE")
+    fingerprint_key: str = Field("", env="JWT_FINGERPRINT_KEY")
+    fingerprint_keep_raw: bool = Field(False, env="JWT_FINGERPRINT_KEEP_RAW")
+
+
+class PasswordHashConfig(BaseSettings):
+    executor: str = Field(default="thread", env="PASSWORD_HASH_EXECUTOR")
+    workers: int = Field(default=os.cpu_count() or 1, env="PASSWORD_HASH_WORKERS")
+    max_concurrency: int = Field(default=(os.cpu_count() or 1) * 2, env="PASSWORD_HASH_MAX_CONCURRENCY")
+    schemes: str = Field(default="bcrypt", env="PASSWORD_HASH_SCHEMES")
+    bcrypt_rounds: int = Field(default=12, env="PASSWORD_HASH_BCRYPT_ROUNDS")
+    argon2_time_cost: int = Field(default=3, env="PASSWORD_HASH_ARGON2_TIME_COST")
+    argon2_memory_cost: int = Field(default=65536, env="PASSWORD_HASH_ARGON2_MEMORY_COST")
+    argon2_parallelism: int = Field(default=4, env="PASSWORD_HASH_ARGON2_PARALLELISM")
+
+    @property
+    def context_params(self) -> dict:
+        """
+        CryptContext params: the first scheme hashes new passwords,
+        the others are only verified and marked for update as well as hashes with other costs
+        """
+        return {
+            "schemes": [scheme.strip() for scheme in self.schemes.split(",") if scheme.strip()],
+            "deprecated": "auto",
+            "bcrypt__rounds": self.bcrypt_rounds,
+            "argon2__type": "ID",
+            "argon2__rounds": self.argon2_time_cost,
+            "argon2__memory_cost": self.argon2_memory_cost,
+            "argon2__parallelism": self.argon2_parallelism,
+        }
+
+
+class UserCacheConfig(BaseSettings):
+    enabled: bool = Field(default=True, env="USER_CACHE_ENABLED")
+    local_size: int = Field(default=100_000, env="USER_CACHE_LOCAL_SIZE")
+    local_ttl: float = Field(default=30, env="USER_CACHE_LOCAL_TTL")
+    redis_ttl: int = Field(default=300, env="USER_CACHE_REDIS_TTL")
+
+
+class OutboxConfig(BaseSettings):
+    # the dispatcher runs in one process started by run_outbox_dispatcher, not in every worker of the restapi
+    dispatcher_enabled: bool = Field(default=False, env="OUTBOX_DISPATCHER_ENABLED")
+    batch_size: int = Field(default=100, env="OUTBOX_BATCH_SIZE")
+    concurrency: int = Field(default=20, env="OUTBOX_CONCURRENCY")
+    poll_interval: float = Field(default=1, env="OUTBOX_POLL_INTERVAL")
+    max_attempts: int = Field(default=20, env="OUTBOX_MAX_ATTEMPTS")
+    backoff_base: float = Field(default=1, env="OUTBOX_BACKOFF_BASE")
+    backoff_max: float = Field(default=600, env="OUTBOX_BACKOFF_MAX")
+    lease: float = Field(default=120, env="OUTBOX_LEASE_SECONDS")
+
+
+class LoggingConfig(BaseSettings):
+    sink_mode: str = Field(default="sync", env="LOG_SINK_MODE")
+    queue_size: int = Field(default=10_000, env="LOG_QUEUE_SIZE")
+    drop_policy: str = Field(default="drop_new", env="LOG_DROP_POLICY")
+    json_format: bool = Field(default=False, env="LOG_JSON")
+    info_sample_rate: float = Field(default=1.0, ge=0, le=1, env="LOG_INFO_SAMPLE_RATE")
+
+
+class MetricsConfig(BaseSettings):
+    enabled: bool = Field(default=True, env="METRICS_ENABLED")
+    path: str = Field(default="/metrics", env="METRICS_PATH")
+    grpc_port: int = Field(default=9464, env="METRICS_GRPC_PORT")
+    outbox_port: int = Field(default=9465, env="METRICS_OUTBOX_PORT")
+
+
+class TracingConfig(BaseSettings):
+    exporter: str = Field(default="none", env="TRACING_EXPORTER")
+    sample_ratio: float = Field(default=0.1, ge=0, le=1, env="TRACING_SAMPLE_RATIO")
+    file_path: str = Field(default="spans.jsonl", env="TRACING_FILE_PATH")
 
 
 class RedisConfig(BaseSettings):
     port: int = Field(default=6379, env="REDIS_PORT")
     host: str = Field(default="127.0.0.1", env="REDIS_HOST")
+    max_connections: int = Field(default=50, env="REDIS_MAX_CONNECTIONS")
+    pool_timeout: float = Field(default=5, env="REDIS_POOL_TIMEOUT")
+    health_check_interval: int = Field(default=30, env="REDIS_HEALTH_CHECK_INTERVAL")
+    socket_timeout: float = Field(default=5, env="REDIS_SOCKET_TIMEOUT")
+    socket_connect_timeout: float = Field(default=2, env="REDIS_SOCKET_CONNECT_TIMEOUT")
+    mode: str = Field(default="single", env="REDIS_MODE")
+    nodes: str = Field(default="", env="REDIS_NODES")
+    sentinel_master: str = Field(default="mymaster", env="REDIS_SENTINEL_MASTER")
+    hash_tags: bool = Field(default=False, env="REDIS_HASH_TAGS")
+
+    @property
+    def topology(self):
+        """single, cluster or sentinel mode with comma separated host:port of cluster nodes or sentinels"""
+        nodes = [node.strip().rsplit(":", 1) for node in self.nodes.split(",") if node.strip()]
+        return {
+            "mode": self.mode,
+            "nodes": [(host, int(port)) for host, port in nodes],
+            "master_name": self.sentinel_master,
+        }
+
+    @property
+    def session_hash_tags(self) -> bool:
+        """Keys of a user share a hash slot, required by scripts in cluster mode"""
+        return self.hash_tags or self.mode == "cluster"
+
+    @property
+    def pool_params(self):
+        return {
+            "max_connections": self.max_connections,
+            "timeout": self.pool_timeout,
+            "health_check_interval": self.health_check_interval,
+            "socket_timeout": self.socket_timeout,
+            "socket_connect_timeout": self.socket_connect_timeout,
+            "socket_keepalive": True,
+        }
 
     @property
     def cache_params(self):
@@ -85,7 +258,13 @@ class Settings(BaseSettings):
     redis: RedisConfig = RedisConfig()
     postgres: PostgresConfig = PostgresConfig()
     jwt_config: JWTConfig = JWTConfig()
+    password_hash: PasswordHashConfig = PasswordHashConfig()
+    user_cache: UserCacheConfig = UserCacheConfig()
+    outbox: OutboxConfig = OutboxConfig()
     transaction_grpc: TransactionGRPCConfig = TransactionGRPCConfig()
+    logging: LoggingConfig = LoggingConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    tracing: TracingConfig = TracingConfig()
 
 
 @lru_cache()
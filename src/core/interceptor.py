@@ -1,5 +1,11 @@
+import contextlib
+import time
+from typing import Callable, ContextManager, Iterator
+
 import grpc
 
+from common.metrics import RequestCalls, observe_request, request_calls
+from common.tracing import KIND_SERVER, TRACEPARENT, get_tracer, parse_traceparent
 from core.config import settings
 
 
@@ -21,3 +27,94 @@ class SignatureValidationInterceptor(grpc.aio.ServerInterceptor):
 
 
 signature_interceptor = SignatureValidationInterceptor()
+
+
+def status_name(code) -> str:
+    if isinstance(code, grpc.StatusCode):
+        return code.name
+    for status in grpc.StatusCode:
+        if status.value[0] == code:
+            return status.name
+    return grpc.StatusCode.UNKNOWN.name
+
+
+def wrap_rpc_handler(handler, scope: Callable[[grpc.aio.ServicerContext], ContextManager]):
+    """
+    Run unary-unary and unary-stream behaviors of the handler inside the scope
+    Args:
+        handler: handler returned by the continuation
+        scope: context manager around the call, takes the context of the rpc
+    Returns:
+        wrapped handler
+    """
+    if handler.unary_unary is not None:
+        behavior = handler.unary_unary
+
+        async def unary_unary(request, context):
+            with scope(context):
+                return await behavior(request, context)
+
+        return handler._replace(unary_unary=unary_unary)
+
+    if handler.unary_stream is not None:
+        behavior = handler.unary_stream
+
+        async def unary_stream(request, context):
+            with scope(context):
+                async for response in behavior(request, context):
+                    yield response
+
+        return handler._replace(unary_stream=unary_stream)
+    return handler
+
+
+class MetricsInterceptor(grpc.aio.ServerInterceptor):
+    """Records duration, status code and redis/SQL calls of every rpc, each rpc is served in its own task"""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+
+        @contextlib.contextmanager
+        def scope(context: grpc.aio.ServicerContext) -> Iterator[None]:
+            calls, started, failed = RequestCalls(), time.perf_counter(), True
+            request_calls.set(calls)
+            try:
+                yield
+                failed = False
+            finally:
+                code = context.code()
+                status = status_name(code) if code is not None else ("UNKNOWN" if failed else "OK")
+                observe_request("grpc", method, status, time.perf_counter() - started, calls)
+
+        return wrap_rpc_handler(handler, scope)
+
+
+class TracingInterceptor(grpc.aio.ServerInterceptor):
+    """Serves every rpc in a server span, the parent is taken from traceparent metadata of the caller"""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        tracer = get_tracer()
+        if handler is None or not tracer.enabled:
+            return handler
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        parent = parse_traceparent(dict(handler_call_details.invocation_metadata or ()).get(TRACEPARENT))
+
+        @contextlib.contextmanager
+        def scope(context: grpc.aio.ServicerContext) -> Iterator[None]:
+            attributes = {"rpc.system": "grpc", "rpc.method": handler_call_details.method}
+            with tracer.span(f"grpc {method}", KIND_SERVER, parent, attributes) as span:
+                try:
+                    yield
+                finally:
+                    code = context.code()
+                    span.set_attribute("rpc.grpc.status_code", status_name(code) if code is not None else "OK")
+
+        return wrap_rpc_handler(handler, scope)
+
+
+metrics_interceptor = MetricsInterceptor()
+tracing_interceptor = TracingInterceptor()
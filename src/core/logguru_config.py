@@ -1,19 +1,50 @@
 import logging
+import random
 import sys
+import traceback
 import uuid
 from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
 
+from common.tracing import current_span
+from core.async_log_sink import AsyncLogSink, serialize_record
+from core.config import settings
 from fastapi import Request
 from grpc.aio import ServerInterceptor
 from loguru import logger
 
 logger_request_id: ContextVar[uuid] = ContextVar("request_id")
+logger_sampled: ContextVar[bool] = ContextVar("logger_sampled", default=True)
+
+
+def sample_request() -> bool:
+    """
+    Decide whether INFO lines of the current request are logged, warnings and errors are always logged
+    Returns:
+        bool: request is sampled
+    """
+    sampled = random.random() < settings.logging.info_sample_rate
+    logger_sampled.set(sampled)
+    return sampled
+
+
+def sampling_filter(record: dict) -> bool:
+    return record["level"].no > logging.INFO or logger_sampled.get()
+
+
+def patch_record(record: dict) -> None:
+    record["extra"]["request_id"] = logger_request_id.get(None)
+    if (span := current_span.get()) is not None:
+        record["extra"]["trace_id"] = span.context.trace_id
 
 
 async def logging_dependency(request: Request):
     request_id = request.headers.get("X-Request-Id", uuid.uuid4())
-    body = await request.body() if "multipart/form-data" not in request.headers.get("content-type", "") else ""
     logger_request_id.set(request_id)
+    if not sample_request():
+        return
+    body = await request.body() if "multipart/form-data" not in request.headers.get("content-type", "") else ""
     local_logger = logger.bind(request_headers=dict(request.headers), request_body=body)
     local_logger.info(
         {
@@ -24,12 +55,24 @@ async def logging_dependency(request: Request):
 
 
 def format_record(record: dict) -> str:
-    record["extra"]["request_id"] = logger_request_id.get()
     if record["exception"]:
         return "{exception}\n"
     return "{time} | {level} | {extra[request_id]} | {message}\n"
 
 
+def format_json_record(record: dict) -> str:
+    """Format of LOG_JSON, loguru serialize would write all extra fields of the record"""
+    exception = record["exception"]
+    record["extra"]["serialized"] = serialize_record(
+        record["time"],
+        record["level"].name,
+        record["message"],
+        record["extra"],
+        "".join(traceback.format_exception(*exception)) if exception else None,
+    )
+    return "{extra[serialized]}"
+
+
 class InterceptHandler(logging.Handler):
     def emit(self, record: logging.LogRecord):
         try:
@@ -53,24 +96,41 @@ def init_logging():
         runners_logger.handlers = [intercept_handler]
 
     logger_request_id.set(uuid.uuid4())
+    log_sink = get_log_sink()
+    handler = {"sink": sys.stdout, "format": format_json_record if settings.logging.json_format else format_record}
+    if log_sink is not None:
+        handler = {"sink": log_sink, "format": "{message}", "serialize": False}
     logger.configure(
-        handlers=[
-            {
-                "sink": sys.stdout,
-                "level": logging.INFO,
-                "format": format_record,
-                "serialize": False,
-            }
-        ]
+        handlers=[{**handler, "level": logging.INFO, "filter": sampling_filter}],
+        patcher=patch_record,
     )
     logger.info("Init logger")
 
 
+@lru_cache()
+def get_log_sink() -> Optional[AsyncLogSink]:
+    """
+    Sink writing logs in a background thread when LOG_SINK_MODE is async, records are formatted
+    and written to stdout by the thread as well
+    Returns:
+        sink or None in sync mode
+    """
+    if settings.logging.sink_mode != "async":
+        return None
+    return AsyncLogSink(
+        max_size=settings.logging.queue_size,
+        drop_policy=settings.logging.drop_policy,
+        serialize=settings.logging.json_format,
+    )
+
+
 class LoggingClientInterceptor(ServerInterceptor):
     async def intercept_service(self, continuation, handler_call_details):
         request_headers = dict(handler_call_details.invocation_metadata)
 
         logger_request_id.set(request_headers.get("X-Request-ID", uuid.uuid4()))
+        if not sample_request():
+            return await continuation(handler_call_details)
         local_logger = logger.bind(request_headers=request_headers)
         local_logger.info(f"method: {handler_call_details.method}")
 
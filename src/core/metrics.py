@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+from fastapi import FastAPI, Response
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.metrics import RequestCalls, observe_request, registry, request_calls
+from core.config import settings
+from core.logguru_config import get_log_sink
+from db.postgres.session_manager import db_manager
+from db.redis.session_manager import redis_db_manager
+from repository.postgres_implementation.cached_user_repository import get_user_cache
+from services.auth.auth import get_revocation_cache
+from services.auth.revocation import get_revocation_filter
+from services.auth.token_codec import get_verified_token_cache
+from services.outbox.dispatcher import get_outbox_dispatcher
+from services.user.password_hasher import get_password_hasher
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording duration, status and redis/SQL calls of every HTTP request"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        calls = RequestCalls()
+        token = request_calls.set(calls)
+        status = "500"
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_calls.reset(token)
+            endpoint = scope.get("endpoint")
+            handler = endpoint.__name__ if endpoint is not None else "unmatched"
+            observe_request("http", handler, status, time.perf_counter() - started, calls)
+
+
+def register_collectors(api: bool = True) -> None:
+    """
+    Expose stats of pools, caches and background workers of the process
+    Args:
+        api: the process serves the HTTP API, the gRPC server doesn't use redis and the outbox
+    """
+    registry.register_collector("db_pool", db_manager.pool_stats)
+    registry.register_collector("user_cache", lambda: get_user_cache().stats())
+    registry.register_collector("password_hasher", lambda: get_password_hasher().stats())
+    if (log_sink := get_log_sink()) is not None:
+        registry.register_collector("log_sink", log_sink.stats)
+    if not api:
+        return
+    registry.register_collector("redis_pool", redis_db_manager.pool_stats)
+    if (verified_token_cache := get_verified_token_cache()) is not None:
+        registry.register_collector("verified_token_cache", verified_token_cache.stats)
+    if settings.outbox.dispatcher_enabled:
+        registry.register_collector("outbox", lambda: get_outbox_dispatcher().stats())
+    if settings.jwt_config.stateless_access:
+        registry.register_collector("revocation_filter", lambda: get_revocation_filter().stats())
+        registry.register_collector("revocation_cache", lambda: get_revocation_cache().stats())
+
+
+async def metrics_endpoint() -> Response:
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+def setup_metrics(app: FastAPI) -> None:
+    if not settings.metrics.enabled:
+        return
+    register_collectors(api=True)
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route(settings.metrics.path, metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+
+async def start_metrics_server(host: str, port: int) -> asyncio.AbstractServer:
+    """
+    Serve the metrics on a separate port for processes without HTTP API, such as the gRPC server
+    Args:
+        host: host to listen
+        port: port to listen
+    Returns:
+        started server
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while await reader.readline() not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.split()
+            if len(parts) >= 2 and parts[1].decode().split("?")[0] == settings.metrics.path:
+                status, body = "200 OK", registry.render().encode()
+            else:
+                status, body = "404 Not Found", b""
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except ConnectionError as e:
+            logger.warning(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Metrics are served on {host}:{port}{settings.metrics.path}")
+    return server
@@ -0,0 +1,56 @@
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.tracing import KIND_SERVER, TRACEPARENT, Tracer, current_span, get_tracer, parse_traceparent
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware serving every HTTP request in a server span, the parent is taken from the traceparent header.
+    The traceparent of the span is returned in the response headers
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        parent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+        span = self.tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            KIND_SERVER,
+            parent,
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        token = current_span.set(span)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                headers = list(message.get("headers", []))
+                headers.append((TRACEPARENT.encode(), span.context.traceparent.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            current_span.reset(token)
+            if (endpoint := scope.get("endpoint")) is not None:
+                span.name = f"{scope['method']} {endpoint.__name__}"
+            self.tracer.end_span(span)
+
+
+def setup_tracing(app: FastAPI) -> None:
+    tracer = get_tracer()
+    if tracer.enabled:
+        app.add_middleware(TracingMiddleware, tracer=tracer)
@@ -0,0 +1,38 @@
+class PoolStats:
+    """Checkout statistics of a connection pool"""
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe_checkout(self, wait_seconds: float) -> None:
+        """
+        Register a successful checkout
+        Args:
+            wait_seconds: time spent waiting for a connection
+        """
+        self.checkouts += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def observe_timeout(self, wait_seconds: float) -> None:
+        """
+        Register a checkout that timed out waiting for a connection
+        Args:
+            wait_seconds: time spent waiting for a connection
+        """
+        self.timeouts += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def as_dict(self) -> dict:
+        attempts = self.checkouts + self.timeouts
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_avg": self.wait_seconds_total / attempts if attempts else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
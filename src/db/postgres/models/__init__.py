@@ -1 +1,2 @@
 from db.postgres.models.user import AuthUser
+from db.postgres.models.outbox import OutboxEvent
@@ -0,0 +1,40 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import TIMESTAMP, Index, Integer, PrimaryKeyConstraint, String, Text, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped
+
+from db.postgres.models.base_model import BaseModel, Column
+from db.postgres.models.mixins import IdMixin, TsMixinCreated
+
+
+class OutboxEvent(BaseModel, IdMixin, TsMixinCreated):
+    """Data model for outbox_event db table: side effects written in the transaction that caused them."""
+
+    __tablename__ = "outbox_event"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", name="outbox_event_pkey"),
+        UniqueConstraint("idempotency_key", name="outbox_event_idempotency_key_unique"),
+        Index(
+            "outbox_event_pending_idx",
+            "available_at",
+            postgresql_where=text("dispatched_at IS NULL"),
+        ),
+    )
+
+    event_type: Mapped[str] = Column(String(63), nullable=False)
+    aggregate_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), nullable=False)
+    payload: Mapped[dict] = Column(JSONB, default=dict, nullable=False)
+    idempotency_key: Mapped[str] = Column(String(255), nullable=False)
+    attempts: Mapped[int] = Column(Integer, default=0, nullable=False)
+    available_at: Mapped[datetime] = Column(TIMESTAMP(timezone=False), default=datetime.utcnow, nullable=False)
+    dispatched_at: Mapped[Optional[datetime]] = Column(TIMESTAMP(timezone=False), nullable=True)
+    last_error: Mapped[Optional[str]] = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return (
+            f"OutboxEvent(id={self.id}, event_type={self.event_type}, aggregate_id={self.aggregate_id}, "
+            f"attempts={self.attempts}, dispatched_at={self.dispatched_at})"
+        )
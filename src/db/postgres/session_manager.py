@@ -1,8 +1,37 @@
 import contextlib
+import time
 from typing import AsyncIterator, Optional
 
+from common.metrics import count_sql_statement
+from common.tracing import end_sql_span, fail_sql_span, start_sql_span
 from db.base.abc_async_session_manager import BaseAsyncSessionManager
+from db.base.pool_stats import PoolStats
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool which measures time of waiting for a connection and age of checked out connections"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        self.connection_age_seconds_total = 0.0
+        self.connection_age_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.observe_timeout(time.perf_counter() - started)
+            raise
+        self.stats.observe_checkout(time.perf_counter() - started)
+        age = time.time() - record.starttime
+        self.connection_age_seconds_total += age
+        self.connection_age_seconds_max = max(self.connection_age_seconds_max, age)
+        return record
 
 
 class PostgresSessionManager(BaseAsyncSessionManager):
@@ -10,24 +39,34 @@ class PostgresSessionManager(BaseAsyncSessionManager):
         self._engine: Optional[AsyncEngine] = None
         self._sessionmaker: Optional[async_sessionmaker[AsyncSession]] = None
 
-    def init(self, db_url: str) -> None:
-        # Just additional example of customization.
-        # you can add parameters to init and so on
-        if "postgresql" in db_url:
-            # These settings are needed to work with pgbouncer in transaction mode
-            # because you can't use prepared statements in such case
+    def init(self, db_url: str, connect_args: Optional[dict] = None, **pool_params) -> None:
+        """
+        Init engine with the connection pool shared by the whole process, sessions check out its connections
+        Args:
+            db_url: database url
+            connect_args: arguments of the driver connection, by default prepared statements are not cached
+                to work with pgbouncer in transaction mode
+            **pool_params: pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping
+
+        Returns:
+            None
+        """
+        if connect_args is None and "postgresql" in db_url:
             connect_args = {
                 "statement_cache_size": 0,
                 "prepared_statement_cache_size": 0,
             }
-        else:
-            connect_args = {}
         self._engine = create_async_engine(
             url=db_url,
             future=True,
-            pool_pre_ping=True,
-            connect_args=connect_args,
+            poolclass=TimedAsyncAdaptedQueuePool,
+            connect_args=connect_args or {},
+            **{"pool_pre_ping": True, **pool_params},
         )
+        event.listen(self._engine.sync_engine, "before_cursor_execute", count_sql_statement)
+        event.listen(self._engine.sync_engine, "before_cursor_execute", start_sql_span)
+        event.listen(self._engine.sync_engine, "after_cursor_execute", end_sql_span)
+        event.listen(self._engine.sync_engine, "handle_error", fail_sql_span)
         self._sessionmaker = async_sessionmaker(
             bind=self._engine,
             expire_on_commit=False,
@@ -40,6 +79,30 @@ class PostgresSessionManager(BaseAsyncSessionManager):
         self._engine = None
         self._sessionmaker = None
 
+    def pool_stats(self) -> dict:
+        """
+        Utilization, checkout wait time and connection age of the pool of postgres database
+        Returns:
+            dict of stats
+        """
+        if self._engine is None:
+            return {}
+        pool = self._engine.pool
+        stats = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "utilization": pool.checkedout() / (pool.size() + max(pool._max_overflow, 0)),
+        }
+        if isinstance(pool, TimedAsyncAdaptedQueuePool):
+            checkouts = pool.stats.checkouts
+            stats.update(
+                pool.stats.as_dict(),
+                connection_age_seconds_avg=pool.connection_age_seconds_total / checkouts if checkouts else 0.0,
+                connection_age_seconds_max=pool.connection_age_seconds_max,
+            )
+        return stats
+
     @contextlib.asynccontextmanager
     async def async_session(self) -> AsyncIterator[AsyncSession]:
         if self._sessionmaker is None:
@@ -1,62 +1,219 @@
 import contextlib
+import random
+import time
+from typing import List, Optional, Sequence, Tuple, Union
 
+from redis.asyncio import BlockingConnectionPool, ConnectionPool, Redis
+from redis.asyncio.client import Pipeline, PubSub
+from redis.asyncio.cluster import ClusterNode, ClusterPipeline, RedisCluster
+from redis.asyncio.sentinel import Sentinel, SentinelConnectionPool, SentinelManagedConnection
+from redis.exceptions import ConnectionError, RedisClusterException
+
+from common.metrics import count_redis_call
+from common.tracing import client_span
 from db.base.abc_async_session_manager import BaseAsyncSessionManager
-from redis.asyncio import Redis
+from db.base.pool_stats import PoolStats
+
+
+class TimedBlockingConnectionPool(BlockingConnectionPool):
+    """Blocking connection pool which measures time of waiting for a free connection"""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.stats = PoolStats()
+
+    async def get_connection(self, command_name, *keys, **options):
+        started = time.perf_counter()
+        try:
+            connection = await super().get_connection(command_name, *keys, **options)
+        except ConnectionError:
+            self.stats.observe_timeout(time.perf_counter() - started)
+            raise
+        self.stats.observe_checkout(time.perf_counter() - started)
+        return connection
+
+    @property
+    def in_use(self) -> int:
+        return self.max_connections - self.pool.qsize()
+
+
+class TimedSentinelConnectionPool(TimedBlockingConnectionPool, SentinelConnectionPool):
+    """Timed blocking pool of connections to the master discovered by sentinels, reconnects on failover"""
+
+    def __init__(self, service_name: str, sentinel_manager: Sentinel, **kwargs) -> None:
+        super().__init__(
+            service_name=service_name,
+            sentinel_manager=sentinel_manager,
+            connection_class=SentinelManagedConnection,
+            **kwargs,
+        )
+
+
+class TracedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        commands = " ".join(str(args[0]) for args, _ in self.command_stack)
+        count_redis_call(len(self.command_stack))
+        with client_span("redis PIPELINE", {"db.system": "redis", "db.operation": commands}):
+            return await super().execute(raise_on_error)
+
+
+class TracedRedis(Redis):
+    """Redis client counting every command and making a span of every command and pipeline inside a traced request"""
+
+    async def execute_command(self, *args, **options):
+        count_redis_call()
+        with client_span(f"redis {args[0]}", {"db.system": "redis", "db.operation": str(args[0])}):
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> TracedPipeline:
+        return TracedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class TracedClusterPipeline(ClusterPipeline):
+    async def execute(self, raise_on_error: bool = True, allow_redirections: bool = True):
+        commands = " ".join(str(command.args[0]) for command in self._command_stack)
+        count_redis_call(len(self._command_stack))
+        with client_span("redis PIPELINE", {"db.system": "redis", "db.operation": commands}):
+            return await super().execute(raise_on_error, allow_redirections)
+
+
+class TracedRedisCluster(RedisCluster):
+    """
+    Redis Cluster client counting and tracing commands like TracedRedis.
+    Keys of one command or script have to share a slot, MULTI is not available
+    """
+
+    _pubsub_pool: Optional[ConnectionPool] = None
+
+    async def execute_command(self, *args, **kwargs):
+        count_redis_call()
+        with client_span(f"redis {args[0]}", {"db.system": "redis", "db.operation": str(args[0])}):
+            return await super().execute_command(*args, **kwargs)
+
+    def pipeline(self, transaction: Optional[bool] = None, shard_hint: Optional[str] = None) -> TracedClusterPipeline:
+        if transaction or shard_hint:
+            raise RedisClusterException("Transactions are not supported in cluster mode, use single-slot scripts")
+        return TracedClusterPipeline(self)
+
+    async def mget(self, keys, *args) -> List[Optional[bytes]]:
+        """MGET of keys of any slots, the keys are fetched by one pipeline of MGET per slot"""
+        return await self.mget_nonatomic(keys, *args)
+
+    def pubsub(self, **kwargs) -> PubSub:
+        """Subscription through a random node, messages of PUBLISH are broadcast to every node of the cluster"""
+        if self._pubsub_pool is None:
+            node = random.choice(self.get_nodes() or list(self.nodes_manager.startup_nodes.values()))
+            self._pubsub_pool = ConnectionPool(connection_class=node.connection_class, **node.connection_kwargs)
+        return PubSub(self._pubsub_pool, **kwargs)
+
+    async def close(self) -> None:
+        if self._pubsub_pool is not None:
+            await self._pubsub_pool.disconnect()
+            self._pubsub_pool = None
+        await super().close()
 
 
 class RedisSessionManager(BaseAsyncSessionManager):
     def __init__(self) -> None:
-        self._sessionmaker = None
+        self._pool: Optional[TimedBlockingConnectionPool] = None
+        self._client: Optional[Union[TracedRedis, TracedRedisCluster]] = None
 
-    def init(self, host: str, port: int) -> None:
+    def init(
+            self,
+            host: str,
+            port: int,
+            mode: str = "single",
+            nodes: Sequence[Tuple[str, int]] = (),
+            master_name: str = "",
+            **pool_params,
+    ) -> None:
         """
-        Init sessionmaker of redis database
+        Init connection pool and the client of redis database shared by the whole process
         Args:
             host: redis host
             port: redis port
+            mode: single - one node at host and port, cluster - Redis Cluster discovered from nodes,
+                sentinel - master_name master discovered by sentinel nodes
+            nodes: startup nodes of the cluster (host and port if empty) or sentinels
+            master_name: name of the master monitored by sentinels
+            **pool_params: max_connections, timeout, health_check_interval, socket timeouts
 
         Returns:
             None
         """
-        self._sessionmaker = self._redis_sessionmaker(host, port)
+        if mode == "cluster":
+            # the cluster keeps max_connections per node and fails instead of waiting for a free connection
+            params = {key: value for key, value in pool_params.items() if key != "timeout"}
+            startup_nodes = [ClusterNode(node_host, node_port) for node_host, node_port in nodes or [(host, port)]]
+            self._client = TracedRedisCluster(startup_nodes=startup_nodes, **params)
+        elif mode == "sentinel":
+            sentinel = Sentinel(
+                nodes,
+                sentinel_kwargs={
+                    "socket_timeout": pool_params.get("socket_timeout"),
+                    "socket_connect_timeout": pool_params.get("socket_connect_timeout"),
+                },
+            )
+            self._client = sentinel.master_for(
+                master_name, redis_class=TracedRedis, connection_pool_class=TimedSentinelConnectionPool, **pool_params
+            )
+            self._pool = self._client.connection_pool
+        else:
+            self._pool = TimedBlockingConnectionPool(host=host, port=port, **pool_params)
+            self._client = TracedRedis(connection_pool=self._pool)
 
-    @staticmethod
-    def _redis_sessionmaker(host: str, port: int):
+    async def close(self) -> None:
         """
-        Init redis session
-        Args:
-            host: redis host
-            port: redis port
-
+        Disconnect all connections of the pool of redis database
         Returns:
-            redis sessionmaker(function)
+            None
         """
+        if isinstance(self._client, RedisCluster):
+            await self._client.close()
+        elif self._pool is not None:
+            await self._pool.disconnect()
+        self._pool = None
+        self._client = None
 
-        def get_client():
-            client: Redis = Redis(host=host, port=port)
-            return client
-
-        return get_client
-
-    async def close(self) -> None:
+    def pool_stats(self) -> dict:
         """
-        Delete sessionmaker of redis database
+        Utilization and checkout wait time of the pool of redis database,
+        connections of all nodes in cluster mode
         Returns:
-            None
+            dict of stats
         """
-        self._sessionmaker = None
+        if isinstance(self._client, RedisCluster):
+            nodes = self._client.get_nodes()
+            max_connections = sum(node.max_connections for node in nodes)
+            created = sum(len(node._connections) for node in nodes)
+            in_use = created - sum(len(node._free) for node in nodes)
+            return {
+                "nodes": len(nodes),
+                "max_connections": max_connections,
+                "created": created,
+                "in_use": in_use,
+                "utilization": in_use / max_connections if max_connections else 0.0,
+            }
+        if self._pool is None:
+            return {}
+        return {
+            "max_connections": self._pool.max_connections,
+            "created": len(self._pool._connections),
+            "in_use": self._pool.in_use,
+            "utilization": self._pool.in_use / self._pool.max_connections,
+            **self._pool.stats.as_dict(),
+        }
 
     @contextlib.asynccontextmanager
-    async def async_session(self) -> Redis:
+    async def async_session(self) -> Union[Redis, RedisCluster]:
         """
-        Get session of redis database
+        Get session of redis database, the client is shared and connections return to the pool after each command
         Returns:
             yield session of redis database
         """
-        if self._sessionmaker is None:
+        if self._client is None:
             raise IOError("DatabaseSessionManager is not initialized")
-        async with self._sessionmaker() as session:
-            yield session
+        yield self._client
 
 
 redis_db_manager = RedisSessionManager()
@@ -1,16 +1,40 @@
+import asyncio
 import contextlib
 from typing import AsyncIterator
 
+from common.tracing import get_tracer
 from core.config import settings
 from db.postgres.session_manager import db_manager
 from db.redis.session_manager import redis_db_manager
 from fastapi import FastAPI
+from repository.grpc_implementation.transaction_repository import get_grpc_transaction_repository
+from services.auth.revocation import get_revocation_filter
+from services.auth.token_codec import get_token_codec
+from services.outbox.dispatcher import get_outbox_dispatcher
+from services.user.password_hasher import get_password_hasher
 
 
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
-    db_manager.init(settings.postgres.database_url)
-    redis_db_manager.init(settings.redis.host, settings.redis.port)
+    db_manager.init(
+        settings.postgres.database_url, connect_args=settings.postgres.connect_args, **settings.postgres.pool_params
+    )
+    redis_db_manager.init(
+        settings.redis.host, settings.redis.port, **settings.redis.topology, **settings.redis.pool_params
+    )
+    get_token_codec()
+    background_tasks = []
+    if settings.jwt_config.stateless_access:
+        async with redis_db_manager.async_session() as redis:
+            background_tasks.append(asyncio.create_task(get_revocation_filter().run(redis)))
+    if settings.outbox.dispatcher_enabled:
+        background_tasks.append(asyncio.create_task(get_outbox_dispatcher().run()))
     yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
     await db_manager.close()
     await redis_db_manager.close()
+    await get_grpc_transaction_repository().close()
+    get_password_hasher().close()
+    get_tracer().shutdown()
@@ -0,0 +1,289 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import grpc
+from loguru import logger
+
+from clients.grpc.proto.auth import auth_pb2, auth_pb2_grpc
+from clients.grpc.servicer.auth import get_auth_servicer
+from common.metrics import request_redis_calls, request_sql_statements, stage_latency
+from core.app import app
+from core.config import settings
+from core.interceptor import metrics_interceptor, signature_interceptor
+from lifespan import lifespan
+from management.base.base_command import BaseCommand
+
+SCENARIOS = ("register", "login", "refresh", "info", "logout", "grpc_check_user_existing")
+PASSWORD = "Bench1234"
+USER_AGENT = "auth-benchmark"
+
+
+class ASGIClient:
+    """Calls the application in-process through ASGI, no sockets and HTTP parsing are involved"""
+
+    def __init__(self, application) -> None:
+        self.application = application
+
+    async def request(
+            self, method: str, path: str, body: Optional[dict] = None, token: Optional[str] = None
+    ) -> Tuple[int, Optional[dict]]:
+        raw_body = json.dumps(body).encode() if body is not None else b""
+        headers = [(b"user-agent", USER_AGENT.encode()), (b"content-type", b"application/json")]
+        if token:
+            headers.append((b"authorization", f"Bearer {token}".encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80),
+        }
+        status, chunks = 500, []
+
+        async def receive() -> dict:
+            return {"type": "http.request", "body": raw_body, "more_body": False}
+
+        async def send(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.application(scope, receive, send)
+        content = b"".join(chunks)
+        return status, json.loads(content) if content else None
+
+
+class ScenarioResult:
+    def __init__(self, name: str, requests: int, concurrency: int) -> None:
+        self.name = name
+        self.requests = requests
+        self.concurrency = concurrency
+        self.errors = 0
+        self.elapsed = 0.0
+        self.latencies: List[float] = []
+        self.stages: Dict[str, dict] = {}
+        self.redis_calls_avg = 0.0
+        self.sql_statements_avg = 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "concurrency": self.concurrency,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "throughput_rps": round(self.requests / self.elapsed, 2) if self.elapsed else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 2),
+            "p95_ms": round(self.percentile(0.95) * 1000, 2),
+            "p99_ms": round(self.percentile(0.99) * 1000, 2),
+            "redis_calls_avg": round(self.redis_calls_avg, 2),
+            "sql_statements_avg": round(self.sql_statements_avg, 2),
+            "stages": self.stages,
+        }
+
+
+def stage_breakdown(before: dict, after: dict) -> Dict[str, dict]:
+    """
+    Mean duration and count of every stage recorded between two snapshots of auth_stage_duration_seconds
+    """
+    stages = {}
+    for labels, (total, count) in after.items():
+        previous_total, previous_count = before.get(labels, (0.0, 0))
+        if count > previous_count:
+            stages[".".join(labels)] = {
+                "count": count - previous_count,
+                "mean_ms": round((total - previous_total) / (count - previous_count) * 1000, 3),
+            }
+    return dict(sorted(stages.items(), key=lambda item: -item[1]["mean_ms"] * item[1]["count"]))
+
+
+def calls_mean(before: dict, after: dict) -> float:
+    total = sum(value[0] for value in after.values()) - sum(value[0] for value in before.values())
+    count = sum(value[1] for value in after.values()) - sum(value[1] for value in before.values())
+    return total / count if count else 0.0
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    Find scenarios slower than the baseline
+    Args:
+        results: results of the run
+        baseline: stored results
+        tolerance: allowed relative degradation of throughput and p95
+    Returns:
+        descriptions of regressions
+    """
+    regressions = []
+    for name, base in baseline.items():
+        if (result := results.get(name)) is None:
+            continue
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput_rps']} rps < {base['throughput_rps']} rps")
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms > {base['p95_ms']} ms")
+        if result["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {result['error_rate']} > {base['error_rate']}")
+    return regressions
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Benchmark auth endpoints in-process and CheckUserExisting over a local gRPC server against postgres "
+        "and redis of the settings, report throughput, latency percentiles and stages, compare with a baseline"
+    )
+
+    def add_arguments(self):
+        self.parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+        self.parser.add_argument("--concurrency", type=int, default=20)
+        self.parser.add_argument("--scenarios", nargs="*", choices=SCENARIOS, default=list(SCENARIOS))
+        self.parser.add_argument("--output", help="save the results to the json file")
+        self.parser.add_argument("--baseline", help="json file of stored results to compare with")
+        self.parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative degradation")
+
+    async def run_scenario(self, name: str, operation: Callable[[int], Awaitable[bool]]) -> ScenarioResult:
+        """
+        Run the operation for every request index by concurrency workers
+        Args:
+            name: name of the scenario
+            operation: makes the request of the index, returns False on error
+        Returns:
+            result of the scenario
+        """
+        result = ScenarioResult(name, self.args.requests, self.args.concurrency)
+        indexes = iter(range(self.args.requests))
+        stages_before = stage_latency.snapshot()
+        redis_before, sql_before = request_redis_calls.snapshot(), request_sql_statements.snapshot()
+
+        async def worker() -> None:
+            for index in indexes:
+                started = time.perf_counter()
+                try:
+                    succeeded = await operation(index)
+                except Exception as e:
+                    logger.warning(f"{name} request {index} failed: {e}")
+                    succeeded = False
+                result.latencies.append(time.perf_counter() - started)
+                result.errors += not succeeded
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+        result.elapsed = time.perf_counter() - started
+        result.stages = stage_breakdown(stages_before, stage_latency.snapshot())
+        result.redis_calls_avg = calls_mean(redis_before, request_redis_calls.snapshot())
+        result.sql_statements_avg = calls_mean(sql_before, request_sql_statements.snapshot())
+        return result
+
+    async def run(self) -> Dict[str, dict]:
+        client = ASGIClient(app)
+        run_id = uuid.uuid4().hex[:8]
+        emails = [f"bench-{run_id}-{index}@example.com" for index in range(self.args.requests)]
+        user_ids: List[Optional[str]] = [None] * self.args.requests
+        tokens: List[Optional[dict]] = [None] * self.args.requests
+
+        async def register(index: int) -> bool:
+            status, body = await client.request(
+                "POST", "/api/v1/auth/registration", {"email": emails[index], "password": PASSWORD}
+            )
+            return status == 201
+
+        async def login(index: int) -> bool:
+            status, body = await client.request(
+                "POST", "/api/v1/auth/login", {"email": emails[index], "password": PASSWORD}
+            )
+            tokens[index] = body if status == 200 else None
+            return status == 200
+
+        async def refresh(index: int) -> bool:
+            if tokens[index] is None:
+                return False
+            status, body = await client.request(
+                "POST", "/api/v1/auth/refresh", {"refresh_token": tokens[index]["refresh_token"]}
+            )
+            tokens[index] = body if status == 200 else None
+            return status == 200
+
+        async def info(index: int) -> bool:
+            if tokens[index] is None:
+                return False
+            status, body = await client.request("GET", "/api/v1/user/info", token=tokens[index]["access_token"])
+            if status == 200:
+                user_ids[index] = body["id"]
+            return status == 200
+
+        async def logout(index: int) -> bool:
+            if tokens[index] is None:
+                return False
+            status, _ = await client.request("GET", "/api/v1/auth/logout", token=tokens[index]["access_token"])
+            return status == 204
+
+        operations = {"register": register, "login": login, "refresh": refresh, "info": info, "logout": logout}
+        results = {}
+        async with lifespan(app):
+            for name in self.args.scenarios:
+                if name in operations:
+                    results[name] = await self.run_scenario(name, operations[name])
+                    logger.info(f"{name}: {results[name].as_dict()}")
+            if "grpc_check_user_existing" in self.args.scenarios:
+                results["grpc_check_user_existing"] = await self.run_grpc_scenario(user_ids)
+                logger.info(f"grpc_check_user_existing: {results['grpc_check_user_existing'].as_dict()}")
+        return {name: result.as_dict() for name, result in results.items()}
+
+    async def run_grpc_scenario(self, user_ids: List[Optional[str]]) -> ScenarioResult:
+        """CheckUserExisting through a gRPC server started on a free local port"""
+        server = grpc.aio.server(interceptors=(metrics_interceptor, signature_interceptor))
+        auth_pb2_grpc.add_AuthServicer_to_server(get_auth_servicer(), server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        metadata = [("authorization", f"Bearer {settings.grpc_server.auth_token}")]
+        known_ids = [user_id for user_id in user_ids if user_id] or [str(uuid.uuid4())]
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = auth_pb2_grpc.AuthStub(channel)
+
+                async def check_user_existing(index: int) -> bool:
+                    await stub.CheckUserExisting(
+                        auth_pb2.CheckUserExistingRequest(user_id=known_ids[index % len(known_ids)]), metadata=metadata
+                    )
+                    return True
+
+                return await self.run_scenario("grpc_check_user_existing", check_user_existing)
+        finally:
+            await server.stop(grace=None)
+
+    def execute(self):
+        loop = asyncio.get_event_loop()
+        results = loop.run_until_complete(self.run())
+        if failed := [name for name, result in results.items() if result["error_rate"] > 0]:
+            for name in failed:
+                logger.error(f"Scenario {name} has errors: error rate {results[name]['error_rate']}")
+            raise SystemExit(1)
+        if self.args.output:
+            with open(self.args.output, "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2)
+            logger.info(f"Results are saved to {self.args.output}")
+        if not self.args.baseline:
+            return
+        with open(self.args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if regressions := compare(results, baseline, self.args.tolerance):
+            for regression in regressions:
+                logger.error(f"Regression: {regression}")
+            raise SystemExit(1)
+        logger.info(f"No regressions against {self.args.baseline} with tolerance {self.args.tolerance}")
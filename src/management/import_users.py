@@ -0,0 +1,346 @@
+import asyncio
+import csv
+import json
+import math
+import multiprocessing
+import os
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import chain, islice
+from typing import Iterator, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import ValidationError
+
+from common.constants import OUTBOX_CREATE_USER_BALANCE
+from common.exceptions.grpc import GRPCConnectionException
+from core.config import settings
+from db.postgres.session_manager import db_manager
+from management.base.base_command import BaseCommand
+from repository.grpc_implementation.transaction_repository import get_grpc_transaction_repository
+from schemas.request.user import UserEmailSchema
+from services.user.password_hasher import hash_password, pwd_context
+
+COLUMNS = ("id", "email", "password", "first_name", "last_name", "is_superuser", "is_active", "created_at", "updated_at")
+ENQUEUE_BALANCES = (
+    "INSERT INTO outbox_event "
+    "(id, event_type, aggregate_id, payload, idempotency_key, attempts, available_at, created_at) "
+    "SELECT gen_random_uuid(), $1::varchar, user_id, jsonb_build_object('user_id', user_id::text), "
+    "$1::varchar || ':' || user_id::text, 0, $2::timestamp, $2::timestamp FROM inserted "
+    "ON CONFLICT (idempotency_key) DO NOTHING"
+)
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    return [hash_password(password) for password in passwords]
+
+
+def read_users(path: str, file_format: str) -> Iterator[dict]:
+    """
+    Stream users from the file without loading it into memory
+    Args:
+        path: path of the file
+        file_format: csv with a header or jsonl with an object per line
+    Yields:
+        fields of the user
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if file_format == "csv":
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+class ImportReport:
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.rows_read = 0
+        self.rows_invalid = 0
+        self.rejected_by_reason = Counter()
+        self.users_inserted = 0
+        self.users_skipped = 0
+        self.balances_created = 0
+        self.balances_failed = 0
+        self.hash_wait_seconds = 0.0
+        self.copy_seconds = 0.0
+        self.balance_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "rows_read": self.rows_read,
+            "rows_invalid": self.rows_invalid,
+            "rejected_by_reason": dict(self.rejected_by_reason),
+            "users_inserted": self.users_inserted,
+            "users_skipped": self.users_skipped,
+            "balances_created": self.balances_created,
+            "balances_failed": self.balances_failed,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(self.rows_read / elapsed, 2) if elapsed else 0.0,
+            "hash_wait_seconds": round(self.hash_wait_seconds, 2),
+            "copy_seconds": round(self.copy_seconds, 2),
+            "balance_seconds": round(self.balance_seconds, 2),
+        }
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Import users from CSV or JSONL: passwords are hashed in a process pool, rows are loaded with COPY by batches "
+        "with outbox events of their balances, balances are created in the transaction service right away "
+        "and the outbox dispatcher retries the failed ones, the progress is saved to the checkpoint file"
+    )
+
+    def add_arguments(self):
+        self.parser.add_argument("file")
+        self.parser.add_argument("--format", choices=("csv", "jsonl"), help="by extension of the file by default")
+        self.parser.add_argument("--batch-size", type=int, default=5000)
+        self.parser.add_argument("--hash-workers", type=int, default=os.cpu_count() or 1)
+        self.parser.add_argument("--balance-concurrency", type=int, default=50)
+        self.parser.add_argument("--checkpoint", help="<file>.checkpoint by default")
+        self.parser.add_argument(
+            "--hashed", action="store_true", help="passwords are already hashed with one of PASSWORD_HASH_SCHEMES"
+        )
+
+    @property
+    def checkpoint_path(self) -> str:
+        return self.args.checkpoint or f"{self.args.file}.checkpoint"
+
+    def load_checkpoint(self) -> dict:
+        if not os.path.exists(self.checkpoint_path):
+            return {"offset": 0}
+        with open(self.checkpoint_path, encoding="utf-8") as file:
+            return json.load(file)
+
+    def save_checkpoint(self, offset: int) -> None:
+        """
+        Save the progress atomically: offset is count of rows already loaded into the database.
+        Balances of loaded users are in the outbox since the commit of their batch, so they are not saved here,
+        a batch loaded again after a crash before the save is skipped by ON CONFLICT
+        """
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"offset": offset}, file)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def reject_row(self, fields: dict) -> Optional[str]:
+        """
+        Args:
+            fields: fields of the user
+        Returns:
+            reason to reject the row or None for valid ones
+        """
+        try:
+            UserEmailSchema(email=fields.get("email"))
+        except ValidationError:
+            return "invalid_email"
+        if not fields.get("password"):
+            return "missing_password"
+        if self.args.hashed and not pwd_context.identify(fields["password"]):
+            return "unknown_hash_scheme"
+
+    async def prepare_batch(
+            self, batch: List[dict], offset: int, executor: ProcessPoolExecutor
+    ) -> Tuple[List[tuple], List[Tuple[int, str]]]:
+        """
+        Validate rows of the batch and hash their passwords, chunks of the batch are hashed in parallel
+        Args:
+            batch: fields of users
+            offset: count of rows before the batch
+            executor: process pool for hashing
+        Returns:
+            records in order of COLUMNS and numbers of rejected rows with the reasons
+        """
+        valid, rejected = [], []
+        for number, fields in enumerate(batch, start=offset + 1):
+            if reason := self.reject_row(fields):
+                rejected.append((number, reason))
+                continue
+            valid.append((UserEmailSchema(email=fields["email"]).email, fields["password"], fields))
+        passwords = [password for _, password, _ in valid]
+        if not self.args.hashed and passwords:
+            loop = asyncio.get_running_loop()
+            chunk_size = math.ceil(len(passwords) / self.args.hash_workers)
+            chunks = await asyncio.gather(
+                *(
+                    loop.run_in_executor(executor, hash_passwords, passwords[start:start + chunk_size])
+                    for start in range(0, len(passwords), chunk_size)
+                )
+            )
+            passwords = list(chain.from_iterable(chunks))
+        now = datetime.utcnow()
+        records = [
+            (
+                uuid.uuid4(),
+                email,
+                hashed_password,
+                fields.get("first_name") or None,
+                fields.get("last_name") or None,
+                False,
+                True,
+                now,
+                now,
+            )
+            for (email, _, fields), hashed_password in zip(valid, passwords)
+        ]
+        return records, rejected
+
+    @staticmethod
+    async def copy_batch(records: List[tuple]) -> List[str]:
+        """
+        Load the batch into a temporary table with COPY and move it into the user table in one statement,
+        rows with already registered emails are skipped. Outbox events of balances of the inserted users
+        are written by the same statement, so users are never committed without them
+        Args:
+            records: records in order of COLUMNS
+        Returns:
+            ids of inserted users
+        """
+        columns = ", ".join(COLUMNS)
+        async with db_manager.connect() as connection:
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            async with driver_connection.transaction():
+                await driver_connection.execute(
+                    'CREATE TEMPORARY TABLE import_user (LIKE "user" INCLUDING DEFAULTS) ON COMMIT DROP'
+                )
+                await driver_connection.copy_records_to_table("import_user", records=records, columns=COLUMNS)
+                inserted = (
+                    f'INSERT INTO "user" ({columns}) SELECT {columns} FROM import_user '
+                    f"ON CONFLICT DO NOTHING RETURNING id AS user_id"
+                )
+                rows = await driver_connection.fetch(
+                    f"WITH inserted AS ({inserted}), "
+                    f"enqueued AS ({ENQUEUE_BALANCES}) "
+                    f"SELECT user_id FROM inserted",
+                    OUTBOX_CREATE_USER_BALANCE,
+                    datetime.utcnow(),
+                )
+        return [str(row["user_id"]) for row in rows]
+
+    @staticmethod
+    async def mark_balances_dispatched(user_ids: List[str]) -> None:
+        """
+        Mark outbox events of created balances as dispatched, so the dispatcher doesn't send them again
+        Args:
+            user_ids: ids of users whose balances are created
+        """
+        async with db_manager.connect() as connection:
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            async with driver_connection.transaction():
+                await driver_connection.execute(
+                    "UPDATE outbox_event SET dispatched_at = $2, attempts = attempts + 1, last_error = NULL "
+                    "WHERE idempotency_key = ANY($1::text[]) AND dispatched_at IS NULL",
+                    [f"{OUTBOX_CREATE_USER_BALANCE}:{user_id}" for user_id in user_ids],
+                    datetime.utcnow(),
+                )
+
+    @staticmethod
+    async def create_balances(user_ids: List[str], concurrency: int) -> List[str]:
+        """
+        Create balances of the users in the transaction service, at most concurrency calls at once
+        Args:
+            user_ids: ids of users
+            concurrency: max count of calls in flight
+        Returns:
+            ids of users whose balances were not created
+        """
+        transaction_repository = get_grpc_transaction_repository()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def create_balance(user_id: str) -> Optional[str]:
+            async with semaphore:
+                try:
+                    await transaction_repository.create_user_balance(
+                        user_id=user_id, idempotency_key=f"{OUTBOX_CREATE_USER_BALANCE}:{user_id}"
+                    )
+                except GRPCConnectionException as e:
+                    logger.warning(f"Balance of user {user_id} is not created: {e}")
+                    return user_id
+
+        return [user_id for user_id in await asyncio.gather(*map(create_balance, user_ids)) if user_id]
+
+    async def load_batch(self, records: List[tuple], offset: int, report: ImportReport) -> None:
+        """
+        Load the batch and create balances of its users
+        Args:
+            records: records in order of COLUMNS
+            offset: count of loaded rows including the batch
+            report: report of the import
+        """
+        started = time.perf_counter()
+        user_ids = await self.copy_batch(records) if records else []
+        report.copy_seconds += time.perf_counter() - started
+        report.users_inserted += len(user_ids)
+        report.users_skipped += len(records) - len(user_ids)
+        self.save_checkpoint(offset)
+        await self.create_batch_balances(user_ids, report)
+
+    async def create_batch_balances(self, user_ids: List[str], report: ImportReport) -> None:
+        """Failed balances stay in the outbox and are retried by the outbox dispatcher"""
+        if not user_ids:
+            return
+        started = time.perf_counter()
+        failed = await self.create_balances(user_ids, self.args.balance_concurrency)
+        await self.mark_balances_dispatched(sorted(set(user_ids) - set(failed)))
+        report.balance_seconds += time.perf_counter() - started
+        report.balances_created += len(user_ids) - len(failed)
+        report.balances_failed += len(failed)
+
+    def batches(self, offset: int) -> Iterator[List[dict]]:
+        file_format = self.args.format or ("jsonl" if self.args.file.endswith((".jsonl", ".json")) else "csv")
+        users = islice(read_users(self.args.file, file_format), offset, None)
+        while batch := list(islice(users, self.args.batch_size)):
+            yield batch
+
+    async def import_users(self) -> ImportReport:
+        """
+        Hashing of the next batch runs while the current one is loaded, the checkpoint is saved after every batch,
+        so a restarted import skips loaded rows. Rejected rows are logged with their numbers and counted by reason
+        """
+        report = ImportReport()
+        checkpoint = self.load_checkpoint()
+        offset = checkpoint["offset"]
+        db_manager.init(
+            settings.postgres.database_url,
+            connect_args=settings.postgres.connect_args,
+            **settings.postgres.pool_params,
+        )
+        executor = ProcessPoolExecutor(
+            max_workers=self.args.hash_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            prepare_task, batch_offset = None, offset
+            for batch in chain(self.batches(offset), [None]):
+                next_task = None
+                if batch is not None:
+                    next_task = asyncio.create_task(self.prepare_batch(batch, batch_offset, executor))
+                    batch_offset += len(batch)
+                if prepare_task is not None:
+                    started = time.perf_counter()
+                    records, rejected = await prepare_task
+                    report.hash_wait_seconds += time.perf_counter() - started
+                    for number, reason in rejected:
+                        logger.warning(f"Row {number} is rejected: {reason}")
+                        report.rejected_by_reason[reason] += 1
+                    offset += len(records) + len(rejected)
+                    report.rows_read += len(records) + len(rejected)
+                    report.rows_invalid += len(rejected)
+                    await self.load_batch(records, offset, report)
+                    logger.info(f"Imported {offset} rows: {report.as_dict()}")
+                prepare_task = next_task
+        finally:
+            executor.shutdown(cancel_futures=True)
+            await db_manager.close()
+            await get_grpc_transaction_repository().close()
+        return report
+
+    def execute(self):
+        loop = asyncio.get_event_loop()
+        report = loop.run_until_complete(self.import_users())
+        logger.info(f"Import of users complete: {report.as_dict()}")
@@ -0,0 +1,147 @@
+import asyncio
+from typing import Tuple
+
+from common.constants import EXPIRE_REFRESH_TOKEN
+from core.config import settings
+from db.redis.session_manager import redis_db_manager
+from loguru import logger
+from management.base.base_command import BaseCommand
+from repository.redis_implementation.session_repository import SessionRepository
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Move session keys created before REDIS_HASH_TAGS to their {user_id} names, "
+        "build refresh token index and user sessions for keys created before they existed"
+    )
+
+    def add_arguments(self):
+        self.parser.add_argument("--batch-size", type=int, default=1000)
+
+    async def migrate(self, batch_size: int) -> Tuple[int, int]:
+        """
+        With hash tags, copy refresh, access and blocked keys of untagged user parts to their {user_id} names
+        with the same ttl and delete the old keys, their sessions hashes and refresh index entries are rebuilt.
+        Then walk refresh:<user_id>:<refresh_token> and access:<user_id>:<access_token> keys with SCAN,
+        create the missing refresh index entries with the same ttl as the refresh key
+        and register the keys in the sessions of their users
+        Args:
+            batch_size: keys per SCAN iteration and per pipeline
+        Returns:
+            count of moved keys and count of created index entries
+        """
+        redis_db_manager.init(
+            settings.redis.host, settings.redis.port, **settings.redis.topology, **settings.redis.pool_params
+        )
+        counts = {"moved": 0, "created": 0}
+        try:
+            async with redis_db_manager.async_session() as redis:
+                repository = SessionRepository(redis)
+                passes = [("refresh:*", self._index_batch, "created"), ("access:*", self._access_batch, "created")]
+                if repository.hash_tags:
+                    passes = [
+                        ("refresh:*", self._move_batch, "moved"),
+                        ("access:*", self._move_batch, "moved"),
+                        ("blocked:*", self._move_batch, "moved"),
+                        ("blocked_session:*", self._move_batch, "moved"),
+                        ("sessions:*", self._drop_untagged_batch, "moved"),
+                    ] + passes
+                for pattern, migrate_batch, counter in passes:
+                    batch = []
+                    async for key in redis.scan_iter(match=pattern, count=batch_size):
+                        batch.append(key.decode())
+                        if len(batch) >= batch_size:
+                            counts[counter] += await migrate_batch(repository, batch)
+                            batch = []
+                    if batch:
+                        counts[counter] += await migrate_batch(repository, batch)
+        finally:
+            await redis_db_manager.close()
+        return counts["moved"], counts["created"]
+
+    @staticmethod
+    def untagged(keys: list) -> list:
+        """Keys of the batch with the user part without hash tags, as <prefix>, <user_id>, <rest> of the key"""
+        parts = (key.split(":", 2) for key in keys)
+        return [key_parts for key_parts in parts if len(key_parts) == 3 and not key_parts[1].startswith("{")]
+
+    @classmethod
+    async def _move_batch(cls, repository: SessionRepository, keys: list) -> int:
+        key_builders = {
+            "refresh": repository.create_refresh_key,
+            "access": repository.create_access_key,
+            "blocked": repository.create_blocked_key,
+            "blocked_session": repository.create_blocked_session_key,
+        }
+        untagged = cls.untagged(keys)
+        if not untagged:
+            return 0
+        async with repository.redis.pipeline(transaction=False) as pipe:
+            for prefix, user_id, rest in untagged:
+                pipe.get(f"{prefix}:{user_id}:{rest}")
+                pipe.pttl(f"{prefix}:{user_id}:{rest}")
+            results = await pipe.execute()
+            moved = 0
+            for (prefix, user_id, rest), value, ttl in zip(untagged, results[::2], results[1::2]):
+                old_key = f"{prefix}:{user_id}:{rest}"
+                if value is not None and ttl != -2:
+                    pipe.set(key_builders[prefix](user_id, rest), value, px=ttl if ttl > 0 else None, nx=True)
+                    moved += 1
+                pipe.delete(old_key)
+                if prefix == "refresh":
+                    pipe.delete(f"refresh_index:{repository.token_digest(rest)}")
+            await pipe.execute()
+        return moved
+
+    @classmethod
+    async def _drop_untagged_batch(cls, repository: SessionRepository, keys: list) -> int:
+        """Sessions hashes of untagged user parts list the moved keys, they are registered again under the new names"""
+        untagged = [key for key in keys if not key.split(":", 1)[1].startswith("{")]
+        if untagged:
+            async with repository.redis.pipeline(transaction=False) as pipe:
+                for key in untagged:
+                    pipe.delete(key)
+                await pipe.execute()
+        return 0
+
+    @staticmethod
+    async def _index_batch(repository: SessionRepository, keys: list) -> int:
+        async with repository.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.pttl(key)
+            ttls = await pipe.execute()
+            for key, ttl in zip(keys, ttls):
+                if ttl <= 0:
+                    continue
+                _, user_part, refresh_token = key.split(":", 2)
+                user_id = user_part.strip("{}")
+                refresh_index_key = repository.create_refresh_index_key(user_id, refresh_token)
+                session_id = repository.token_digest(refresh_token)
+                sessions_key = repository.create_sessions_key(user_id)
+                pipe.set(refresh_index_key, user_id, px=ttl, nx=True)
+                pipe.hset(sessions_key, mapping={key: session_id, refresh_index_key: session_id})
+                pipe.expire(sessions_key, EXPIRE_REFRESH_TOKEN)
+            results = await pipe.execute()
+        return sum(1 for result in results[::3] if result)
+
+    @staticmethod
+    async def _access_batch(repository: SessionRepository, keys: list) -> int:
+        async with repository.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(key)
+            refresh_tokens = await pipe.execute()
+            for key, refresh_token in zip(keys, refresh_tokens):
+                if not refresh_token:
+                    continue
+                _, user_part, _ = key.split(":", 2)
+                user_id = user_part.strip("{}")
+                sessions_key = repository.create_sessions_key(user_id)
+                pipe.hset(sessions_key, key, repository.token_digest(refresh_token.decode()))
+                pipe.expire(sessions_key, EXPIRE_REFRESH_TOKEN)
+            await pipe.execute()
+        return 0
+
+    def execute(self):
+        loop = asyncio.get_event_loop()
+        moved, created = loop.run_until_complete(self.migrate(self.args.batch_size))
+        logger.info(f"Refresh index migration complete: moved - {moved}, created - {created}")
@@ -0,0 +1,66 @@
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.config import settings
+from loguru import logger
+from management.base.base_command import BaseCommand
+from passlib.context import CryptContext
+
+COST_PARAMS = {"bcrypt": "bcrypt__rounds", "argon2": "argon2__rounds"}
+
+
+def measure(context_params: dict, duration: float) -> list:
+    """
+    Hash passwords on one core for the duration
+    Args:
+        context_params: CryptContext params
+        duration: seconds to hash
+    Returns:
+        latencies of the hashes in seconds
+    """
+    context = CryptContext(**context_params)
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started_at = time.perf_counter()
+        context.hash("benchmark-password")
+        latencies.append(time.perf_counter() - started_at)
+    return latencies
+
+
+class Command(BaseCommand):
+    help: str = "Measure password hashes per second per core for hashing schemes and costs"
+
+    def add_arguments(self):
+        self.parser.add_argument("--scheme", default=settings.password_hash.context_params["schemes"][0])
+        self.parser.add_argument(
+            "--costs", type=int, nargs="*", help="bcrypt rounds or argon2 time cost, configured one by default"
+        )
+        self.parser.add_argument("--duration", type=float, default=3.0, help="seconds per cost")
+        self.parser.add_argument("--workers", type=int, default=1, help="cores hashing at the same time")
+
+    def benchmark(self, scheme: str, cost: int, duration: float, workers: int) -> dict:
+        context_params = {**settings.password_hash.context_params, "schemes": [scheme], COST_PARAMS[scheme]: cost}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(measure, [context_params] * workers, [duration] * workers))
+        latencies = sorted(latency for result in results for latency in result)
+        per_core = len(latencies) / duration / workers
+        return {
+            "cost": cost,
+            "hashes_per_second_per_core": round(per_core, 2),
+            "hashes_per_second_all_cores": round(per_core * (os.cpu_count() or 1), 2),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+        }
+
+    def execute(self):
+        scheme = self.args.scheme
+        if scheme not in COST_PARAMS:
+            logger.error(f"Unknown scheme {scheme}, available: {', '.join(COST_PARAMS)}")
+            return
+        default_cost = settings.password_hash.context_params[COST_PARAMS[scheme]]
+        for cost in self.args.costs or [default_cost]:
+            result = self.benchmark(scheme, cost, self.args.duration, self.args.workers)
+            logger.info(f"{scheme}: {result}")
@@ -3,9 +3,12 @@ import asyncio
 import grpc
 from clients.grpc.proto.auth import auth_pb2_grpc
 from clients.grpc.servicer.auth import get_auth_servicer
+from common.tracing import get_tracer
 from core.config import settings
-from core.interceptor import signature_interceptor
+from core.interceptor import metrics_interceptor, signature_interceptor, tracing_interceptor
 from core.logguru_config import logging_interceptor
+from core.metrics import register_collectors, start_metrics_server
+from db.postgres.session_manager import db_manager
 from loguru import logger
 from management.base.base_command import BaseCommand
 
@@ -18,17 +21,34 @@ class Command(BaseCommand):
         self.parser.add_argument("--port", default=settings.grpc_server.port)
 
     async def start_server(self, host: str, port: int):
-        servicer = await self.servicer
-        server = grpc.aio.server(interceptors=(logging_interceptor, signature_interceptor))
-        auth_pb2_grpc.add_AuthServicer_to_server(servicer, server)
+        db_manager.init(
+            settings.postgres.database_url,
+            connect_args=settings.postgres.connect_args,
+            **settings.postgres.pool_params,
+        )
+        interceptors = (tracing_interceptor, logging_interceptor, signature_interceptor)
+        metrics_server = None
+        if settings.metrics.enabled:
+            interceptors = (metrics_interceptor, *interceptors)
+            register_collectors(api=False)
+            if settings.metrics.grpc_port:
+                metrics_server = await start_metrics_server(host, settings.metrics.grpc_port)
+        server = grpc.aio.server(interceptors=interceptors)
+        auth_pb2_grpc.add_AuthServicer_to_server(self.servicer, server)
         server.add_insecure_port(f"{host}:{port}")
-        await server.start()
-        logger.info(f"Server process start in {host}:{port}")
-        await server.wait_for_termination()
+        try:
+            await server.start()
+            logger.info(f"Server process start in {host}:{port}")
+            await server.wait_for_termination()
+        finally:
+            if metrics_server is not None:
+                metrics_server.close()
+            await db_manager.close()
+            get_tracer().shutdown()
 
     @property
-    async def servicer(self):
-        return await get_auth_servicer()
+    def servicer(self):
+        return get_auth_servicer()
 
     def execute(self):
         loop = asyncio.get_event_loop()
@@ -0,0 +1,41 @@
+import asyncio
+
+from common.metrics import registry
+from core.config import settings
+from core.metrics import start_metrics_server
+from db.postgres.session_manager import db_manager
+from management.base.base_command import BaseCommand
+from repository.grpc_implementation.transaction_repository import get_grpc_transaction_repository
+from services.outbox.dispatcher import get_outbox_dispatcher
+
+
+class Command(BaseCommand):
+    help: str = "Run outbox dispatcher, the only process delivering outbox events unless OUTBOX_DISPATCHER_ENABLED is set"
+
+    def add_arguments(self):
+        self.parser.add_argument("--metrics-host", default="0.0.0.0")
+
+    async def run(self):
+        db_manager.init(
+            settings.postgres.database_url,
+            connect_args=settings.postgres.connect_args,
+            **settings.postgres.pool_params,
+        )
+        dispatcher = get_outbox_dispatcher()
+        metrics_server = None
+        if settings.metrics.enabled:
+            registry.register_collector("db_pool", db_manager.pool_stats)
+            registry.register_collector("outbox", dispatcher.stats)
+            if settings.metrics.outbox_port:
+                metrics_server = await start_metrics_server(self.args.metrics_host, settings.metrics.outbox_port)
+        try:
+            await dispatcher.run()
+        finally:
+            if metrics_server is not None:
+                metrics_server.close()
+            await db_manager.close()
+            await get_grpc_transaction_repository().close()
+
+    def execute(self):
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(self.run())
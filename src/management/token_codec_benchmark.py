@@ -0,0 +1,77 @@
+import time
+import uuid
+from typing import Callable
+
+import jwt
+
+from core.config import settings
+from loguru import logger
+from management.base.base_command import BaseCommand
+from schemas.entities.auth_entity import AuthEntity
+from services.auth.token_codec import TokenClaims, create_token_codec
+
+
+def measure(operation: Callable[[], object], duration: float) -> float:
+    """
+    Call the operation for the duration
+    Args:
+        operation: operation to measure
+        duration: seconds to call it
+    Returns:
+        mean duration of a call in microseconds
+    """
+    calls = 0
+    started_at = time.perf_counter()
+    deadline = started_at + duration
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            operation()
+        calls += 100
+    return (time.perf_counter() - started_at) / calls * 1_000_000
+
+
+class Command(BaseCommand):
+    help: str = (
+        "Compare encoding and verification of access tokens by PyJWT with Pydantic claims against the token codec"
+    )
+
+    def add_arguments(self):
+        self.parser.add_argument("--duration", type=float, default=2.0, help="seconds per operation")
+
+    def execute(self):
+        secret, algorithm = settings.jwt_config.jwt_secret_key, settings.jwt_config.encode_algorithm
+        if algorithm not in ("HS256", "HS384", "HS512"):
+            logger.info(f"{algorithm} is signed with the key ring, the shared secret is measured with HS256")
+            algorithm = "HS256"
+        codec = create_token_codec(secret, algorithm)
+        user = AuthEntity(user_id=str(uuid.uuid4()), sid=uuid.uuid4().hex, fph=uuid.uuid4().hex)
+        claims = TokenClaims(user.user_id, user.is_superuser, user.sid, user.fph)
+
+        def legacy_encode() -> str:
+            payload = {
+                "sub": "authentication",
+                "exp": int(time.time()) + 600,
+                "iat": int(time.time()),
+                **user.dict(exclude_none=True),
+            }
+            return jwt.encode(payload, secret, algorithm=algorithm)
+
+        def codec_encode() -> str:
+            now = int(time.time())
+            payload = {"sub": "authentication", "exp": now + 600, "iat": now, "user_id": claims.user_id}
+            payload.update(is_superuser=claims.is_superuser, sid=claims.sid, fph=claims.fph)
+            return codec.encode(payload)
+
+        token = legacy_encode()
+
+        def legacy_decode() -> AuthEntity:
+            return AuthEntity(**jwt.decode(token, secret, algorithms=[algorithm]))
+
+        def codec_decode() -> TokenClaims:
+            return TokenClaims.from_payload(codec.decode(token))
+
+        for name, legacy, current in (("encode", legacy_encode, codec_encode), ("decode", legacy_decode, codec_decode)):
+            legacy_us, codec_us = measure(legacy, self.args.duration), measure(current, self.args.duration)
+            logger.info(
+                f"{name}: pyjwt {legacy_us:.2f} us/op, codec {codec_us:.2f} us/op, speedup x{legacy_us / codec_us:.2f}"
+            )
@@ -0,0 +1,41 @@
+"""outbox_event
+
+Revision ID: 4f1c2b7e9a30
+Revises: d97c06e28ed3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '4f1c2b7e9a30'
+down_revision = 'd97c06e28ed3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_event',
+    sa.Column('event_type', sa.String(length=63), nullable=False),
+    sa.Column('aggregate_id', sa.UUID(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('idempotency_key', sa.String(length=255), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('dispatched_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('id', name='outbox_event_pkey'),
+    sa.UniqueConstraint('idempotency_key', name='outbox_event_idempotency_key_unique')
+    )
+    op.create_index('outbox_event_pending_idx', 'outbox_event', ['available_at'], unique=False,
+                    postgresql_where=sa.text('dispatched_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('outbox_event_pending_idx', table_name='outbox_event', postgresql_where=sa.text('dispatched_at IS NULL'))
+    op.drop_table('outbox_event')
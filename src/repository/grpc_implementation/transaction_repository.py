@@ -1,39 +1,86 @@
+import asyncio
 from functools import lru_cache
+from typing import Optional
 
-from grpc.aio import AioRpcError, insecure_channel
+from grpc.aio import AioRpcError, Channel, insecure_channel
 
 from clients.grpc.proto.transaction import transaction_pb2
 from clients.grpc.proto.transaction.transaction_pb2_grpc import TransactionStub
 from common.exceptions.grpc import GRPCConnectionException
+from common.metrics import timed
+from common.tracing import TRACEPARENT, client_span, current_traceparent
 from core.config import settings
 from repository.interfaces.grpc.abc_transaction_repository import AbstractTransactionRepository
 
 
 class GRPCTransactionRepository(AbstractTransactionRepository):
+    """
+    Client of the transaction service with one channel per process, the channel is opened on first call
+    and keeps its HTTP/2 connection alive between calls. At most max_concurrent_streams calls are in flight,
+    the rest wait for a free stream instead of piling up on the connection
+    """
+
     def __init__(self):
         self.metadata = settings.transaction_grpc.metadata
+        self._channel: Optional[Channel] = None
+        self._stub: Optional[TransactionStub] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def channel(self) -> Channel:
+        if self._channel is None:
+            self._channel = insecure_channel(
+                settings.transaction_grpc.url, options=settings.transaction_grpc.channel_options
+            )
+        return self._channel
 
     @property
-    def channel(self):
-        return insecure_channel(settings.transaction_grpc.url)
+    def stub(self) -> TransactionStub:
+        if self._stub is None:
+            self._stub = TransactionStub(self.channel)
+        return self._stub
 
     @property
-    def stub(self):
-        return TransactionStub(self.channel)
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.transaction_grpc.max_concurrent_streams)
+        return self._semaphore
 
-    async def create_user_balance(self, user_id: str):
+    @timed("transaction_grpc", "create_user_balance")
+    async def create_user_balance(self, user_id: str, idempotency_key: Optional[str] = None):
         """
         create_user_balance
         Args:
             user_id: id of the user
+            idempotency_key: sent as idempotency-key metadata, repeated calls with the same key create one balance
         """
-        try:
-            balance_id = await self.stub.CreateUserBalance(
-                transaction_pb2.CreateUserBalanceRequest(user_id=user_id), metadata=self.metadata
-            )
-            return balance_id
-        except AioRpcError:
-            raise GRPCConnectionException("Error while creating user balance")
+        metadata = self.metadata + [("idempotency-key", idempotency_key)] if idempotency_key else self.metadata
+        attributes = {"rpc.system": "grpc", "rpc.method": "CreateUserBalance", "user_id": user_id}
+        with client_span("grpc CreateUserBalance", attributes) as span:
+            traceparent = span.context.traceparent if span is not None else current_traceparent()
+            if traceparent is not None:
+                metadata = metadata + [(TRACEPARENT, traceparent)]
+            try:
+                async with self.semaphore:
+                    balance_id = await self.stub.CreateUserBalance(
+                        transaction_pb2.CreateUserBalanceRequest(user_id=user_id),
+                        metadata=metadata,
+                        timeout=settings.transaction_grpc.timeout,
+                    )
+                return balance_id
+            except AioRpcError as e:
+                if span is not None:
+                    span.set_attribute("rpc.grpc.status_code", e.code().name)
+                raise GRPCConnectionException("Error while creating user balance")
+
+    async def close(self) -> None:
+        """Close the channel, calls in flight are given a second to finish"""
+        if self._channel is None:
+            return
+        await self._channel.close(grace=1)
+        self._channel = None
+        self._stub = None
+        self._semaphore = None
 
 
 @lru_cache()
@@ -0,0 +1,32 @@
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from db.postgres.models.outbox import OutboxEvent
+
+
+class AbstractOutboxRepository(ABC):
+    @abstractmethod
+    async def add_event(self, event_type: str, aggregate_id: uuid.UUID, idempotency_key: str, payload: dict) -> None:
+        pass
+
+    @abstractmethod
+    async def claim_events(self, limit: int, max_attempts: int, lease: float) -> List[OutboxEvent]:
+        pass
+
+    @abstractmethod
+    async def mark_dispatched(self, event_ids: Sequence[uuid.UUID]) -> None:
+        pass
+
+    @abstractmethod
+    async def mark_failed(self, event_id: uuid.UUID, error: str, available_at: datetime) -> None:
+        pass
+
+    @abstractmethod
+    async def pending_stats(self, max_attempts: int) -> Tuple[int, int, Optional[datetime]]:
+        pass
+
+    @abstractmethod
+    async def commit(self) -> None:
+        pass
@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Optional
+from typing import List, Optional, Sequence
 
 from db.postgres.models.user import AuthUser
 from repository.base.abc_entity_repository import BaseRepository
@@ -13,12 +13,16 @@ class AbstractUserRepository(BaseRepository):
     ) -> Optional[BaseEntity]:
         pass
 
+    @abstractmethod
+    async def get_users_by_ids(self, user_ids: Sequence[str]) -> List[BaseEntity]:
+        pass
+
     @abstractmethod
     async def update_user_fields(self, user_db: AuthUser, **fields) -> None:
         pass
 
     @abstractmethod
-    async def create_user(self, **fields) -> BaseEntity:
+    async def create_user(self, **fields) -> Optional[BaseEntity]:
         pass
 
     @abstractmethod
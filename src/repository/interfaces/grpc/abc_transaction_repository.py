@@ -1,7 +1,12 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 
 class AbstractTransactionRepository(ABC):
     @abstractmethod
-    async def create_user_balance(self, user_id: str):
+    async def create_user_balance(self, user_id: str, idempotency_key: Optional[str] = None):
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
         pass
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from typing import Dict, List, Optional, Sequence
 
 from repository.base.abc_kv_repository import AbstractKVRepository
 
@@ -11,3 +12,19 @@ class AbstractRedisCacheRepository(AbstractKVRepository):
     @abstractmethod
     async def redis_set_key(self, key: str, value: str, expire: int):
         raise NotImplementedError
+
+    @abstractmethod
+    async def redis_get_key(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def redis_delete_key(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def redis_get_keys(self, keys: Sequence[str]) -> List[Optional[str]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def redis_set_keys(self, values: Dict[str, str], expire: int):
+        raise NotImplementedError
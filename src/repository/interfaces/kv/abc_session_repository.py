@@ -1,20 +1,71 @@
 from abc import abstractmethod
-from typing import List, Union
+from typing import List
 
 from repository.base.abc_kv_repository import AbstractKVRepository
 
 
 class AbstractSessionRepository(AbstractKVRepository):
     @staticmethod
-    def create_access_key(user_id: str, access_token: str) -> str:
+    def token_digest(token: str) -> str:
         raise NotImplementedError
 
-    @staticmethod
-    def create_refresh_key(user_id: str, refresh_token: str) -> str:
+    @classmethod
+    def create_access_key(cls, user_id: str, access_token: str) -> str:
+        raise NotImplementedError
+
+    @classmethod
+    def create_refresh_key(cls, user_id: str, refresh_token: str) -> str:
+        raise NotImplementedError
+
+    @classmethod
+    def create_refresh_index_key(cls, user_id: str, refresh_token: str) -> str:
+        raise NotImplementedError
+
+    @classmethod
+    def create_blocked_key(cls, user_id: str, access_token: str) -> str:
+        raise NotImplementedError
+
+    @classmethod
+    def create_blocked_session_key(cls, user_id: str, session_id: str) -> str:
+        raise NotImplementedError
+
+    @classmethod
+    def create_sessions_key(cls, user_id: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def has_refresh(self, user_id: str, refresh_token: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_session(
+            self, user_id: str, access_token: str, refresh_token: str, fingerprint: str, expire: int
+    ) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def rotate_session(
+            self,
+            user_id: str,
+            old_refresh_token: str,
+            access_token: str,
+            refresh_token: str,
+            fingerprint: str,
+            expire: int,
+            blocked_expire: int,
+    ) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def revoke_session(self, user_id: str, access_token: str, blocked_expire: int) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def revoke_all_sessions(self, user_id: str, access_token: str, blocked_expire: int) -> List[str]:
         raise NotImplementedError
 
     @abstractmethod
-    async def has_refresh(self, refresh_token: str) -> bool:
+    async def is_session_blocked(self, user_id: str, session_id: str) -> bool:
         raise NotImplementedError
 
     @abstractmethod
@@ -50,6 +50,7 @@ class SQLRepository(BaseRepository):
     async def add_all(self, data: List[BaseEntity]) -> None:
         try:
             self.session.add_all([self.class_model(**entity.dict(exclude_none=True)) for entity in data])
+            await self.session.flush()
         except IntegrityError as e:
             raise IntegrityDataError(self.class_model.__name__, e)
 
@@ -0,0 +1,232 @@
+import uuid
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Union
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.ttl_cache import TTLCache
+from core.config import settings
+from db.postgres.models.user import AuthUser
+from repository.interfaces.kv.abc_cache_repository import AbstractRedisCacheRepository
+from repository.postgres_implementation.user_repository import SQLUserRepository
+from repository.redis_implementation.cache_repository import RedisCacheRepository
+from schemas.entities.base_entity import BaseEntity
+from schemas.entities.user_entity import UserInfoEntity
+
+
+class UserCache:
+    """In-process tier of the user cache and counters of both tiers, shared by all repositories of the process"""
+
+    def __init__(self, local_size: int, local_ttl: float, redis_ttl: int) -> None:
+        self.local = TTLCache(local_size, local_ttl)
+        self.redis_ttl = redis_ttl
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+
+    def stats(self) -> dict:
+        requests = self.redis_hits + self.redis_misses
+        return {
+            "local": self.local.stats(),
+            "redis": {
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+                "errors": self.redis_errors,
+                "hit_ratio": self.redis_hits / requests if requests else 0.0,
+            },
+        }
+
+
+class CachedSQLUserRepository(SQLUserRepository):
+    """
+    SQLUserRepository with read-through cache of users by id: the in-process LRU first, then redis.
+    Only entity lookups by id are cached, instances for updates are always read from the database.
+    Cached users are UserInfoEntity projections, password hashes are never cached and are read from the database.
+    Changes of this process drop both tiers, other processes see them after local ttl at most
+    """
+
+    def __init__(
+            self, session: AsyncSession, cache: UserCache, redis_cache: Optional[AbstractRedisCacheRepository] = None
+    ):
+        super().__init__(session)
+        self.cache = cache
+        self.redis_cache = redis_cache
+
+    @staticmethod
+    def create_user_key(user_id: Union[str, uuid.UUID]) -> str:
+        """
+        Creating a key of the cached user user:<user_id>
+        Args:
+            user_id
+        Returns:
+            str: user key
+        """
+        return f"user:{user_id}"
+
+    async def get_user_by_field(
+            self, raise_if_notfound: bool = True, return_entity: bool = True, **fields
+    ) -> Optional[BaseEntity]:
+        """
+        Getting a user by field, users by id are read through the cache
+        Args:
+            raise_if_notfound: raise if user not found
+            return_entity: return instance or entity
+            **fields: fields of user
+        Returns:
+            user instance, or UserInfoEntity without the password for lookups by id
+        """
+        if not return_entity or list(fields) != ["id"]:
+            return await super().get_user_by_field(raise_if_notfound, return_entity, **fields)
+        key = self.create_user_key(fields["id"])
+        if (entity := self.cache.local.get(key)) is not None:
+            return entity
+        if (entity := await self._get_from_redis(key)) is not None:
+            self.cache.local.set(key, entity)
+            return entity
+        if (entity := await super().get_user_by_field(raise_if_notfound, return_entity, **fields)) is not None:
+            entity = UserInfoEntity.from_orm(entity)
+            self.cache.local.set(key, entity)
+            await self._set_to_redis(key, entity)
+        return entity
+
+    async def get_users_by_ids(self, user_ids: Sequence[Union[str, uuid.UUID]]) -> List[BaseEntity]:
+        """
+        Getting existing users by ids: the in-process tier first, then one MGET to redis
+        and one query to the database for the rest
+        Args:
+            user_ids: ids of users
+        Returns:
+            UserInfoEntity of users in order of the ids, missing users are skipped
+        """
+        keys = {self.create_user_key(user_id): user_id for user_id in user_ids}
+        found: Dict[str, UserInfoEntity] = {}
+        for key in keys:
+            if (entity := self.cache.local.get(key)) is not None:
+                found[key] = entity
+        missing = [key for key in keys if key not in found]
+        for key, entity in zip(missing, await self._get_many_from_redis(missing)):
+            if entity is not None:
+                found[key] = entity
+                self.cache.local.set(key, entity)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            loaded = {}
+            for entity in await super().get_users_by_ids([keys[key] for key in missing]):
+                entity = UserInfoEntity.from_orm(entity)
+                key = self.create_user_key(entity.id)
+                found[key] = loaded[key] = entity
+                self.cache.local.set(key, entity)
+            await self._set_many_to_redis(loaded)
+        return [found[key] for key in keys if key in found]
+
+    async def update_user_fields(self, user_db: AuthUser, **fields) -> None:
+        await super().update_user_fields(user_db, **fields)
+        await self.invalidate(user_db.id)
+
+    async def update(self, self_id: uuid.UUID, **params) -> BaseEntity:
+        entity = await super().update(self_id, **params)
+        await self.invalidate(self_id)
+        return entity
+
+    async def delete_user(self, user_id: str):
+        await super().delete_user(user_id)
+        await self.invalidate(user_id)
+
+    async def remove(self, self_id: uuid.UUID) -> None:
+        await super().remove(self_id)
+        await self.invalidate(self_id)
+
+    async def invalidate(self, user_id: Union[str, uuid.UUID]) -> None:
+        """
+        Drop the user from both tiers of the cache
+        Args:
+            user_id: id of the user
+        """
+        key = self.create_user_key(user_id)
+        self.cache.local.delete(key)
+        if self.redis_cache is None:
+            return
+        try:
+            await self.redis_cache.redis_delete_key(key)
+        except RedisError as e:
+            self.cache.redis_errors += 1
+            logger.warning(f"User cache invalidation failed for {key}: {e}")
+
+    async def _get_from_redis(self, key: str) -> Optional[UserInfoEntity]:
+        if self.redis_cache is None:
+            return None
+        try:
+            value = await self.redis_cache.redis_get_key(key)
+        except RedisError as e:
+            self.cache.redis_errors += 1
+            logger.warning(f"User cache read failed for {key}: {e}")
+            return None
+        if value is None:
+            self.cache.redis_misses += 1
+            return None
+        self.cache.redis_hits += 1
+        return UserInfoEntity.parse_raw(value)
+
+    async def _get_many_from_redis(self, keys: List[str]) -> List[Optional[UserInfoEntity]]:
+        if self.redis_cache is None or not keys:
+            return [None] * len(keys)
+        try:
+            values = await self.redis_cache.redis_get_keys(keys)
+        except RedisError as e:
+            self.cache.redis_errors += 1
+            logger.warning(f"User cache read failed for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+        hits = sum(value is not None for value in values)
+        self.cache.redis_hits += hits
+        self.cache.redis_misses += len(values) - hits
+        return [UserInfoEntity.parse_raw(value) if value is not None else None for value in values]
+
+    async def _set_many_to_redis(self, entities: Dict[str, UserInfoEntity]) -> None:
+        if self.redis_cache is None or not entities:
+            return
+        try:
+            await self.redis_cache.redis_set_keys(
+                {key: entity.json() for key, entity in entities.items()}, self.cache.redis_ttl
+            )
+        except RedisError as e:
+            self.cache.redis_errors += 1
+            logger.warning(f"User cache write failed for {len(entities)} keys: {e}")
+
+    async def _set_to_redis(self, key: str, entity: UserInfoEntity) -> None:
+        if self.redis_cache is None:
+            return
+        try:
+            await self.redis_cache.redis_set_key(key, entity.json(), self.cache.redis_ttl)
+        except RedisError as e:
+            self.cache.redis_errors += 1
+            logger.warning(f"User cache write failed for {key}: {e}")
+
+
+@lru_cache()
+def get_user_cache() -> UserCache:
+    return UserCache(
+        local_size=settings.user_cache.local_size,
+        local_ttl=settings.user_cache.local_ttl,
+        redis_ttl=settings.user_cache.redis_ttl,
+    )
+
+
+def get_user_repository(session: AsyncSession, redis_client: Optional[Redis] = None) -> SQLUserRepository:
+    """
+    User repository of the request, cached unless USER_CACHE_ENABLED is off
+    Args:
+        session: database session
+        redis_client: redis client of the shared tier, only the in-process tier is used without it
+    Returns:
+        user repository
+    """
+    if not settings.user_cache.enabled:
+        return SQLUserRepository(session=session)
+    return CachedSQLUserRepository(
+        session=session,
+        cache=get_user_cache(),
+        redis_cache=RedisCacheRepository(redis_client) if redis_client is not None else None,
+    )
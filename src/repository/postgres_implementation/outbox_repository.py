@@ -0,0 +1,102 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.postgres.models.outbox import OutboxEvent
+from repository.interfaces.entity.abc_outbox_repository import AbstractOutboxRepository
+
+
+class SQLOutboxRepository(AbstractOutboxRepository):
+    class_model = OutboxEvent
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_event(self, event_type: str, aggregate_id: uuid.UUID, idempotency_key: str, payload: dict) -> None:
+        """
+        Adding an event to the current transaction of the session, it is saved by the commit of the caller
+        Args:
+            event_type: type of the event, selects its handler
+            aggregate_id: id of the object the event belongs to
+            idempotency_key: key sent with every attempt, so the receiver can drop repeated deliveries
+            payload: arguments of the handler
+        """
+        self.session.add(
+            self.class_model(
+                event_type=event_type, aggregate_id=aggregate_id, idempotency_key=idempotency_key, payload=payload
+            )
+        )
+        await self.session.flush()
+
+    async def claim_events(self, limit: int, max_attempts: int, lease: float) -> List[OutboxEvent]:
+        """
+        Leasing the oldest events ready for dispatch: their attempt is counted and available_at is moved
+        to the end of the lease, rows are locked only by this statement, events locked by other dispatchers
+        are skipped. Events of a dispatcher that stopped before saving the results are claimed again after the lease
+        Args:
+            limit: max count of events
+            max_attempts: events with this count of attempts are not dispatched anymore
+            lease: seconds to deliver the events before other dispatchers can claim them
+        Returns:
+            events with the counted attempt
+        """
+        now = datetime.utcnow()
+        ready = (
+            select(self.class_model.id)
+            .where(
+                self.class_model.dispatched_at.is_(None),
+                self.class_model.available_at <= now,
+                self.class_model.attempts < max_attempts,
+            )
+            .order_by(self.class_model.available_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(self.class_model)
+            .where(self.class_model.id.in_(ready.scalar_subquery()))
+            .values(attempts=self.class_model.attempts + 1, available_at=now + timedelta(seconds=lease))
+            .returning(self.class_model)
+            .execution_options(synchronize_session=False)
+        )
+        return sorted(await self.session.scalars(stmt), key=lambda event: event.created_at)
+
+    async def mark_dispatched(self, event_ids: Sequence[uuid.UUID]) -> None:
+        if not event_ids:
+            return
+        await self.session.execute(
+            update(self.class_model)
+            .where(self.class_model.id.in_(event_ids))
+            .values(dispatched_at=datetime.utcnow(), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def mark_failed(self, event_id: uuid.UUID, error: str, available_at: datetime) -> None:
+        await self.session.execute(
+            update(self.class_model)
+            .where(self.class_model.id == event_id)
+            .values(last_error=error, available_at=available_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def pending_stats(self, max_attempts: int) -> Tuple[int, int, Optional[datetime]]:
+        """
+        Getting the backlog of the outbox
+        Args:
+            max_attempts: events with this count of attempts are counted as dead
+        Returns:
+            count of pending events, count of dead events and creation time of the oldest pending one
+        """
+        pending = self.class_model.attempts < max_attempts
+        stmt = select(
+            func.count().filter(pending),
+            func.count().filter(~pending),
+            func.min(self.class_model.created_at).filter(pending),
+        ).where(self.class_model.dispatched_at.is_(None))
+        return tuple((await self.session.execute(stmt)).one())
+
+    async def commit(self) -> None:
+        await self.session.commit()
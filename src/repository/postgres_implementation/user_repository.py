@@ -1,8 +1,10 @@
+import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Sequence, Union
 
 from loguru import logger
-from sqlalchemy import desc, select
+from sqlalchemy import any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert
 
 from common.exceptions.user import UserNotExists
 from db.postgres.models.user import AuthUser
@@ -35,6 +37,22 @@ class SQLUserRepository(SQLRepository, AbstractUserRepository):
             logger.error(f"User does not exists: {fields}")
             raise UserNotExists("User does not exists", **fields)
 
+    async def get_users_by_ids(self, user_ids: Sequence[Union[str, uuid.UUID]]) -> List[BaseEntity]:
+        """
+        Getting existing users by ids in one query, WHERE id = ANY(:ids) keeps a single statement for any count of ids
+        Args:
+            user_ids: ids of users
+        Returns:
+            user entities, missing users are skipped
+        """
+        if not user_ids:
+            return []
+        stmt = select(self.class_model).where(
+            self.class_model.id == any_(bindparam("ids", type_=ARRAY(UUID(as_uuid=True))))
+        )
+        instances = await self.session.scalars(stmt, {"ids": [uuid.UUID(str(user_id)) for user_id in user_ids]})
+        return [self.to_entity(instance) for instance in instances]
+
     async def update_user_fields(self, user_db: AuthUser, **fields) -> None:
         """
         Updating a user
@@ -48,25 +66,23 @@ class SQLUserRepository(SQLRepository, AbstractUserRepository):
         user_db.updated_at = datetime.utcnow()
         await self.session.commit()
 
-    async def create_user(self, **fields) -> BaseEntity:
+    async def create_user(self, **fields) -> Optional[BaseEntity]:
         """
-        Creating a user
+        Creating a user with one INSERT ... ON CONFLICT DO NOTHING RETURNING,
+        the insert is committed by the caller together with the rest of its transaction
         Args:
             **fields: fields of user
 
         Returns:
-            user instance
+            user instance or None if the email is already registered
         """
-        db_user = self.class_model(**fields)
-        self.session.add(db_user)
-
-        await self.session.commit()
-
-        result = await self.session.scalars(
-            select(self.class_model)
-            .order_by(desc(self.class_model.created_at))
+        stmt = (
+            insert(self.class_model)
+            .values(**fields)
+            .on_conflict_do_nothing(constraint="user_email_unique")
+            .returning(self.class_model)
         )
-        return result.first()
+        return await self.session.scalar(stmt)
 
     async def delete_user(self, user_id: str):
         """
@@ -74,6 +90,6 @@ class SQLUserRepository(SQLRepository, AbstractUserRepository):
         Args:
             user_id: id of the user
         """
-        db_user = await self.get_user_by_field(id=user_id)
+        db_user = await self.get_user_by_field(return_entity=False, id=user_id)
         await self.session.delete(db_user)
         await self.session.commit()
@@ -1,18 +1,38 @@
 from __future__ import annotations
 
+import hashlib
 from abc import ABC
 from typing import Union
 
+from core.config import settings
 from redis.asyncio import Redis
 from repository.base.abc_kv_repository import AbstractKVRepository
 
 
 class BaseSessionRepository(AbstractKVRepository, ABC):
+    """
+    Keys of a user are built around the user part, with hash tags it is {<user_id>}
+    so every key of the user lives in one hash slot of Redis Cluster and scripts over them stay single-slot
+    """
+
+    hash_tags: bool = settings.redis.session_hash_tags
+
     def __init__(self, redis_client: Redis):
         self.redis = redis_client
 
-    @staticmethod
-    def create_access_key(user_id: str, access_token: str) -> str:
+    @classmethod
+    def user_part(cls, user_id: str) -> str:
+        """
+        Part of the keys identifying the user
+        Args:
+            user_id
+        Returns:
+            str: {<user_id>} with hash tags, user_id without them
+        """
+        return f"{{{user_id}}}" if cls.hash_tags else user_id
+
+    @classmethod
+    def create_access_key(cls, user_id: str, access_token: str) -> str:
         """
         Creating an access key to put in the cache access:<user_id>:<access_token>
         Args:
@@ -21,10 +41,10 @@ class BaseSessionRepository(AbstractKVRepository, ABC):
         Returns:
             str: access key
         """
-        return f"access:{user_id}:{access_token}"
+        return f"access:{cls.user_part(user_id)}:{access_token}"
 
-    @staticmethod
-    def create_refresh_key(user_id: str, refresh_token: str) -> str:
+    @classmethod
+    def create_refresh_key(cls, user_id: str, refresh_token: str) -> str:
         """
         Creating a refresh key to put in the cache refresh:<user_id>:<refresh_token>
         Args:
@@ -33,7 +53,70 @@ class BaseSessionRepository(AbstractKVRepository, ABC):
         Returns:
             str: refresh key
         """
-        return f"refresh:{user_id}:{refresh_token}"
+        return f"refresh:{cls.user_part(user_id)}:{refresh_token}"
+
+    @classmethod
+    def create_blocked_key(cls, user_id: str, access_token: str) -> str:
+        """
+        Creating a key of the blocked access token blocked:<user_id>:<access_token>
+        Args:
+            user_id
+            access_token
+        Returns:
+            str: blocked key
+        """
+        return f"blocked:{cls.user_part(user_id)}:{access_token}"
+
+    @classmethod
+    def create_blocked_session_key(cls, user_id: str, session_id: str) -> str:
+        """
+        Creating a key of the blocked session blocked_session:<user_id>:<session_id>,
+        access tokens of the session are rejected while it exists
+        Args:
+            user_id
+            session_id
+        Returns:
+            str: blocked session key
+        """
+        return f"blocked_session:{cls.user_part(user_id)}:{session_id}"
+
+    @classmethod
+    def create_sessions_key(cls, user_id: str) -> str:
+        """
+        Creating a key of the user sessions hash sessions:<user_id>,
+        its fields are the session keys of the user and values are their session ids
+        Args:
+            user_id
+        Returns:
+            str: sessions key
+        """
+        return f"sessions:{cls.user_part(user_id)}"
+
+    @staticmethod
+    def token_digest(token: str) -> str:
+        """
+        Digest of a token, used to index it without storing the token itself
+        Args:
+            token
+        Returns:
+            str: sha256 hex digest
+        """
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    def create_refresh_index_key(cls, user_id: str, refresh_token: str) -> str:
+        """
+        Creating a refresh index key refresh_index:<sha256(refresh_token)>, its value is the owner user_id.
+        With hash tags it is refresh_index:{<user_id>}:<sha256(refresh_token)> in the slot of the user
+        Args:
+            user_id
+            refresh_token
+        Returns:
+            str: refresh index key
+        """
+        if cls.hash_tags:
+            return f"refresh_index:{cls.user_part(user_id)}:{cls.token_digest(refresh_token)}"
+        return f"refresh_index:{cls.token_digest(refresh_token)}"
 
     async def get(self, key: str, **kwargs) -> str | None:
         value = await self.redis.get(key)
@@ -47,6 +130,4 @@ class BaseSessionRepository(AbstractKVRepository, ABC):
         await self.redis.set(key, value, expire)
 
     async def has(self, key: str) -> bool:
-        if await self.redis.keys(key):
-            return True
-        return False
+        return bool(await self.redis.exists(key))
@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional, Sequence
+
 from repository.interfaces.kv.abc_cache_repository import AbstractRedisCacheRepository
 from repository.redis_implementation.base_repository import BaseSessionRepository
 
@@ -26,3 +28,45 @@ class RedisCacheRepository(BaseSessionRepository, AbstractRedisCacheRepository):
             value=value,
             expire=expire,
         )
+
+    async def redis_get_key(self, key: str) -> Optional[str]:
+        """
+        Get value of the key from the cache
+        Args:
+            key: the key to get from the cache
+        Returns:
+            value or None if the key does not exist
+        """
+        return await self.get(key)
+
+    async def redis_delete_key(self, key: str):
+        """
+        Delete key from the cache
+        Args:
+            key: the key to delete from the cache
+        """
+        await self.delete(key)
+
+    async def redis_get_keys(self, keys: Sequence[str]) -> List[Optional[str]]:
+        """
+        Get values of several keys from the cache with one MGET
+        Args:
+            keys: the keys to get from the cache
+        Returns:
+            values in order of the keys, None for missing ones
+        """
+        if not keys:
+            return []
+        return [value.decode() if value is not None else None for value in await self.redis.mget(keys)]
+
+    async def redis_set_keys(self, values: Dict[str, str], expire: int):
+        """
+        Set several keys to cache in one pipeline
+        Args:
+            values: values of the keys to set in the cache
+            expire: expire time
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, value, expire)
+            await pipe.execute()
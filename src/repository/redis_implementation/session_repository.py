@@ -1,18 +1,260 @@
+from typing import List
+
+from redis.asyncio import Redis
+
 from repository.interfaces.kv.abc_session_repository import AbstractSessionRepository
 from repository.redis_implementation.base_repository import BaseSessionRepository
 
+# Deletes every key of the session from the sessions hash and drops entries whose keys have already expired.
+REMOVE_SESSION_FUNCTION = """
+local function remove_session(sessions_key, session_id)
+    local entries = redis.call('HGETALL', sessions_key)
+    local removed = 0
+    for i = 1, #entries, 2 do
+        local key, key_session_id = entries[i], entries[i + 1]
+        if key_session_id == session_id or redis.call('EXISTS', key) == 0 then
+            removed = removed + redis.call('DEL', key)
+            redis.call('HDEL', sessions_key, key)
+        end
+    end
+    return removed
+end
+"""
+
+# KEYS[1] - sessions hash, KEYS[2] - refresh key, KEYS[3] - refresh index key, KEYS[4] - access key.
+# ARGV[1] - fingerprint, ARGV[2] - user_id, ARGV[3] - refresh token, ARGV[4] - session id, ARGV[5] - expire.
+# Sets the token pair of a new session with their sessions hash entries.
+SET_SESSION_SCRIPT = """
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[5])
+redis.call('SET', KEYS[3], ARGV[2], 'EX', ARGV[5])
+redis.call('SET', KEYS[4], ARGV[3], 'EX', ARGV[5])
+redis.call('HSET', KEYS[1], KEYS[2], ARGV[4], KEYS[3], ARGV[4], KEYS[4], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+"""
+
+# KEYS[1] - sessions hash, KEYS[2] - old refresh key, KEYS[3] - old refresh index key,
+# KEYS[4] - new refresh key, KEYS[5] - new refresh index key, KEYS[6] - new access key,
+# KEYS[7] - blocked session key of the old session.
+# ARGV[1] - old session id, ARGV[2] - new session id, ARGV[3] - fingerprint, ARGV[4] - user_id,
+# ARGV[5] - new refresh token, ARGV[6] - expire, ARGV[7] - blocked expire, ARGV[8] - revocation channel.
+# Replaces the session of the old refresh token, returns 0 if it was already removed.
+ROTATE_SESSION_SCRIPT = REMOVE_SESSION_FUNCTION + """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return 0
+end
+redis.call('SET', KEYS[7], 'True', 'EX', ARGV[7])
+redis.call('PUBLISH', ARGV[8], ARGV[1])
+remove_session(KEYS[1], ARGV[1])
+redis.call('DEL', KEYS[2], KEYS[3])
+redis.call('SET', KEYS[4], ARGV[3], 'EX', ARGV[6])
+redis.call('SET', KEYS[5], ARGV[4], 'EX', ARGV[6])
+redis.call('SET', KEYS[6], ARGV[5], 'EX', ARGV[6])
+redis.call('HSET', KEYS[1], KEYS[4], ARGV[2], KEYS[5], ARGV[2], KEYS[6], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return 1
+"""
+
+# KEYS[1] - sessions hash, KEYS[2] - access key, KEYS[3] - blocked key.
+# ARGV[1] - blocked expire, ARGV[2] - blocked session key prefix of the user, ARGV[3] - revocation channel.
+# Blocks the access token with its session and removes the session, returns {blocked session ids}.
+# Access tokens of sessions created before the sessions hash are deleted and {{}, refresh token} is returned,
+# the caller deletes the refresh keys, the refresh index key is a sha256 digest not available in Lua.
+REVOKE_SESSION_SCRIPT = REMOVE_SESSION_FUNCTION + """
+redis.call('SET', KEYS[3], 'True', 'EX', ARGV[1])
+local session_id = redis.call('HGET', KEYS[1], KEYS[2])
+if session_id then
+    redis.call('SET', ARGV[2] .. session_id, 'True', 'EX', ARGV[1])
+    redis.call('PUBLISH', ARGV[3], session_id)
+    remove_session(KEYS[1], session_id)
+    return {{session_id}}
+end
+local refresh_token = redis.call('GET', KEYS[2])
+redis.call('DEL', KEYS[2])
+if refresh_token then
+    return {{}, refresh_token}
+end
+return {{}}
+"""
+
+# KEYS[1] - sessions hash, KEYS[2] - blocked key.
+# ARGV[1] - blocked expire, ARGV[2] - blocked session key prefix of the user, ARGV[3] - revocation channel.
+# Blocks the access token with every session of the user and removes every key of the sessions,
+# returns the blocked session ids.
+REVOKE_ALL_SESSIONS_SCRIPT = """
+redis.call('SET', KEYS[2], 'True', 'EX', ARGV[1])
+local entries = redis.call('HGETALL', KEYS[1])
+local blocked = {}
+local session_ids = {}
+for i = 1, #entries, 2 do
+    local key, session_id = entries[i], entries[i + 1]
+    if not blocked[session_id] then
+        redis.call('SET', ARGV[2] .. session_id, 'True', 'EX', ARGV[1])
+        redis.call('PUBLISH', ARGV[3], session_id)
+        blocked[session_id] = true
+        table.insert(session_ids, session_id)
+    end
+    redis.call('DEL', key)
+end
+redis.call('DEL', KEYS[1])
+return session_ids
+"""
+
 
 class SessionRepository(BaseSessionRepository, AbstractSessionRepository):
-    async def has_refresh(self, refresh_token: str) -> bool:
+    """
+    Sessions of users, every operation is one script call. Every script touches keys of one user only,
+    with hash tags they share a slot, so the scripts run on Redis Cluster too: only the fixed keys are declared,
+    keys listed in the sessions hash and blocked session keys are built or read by the scripts themselves. The revocation channel is a classic pub/sub channel,
+    PUBLISH on any node of the cluster reaches subscribers of every node
+    """
+
+    revocation_channel = "revoked_sessions"
+
+    def __init__(self, redis_client: Redis):
+        super().__init__(redis_client)
+        self._set_session = self.redis.register_script(SET_SESSION_SCRIPT)
+        self._rotate_session = self.redis.register_script(ROTATE_SESSION_SCRIPT)
+        self._revoke_session = self.redis.register_script(REVOKE_SESSION_SCRIPT)
+        self._revoke_all_sessions = self.redis.register_script(REVOKE_ALL_SESSIONS_SCRIPT)
+
+    async def has_refresh(self, user_id: str, refresh_token: str) -> bool:
+        """
+        Check if refresh token exists, single EXISTS on the refresh index
+        Args:
+            user_id: id of the user of the refresh token
+            refresh_token: refresh_token
+
+        Returns:
+            bool
         """
-        Check if refresh token exists
+        return await self.has(self.create_refresh_index_key(user_id, refresh_token))
+
+    async def set_session(
+            self, user_id: str, access_token: str, refresh_token: str, fingerprint: str, expire: int
+    ) -> None:
+        """
+        Set token pair of a new session in one script: refresh token with its fingerprint,
+        the refresh index entry, access token bound to the refresh token and their sessions hash entries
         Args:
+            user_id: id of the user
+            access_token: access_token
             refresh_token: refresh_token
+            fingerprint: encoded fingerprint
+            expire: expire time
+        """
+        await self._set_session(
+            keys=[
+                self.create_sessions_key(user_id),
+                self.create_refresh_key(user_id, refresh_token),
+                self.create_refresh_index_key(user_id, refresh_token),
+                self.create_access_key(user_id, access_token),
+            ],
+            args=[fingerprint, user_id, refresh_token, self.token_digest(refresh_token), expire],
+        )
+
+    async def rotate_session(
+            self,
+            user_id: str,
+            old_refresh_token: str,
+            access_token: str,
+            refresh_token: str,
+            fingerprint: str,
+            expire: int,
+            blocked_expire: int,
+    ) -> bool:
+        """
+        Replace the session of the old refresh token with a new token pair in one atomic call,
+        the old session is blocked
+        Args:
+            user_id: id of the user
+            old_refresh_token: refresh_token of the replaced session
+            access_token: new access_token
+            refresh_token: new refresh_token
+            fingerprint: encoded fingerprint
+            expire: expire time
+            blocked_expire: expire time of the blocked session
+
+        Returns:
+            False if the old refresh token does not exist anymore
+        """
+        rotated = await self._rotate_session(
+            keys=[
+                self.create_sessions_key(user_id),
+                self.create_refresh_key(user_id, old_refresh_token),
+                self.create_refresh_index_key(user_id, old_refresh_token),
+                self.create_refresh_key(user_id, refresh_token),
+                self.create_refresh_index_key(user_id, refresh_token),
+                self.create_access_key(user_id, access_token),
+                self.create_blocked_session_key(user_id, self.token_digest(old_refresh_token)),
+            ],
+            args=[
+                self.token_digest(old_refresh_token),
+                self.token_digest(refresh_token),
+                fingerprint,
+                user_id,
+                refresh_token,
+                expire,
+                blocked_expire,
+                self.revocation_channel,
+            ],
+        )
+        return bool(rotated)
+
+    async def revoke_session(self, user_id: str, access_token: str, blocked_expire: int) -> List[str]:
+        """
+        Block the access token and remove all keys of its session in one atomic call,
+        refresh keys of sessions created before the sessions hash are deleted by a second call
+        Args:
+            user_id: id of the user
+            access_token: access_token of the session
+            blocked_expire: expire time of the blocked token
+
+        Returns:
+            ids of the blocked sessions
+        """
+        session_ids, *legacy_refresh_token = await self._revoke_session(
+            keys=[
+                self.create_sessions_key(user_id),
+                self.create_access_key(user_id, access_token),
+                self.create_blocked_key(user_id, access_token),
+            ],
+            args=[blocked_expire, self.create_blocked_session_key(user_id, ""), self.revocation_channel],
+        )
+        if legacy_refresh_token:
+            refresh_token = legacy_refresh_token[0].decode()
+            await self.delete(
+                self.create_refresh_key(user_id, refresh_token), self.create_refresh_index_key(user_id, refresh_token)
+            )
+        return [session_id.decode() for session_id in session_ids]
+
+    async def revoke_all_sessions(self, user_id: str, access_token: str, blocked_expire: int) -> List[str]:
+        """
+        Block the access token and remove all keys of all sessions of the user in one atomic call
+        Args:
+            user_id: id of the user
+            access_token: access_token of the current session
+            blocked_expire: expire time of the blocked token
+
+        Returns:
+            ids of the blocked sessions
+        """
+        session_ids = await self._revoke_all_sessions(
+            keys=[self.create_sessions_key(user_id), self.create_blocked_key(user_id, access_token)],
+            args=[blocked_expire, self.create_blocked_session_key(user_id, ""), self.revocation_channel],
+        )
+        return [session_id.decode() for session_id in session_ids]
+
+    async def is_session_blocked(self, user_id: str, session_id: str) -> bool:
+        """
+        Check if the session is blocked
+        Args:
+            user_id: id of the user
+            session_id: id of the session
 
         Returns:
             bool
         """
-        return await self.has(f"refresh:*:{refresh_token}")
+        return await self.has(self.create_blocked_session_key(user_id, session_id))
 
     async def set_blocked_token(self, **kwargs) -> None:
         """
@@ -21,7 +263,7 @@ class SessionRepository(BaseSessionRepository, AbstractSessionRepository):
             **kwargs:
         """
         await self.set(
-            key=f"blocked:{kwargs.get('user_id')}:{kwargs.get('access_token')}",
+            key=self.create_blocked_key(kwargs.get("user_id"), kwargs.get("access_token")),
             value=kwargs.get("value"),
             expire=kwargs.get("expire"),
         )
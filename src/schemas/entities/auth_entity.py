@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic.main import BaseModel
 
 from schemas.response.user import UserResponse
@@ -6,6 +8,8 @@ from schemas.response.user import UserResponse
 class AuthEntity(BaseModel):
     user_id: str
     is_superuser: bool = False
+    sid: Optional[str] = None
+    fph: Optional[str] = None
 
     @classmethod
     def from_userinfo(cls, user_info: UserResponse):
@@ -3,11 +3,12 @@ from datetime import datetime
 from schemas.entities.base_entity import BaseEntity
 
 
-class UserEntity(BaseEntity):
+class UserInfoEntity(BaseEntity):
+    """User without the password hash, the only form of users kept in caches"""
+
     first_name: str
     last_name: str
     email: str
-    password: str
     is_superuser: bool
     is_active: bool
     created_at: datetime
@@ -15,3 +16,10 @@ class UserEntity(BaseEntity):
 
     class Config:
         orm_mode = True
+
+
+class UserEntity(UserInfoEntity):
+    password: str
+
+    class Config:
+        orm_mode = True
@@ -2,12 +2,13 @@ from abc import ABC, abstractmethod
 
 from schemas.entities.auth_entity import AuthEntity, RefreshEntity
 from schemas.response.token import TokensResponse
+from services.auth.token_codec import TokenClaims
 
 
 class AbstractAuthService(ABC):
-    @staticmethod
+    @classmethod
     @abstractmethod
-    def encode_fingerprint(fingerprint: dict) -> str:
+    def encode_fingerprint(cls, fingerprint: dict) -> str:
         ...
 
     @abstractmethod
@@ -18,12 +19,16 @@ class AbstractAuthService(ABC):
     async def get_fingerprint_by_refresh_token(self, user_id: str, access_token: str) -> dict:
         ...
 
+    @abstractmethod
+    async def check_session(self, auth_data: TokenClaims, access_token: str, fingerprint: dict) -> None:
+        ...
+
     @abstractmethod
     async def create_token_pair(self, user_payload: AuthEntity, fingerprint: str) -> TokensResponse:
         ...
 
     @abstractmethod
-    async def get_auth_data(self, token: str) -> AuthEntity:
+    async def get_auth_data(self, token: str) -> TokenClaims:
         ...
 
     @abstractmethod
@@ -41,3 +46,7 @@ class AbstractAuthService(ABC):
     @abstractmethod
     async def revoke_refresh_token(self, user_id: str, access_token: str) -> None:
         ...
+
+    @abstractmethod
+    async def revoke_all_tokens(self, user_id: str, access_token: str) -> None:
+        ...
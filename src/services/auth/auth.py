@@ -1,19 +1,23 @@
-import base64
-import json
-from datetime import datetime, timedelta
+import time
+import uuid
+from functools import lru_cache
+from typing import Optional, Union
 
 import jwt
 from loguru import logger
-from pydantic import ValidationError
 
 import common.exceptions.auth as auth_exceptions
 from common.constants import EXPIRE_ACCESS_TOKEN, EXPIRE_REFRESH_TOKEN
+from common.metrics import timed
+from common.ttl_cache import TTLCache
 from core.config import settings
 from repository.interfaces.entity.abc_user_repository import AbstractUserRepository
 from repository.interfaces.kv.abc_session_repository import AbstractSessionRepository
 from schemas.entities.auth_entity import AuthEntity, RefreshEntity
 from schemas.response.token import TokensResponse
 from services.auth.base_auth import BaseAuthService
+from services.auth.revocation import SessionRevocationFilter
+from services.auth.token_codec import TokenClaims, TokenCodec, VerifiedTokenCache, create_token_codec
 
 
 class AuthService(BaseAuthService):
@@ -24,10 +28,25 @@ class AuthService(BaseAuthService):
             cache_client: AbstractSessionRepository,
             jwt_secret_key: str,
             user_repository: AbstractUserRepository,
+            stateless_access: bool = False,
+            revocation_cache: Optional[TTLCache] = None,
+            revocation_filter: Optional[SessionRevocationFilter] = None,
+            token_codec: Optional[TokenCodec] = None,
+            verified_token_cache: Optional[VerifiedTokenCache] = None,
     ) -> None:
+        """
+        Args:
+            token_codec: signs and verifies tokens, by default with jwt_secret_key and encode_algorithm
+            verified_token_cache: claims of verified tokens, tokens are verified on every call without it
+        """
         self.jwt_secret_key = jwt_secret_key
+        self.token_codec = token_codec or create_token_codec(jwt_secret_key, self.encode_algorithm)
         self.cache_client = cache_client
         self.user_repository = user_repository
+        self.stateless_access = stateless_access
+        self.revocation_cache = revocation_cache
+        self.revocation_filter = revocation_filter
+        self.verified_token_cache = verified_token_cache
 
     async def get_fingerprint_by_access_token(self, user_id: str, access_token: str) -> dict:
         """
@@ -55,13 +74,71 @@ class AuthService(BaseAuthService):
         Returns:
             dict
         """
-        fingerprint_base64 = await self.cache_client.get(self.cache_client.create_refresh_key(user_id, refresh_token))
-        if not fingerprint_base64:
+        fingerprint = await self.cache_client.get(self.cache_client.create_refresh_key(user_id, refresh_token))
+        if not fingerprint:
             logger.error(f"Can't get fingerprint from cache! {refresh_token}")
             raise auth_exceptions.TokenException("Bad device token error!")
-        fingerprint = json.loads(base64.b64decode(fingerprint_base64).decode())
-        return fingerprint
+        return self.decode_fingerprint(fingerprint)
+
+    @timed("auth", "check_session")
+    async def check_session(self, auth_data: TokenClaims, access_token: str, fingerprint: dict) -> None:
+        """
+        Check that the session of the access token is alive.
+        In stateless mode tokens carrying a session id are checked by their claims and the blocked sessions,
+        otherwise the access token and its refresh token are looked up in the cache
+        Args:
+            auth_data: claims of the access token
+            access_token: access token
+            fingerprint: user agent and ip of the request
+        """
+        if not (self.stateless_access and auth_data.sid):
+            await self.get_fingerprint_by_access_token(auth_data.user_id, access_token)
+            return
+        if not auth_data.fph or not self.fingerprint_matches(auth_data.fph, fingerprint):
+            logger.error(f"Fingerprint of the token does not match! user_id - {auth_data.user_id}")
+            raise auth_exceptions.TokenException("Bad device token error!")
+        if await self.is_session_blocked(auth_data.user_id, auth_data.sid):
+            logger.error(f"Session is blocked! user_id - {auth_data.user_id}")
+            raise auth_exceptions.TokenException("Bad device token error!")
+
+    async def is_session_blocked(self, user_id: str, session_id: str) -> bool:
+        """
+        Check if the session is blocked.
+        While the revocation filter is synced only its hits are confirmed in redis,
+        otherwise results are kept in the in-process revocation cache
+        Args:
+            user_id: user_id
+            session_id: id of the session
 
+        Returns:
+            bool
+        """
+        if self.revocation_filter is not None and self.revocation_filter.synced:
+            if not self.revocation_filter.might_be_blocked(session_id):
+                return False
+            return await self.cache_client.is_session_blocked(user_id, session_id)
+        if self.revocation_cache is None:
+            return await self.cache_client.is_session_blocked(user_id, session_id)
+        blocked = self.revocation_cache.get(session_id)
+        if blocked is None:
+            blocked = await self.cache_client.is_session_blocked(user_id, session_id)
+            self.revocation_cache.set(session_id, blocked)
+        return blocked
+
+    def mark_sessions_blocked(self, *session_ids: str) -> None:
+        """
+        Remember sessions blocked by this process before the revocation channel delivers them,
+        so cached "not blocked" results don't let their tokens through
+        Args:
+            *session_ids: ids of the blocked sessions
+        """
+        for session_id in session_ids:
+            if self.revocation_cache is not None:
+                self.revocation_cache.set(session_id, True)
+            if self.revocation_filter is not None:
+                self.revocation_filter.add(session_id)
+
+    @timed("auth", "create_token_pair")
     async def create_token_pair(self, user_payload: AuthEntity, fingerprint: str) -> TokensResponse:
         """
         Create token pair
@@ -72,30 +149,48 @@ class AuthService(BaseAuthService):
         Returns:
             TokensResponse
         """
-        refresh_token = await self.create_refresh_token(user_payload, fingerprint)
-        access_token = await self.create_access_token(user_payload, refresh_token)
+        with timed("auth", "jwt_encode"):
+            refresh_token = self.create_refresh_token(user_payload)
+            access_token = self.create_access_token(user_payload, refresh_token, fingerprint)
+        with timed("auth", "redis_set_session"):
+            await self.cache_client.set_session(
+                user_id=user_payload.user_id,
+                access_token=access_token,
+                refresh_token=refresh_token,
+                fingerprint=fingerprint,
+                expire=EXPIRE_REFRESH_TOKEN,
+            )
         return TokensResponse(access_token=access_token, refresh_token=refresh_token)
 
-    def _create_token(self, expire_timestamp: int, user_payload: AuthEntity) -> str:
+    def _create_token(self, expire_timestamp: int, user_payload: Union[AuthEntity, TokenClaims], **claims) -> str:
         payload = {
             "sub": "authentication",
             "exp": expire_timestamp,
-            "iat": int(datetime.utcnow().timestamp()),
-            **user_payload.dict(),
+            "iat": int(time.time()),
+            "user_id": user_payload.user_id,
+            "is_superuser": user_payload.is_superuser,
         }
+        if user_payload.sid is not None:
+            payload["sid"] = user_payload.sid
+        if user_payload.fph is not None:
+            payload["fph"] = user_payload.fph
+        payload.update(claims)
         try:
-            token = jwt.encode(payload, self.jwt_secret_key, algorithm=self.encode_algorithm)
+            token = self.token_codec.encode(payload)
         except (ValueError, TypeError):
             logger.error("Can't create jwt token! See JWT_SECRET_KEY env, or something else...", exc_info=True)
             raise auth_exceptions.TokenEncodeException("Can't create jwt token", name=user_payload.user_id)
         return token
 
+    @timed("auth", "jwt_decode")
     def _validate_token(self, token: str) -> dict:
         try:
-            payload: dict = jwt.decode(token, self.jwt_secret_key, algorithms=[self.encode_algorithm])
+            payload: dict = self.token_codec.decode(token)
         except (
                 jwt.DecodeError,
                 jwt.InvalidKeyError,
+                jwt.InvalidAlgorithmError,
+                jwt.ImmatureSignatureError,
                 jwt.InvalidIssuerError,
                 jwt.InvalidSignatureError,
         ):
@@ -106,63 +201,99 @@ class AuthService(BaseAuthService):
             raise auth_exceptions.TokenExpiredException("Token is invalid or expired")
         return payload
 
-    async def create_refresh_token(self, user_payload: AuthEntity, fingerprint: str) -> str:
-        """Генерация refresh токена и запись в кеш."""
+    def create_refresh_token(self, user_payload: AuthEntity) -> str:
+        """Генерация refresh токена, jti делает id сессии уникальным."""
 
-        refresh_expire = (datetime.now() + timedelta(seconds=EXPIRE_REFRESH_TOKEN)).timestamp()
-        refresh_token = self._create_token(expire_timestamp=int(refresh_expire), user_payload=user_payload)
-        await self.cache_client.set(
-            key=self.cache_client.create_refresh_key(user_payload.user_id, refresh_token),
-            value=fingerprint,
-            expire=EXPIRE_REFRESH_TOKEN,
+        return self._create_token(
+            expire_timestamp=int(time.time()) + EXPIRE_REFRESH_TOKEN, user_payload=user_payload, jti=uuid.uuid4().hex
         )
-        return refresh_token
 
-    async def create_access_token(self, user_payload: AuthEntity, refresh_token: str) -> str:
-        """Генерация access токена."""
+    def create_access_token(self, user_payload: AuthEntity, refresh_token: str, fingerprint: str) -> str:
+        """Генерация access токена с id сессии и хешем fingerprint."""
 
-        access_expire = (datetime.now() + timedelta(seconds=EXPIRE_ACCESS_TOKEN)).timestamp()
-        access_token = self._create_token(expire_timestamp=int(access_expire), user_payload=user_payload)
-        await self.cache_client.set(
-            key=self.cache_client.create_access_key(user_payload.user_id, access_token),
-            value=refresh_token,
-            expire=EXPIRE_REFRESH_TOKEN,
+        return self._create_token(
+            expire_timestamp=int(time.time()) + EXPIRE_ACCESS_TOKEN,
+            user_payload=user_payload,
+            sid=self.cache_client.token_digest(refresh_token),
+            fph=self.hash_fingerprint(fingerprint),
         )
-        return access_token
 
-    async def get_auth_data(self, token: str) -> AuthEntity:
+    async def get_auth_data(self, token: str) -> TokenClaims:
         """Валидация access токена."""
+        if self.verified_token_cache is not None and (claims := self.verified_token_cache.get(token)) is not None:
+            return claims
         payload = self._validate_token(token)
         try:
-            return AuthEntity(**payload)
-        except ValidationError:
+            claims = TokenClaims.from_payload(payload)
+        except ValueError:
             logger.error(f"Can't get user_id from token {token}! Payload {payload}")
             raise auth_exceptions.TokenException("Token is invalid or expired")
+        if self.verified_token_cache is not None:
+            self.verified_token_cache.set(token, claims, payload.get("exp"))
+        return claims
 
+    def forget_verified_tokens(self, *tokens: str) -> None:
+        """Drop revoked tokens from the cache of verified tokens"""
+        if self.verified_token_cache is not None:
+            for token in tokens:
+                self.verified_token_cache.discard(token)
+
+    @timed("auth", "validate_refresh_token")
     async def validate_refresh_token(self, refresh_token: str) -> RefreshEntity:
         """Валидация refresh токена."""
-        if not await self.cache_client.has_refresh(refresh_token):
+        auth_data: TokenClaims = await self.get_auth_data(refresh_token)
+        with timed("auth", "redis_has_refresh"):
+            has_refresh = await self.cache_client.has_refresh(auth_data.user_id, refresh_token)
+        if not has_refresh:
             logger.error(f"Can't get token from cache! {refresh_token}")
             raise auth_exceptions.TokenException("Bad token error!")
-        auth_data: AuthEntity = await self.get_auth_data(refresh_token)
         return RefreshEntity(**auth_data.dict(), refresh_token=refresh_token)
 
+    @timed("auth", "refresh_tokens")
     async def refresh_tokens(self, refresh_token: str, user_payload: AuthEntity, fingerprint: str) -> TokensResponse:
         """Обновление токенов"""
-        refresh_key = self.cache_client.create_refresh_key(user_payload.user_id, refresh_token)
-        await self.remove_tokens_from_cache(f"access:{user_payload.user_id}:*", refresh_key)
-        return await self.create_token_pair(user_payload, fingerprint)
+        with timed("auth", "jwt_encode"):
+            new_refresh_token = self.create_refresh_token(user_payload)
+            access_token = self.create_access_token(user_payload, new_refresh_token, fingerprint)
+        with timed("auth", "redis_rotate_session"):
+            rotated = await self.cache_client.rotate_session(
+                user_id=user_payload.user_id,
+                old_refresh_token=refresh_token,
+                access_token=access_token,
+                refresh_token=new_refresh_token,
+                fingerprint=fingerprint,
+                expire=EXPIRE_REFRESH_TOKEN,
+                blocked_expire=EXPIRE_ACCESS_TOKEN,
+            )
+        if not rotated:
+            logger.error(f"Can't get token from cache! {refresh_token}")
+            raise auth_exceptions.TokenException("Bad token error!")
+        self.mark_sessions_blocked(self.cache_client.token_digest(refresh_token))
+        self.forget_verified_tokens(refresh_token)
+        return TokensResponse(access_token=access_token, refresh_token=new_refresh_token)
 
     async def remove_tokens_from_cache(self, *tokens) -> None:
         """Удаление токенов из БД."""
         await self.cache_client.delete(*tokens)
 
     async def revoke_refresh_token(self, user_id: str, access_token: str) -> None:
-        """Помещение access токена в key и удаление refresh токена"""
-        access_key = self.cache_client.create_access_key(user_id, access_token)
-        refresh_token = await self.cache_client.get(access_key)
-        refresh_key = self.cache_client.create_refresh_key(user_id, refresh_token)
-        await self.cache_client.set_blocked_token(
-            user_id=user_id, access_token=access_token, value="True", expire=EXPIRE_ACCESS_TOKEN
+        """Помещение access токена в blocked и удаление его сессии"""
+        session_ids = await self.cache_client.revoke_session(user_id, access_token, blocked_expire=EXPIRE_ACCESS_TOKEN)
+        self.mark_sessions_blocked(*session_ids)
+        self.forget_verified_tokens(access_token)
+
+    async def revoke_all_tokens(self, user_id: str, access_token: str) -> None:
+        """Помещение access токена в blocked и удаление всех сессий пользователя"""
+        session_ids = await self.cache_client.revoke_all_sessions(
+            user_id, access_token, blocked_expire=EXPIRE_ACCESS_TOKEN
         )
-        await self.remove_tokens_from_cache(access_key, refresh_key)
+        self.mark_sessions_blocked(*session_ids)
+        self.forget_verified_tokens(access_token)
+
+
+@lru_cache()
+def get_revocation_cache() -> TTLCache:
+    return TTLCache(
+        max_size=settings.jwt_config.revocation_cache_size,
+        ttl=settings.jwt_config.revocation_cache_ttl,
+    )
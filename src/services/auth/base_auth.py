@@ -1,13 +1,97 @@
 import base64
+import hashlib
+import hmac
 import json
 from abc import ABC
 
+import orjson
+
+from core.config import settings
 from services.auth.abc_auth import AbstractAuthService
 
+FINGERPRINT_VERSION = "v2"
+
+
+def _fingerprint_key() -> bytes:
+    """Key of fingerprint hashes, derived from the JWT secret unless JWT_FINGERPRINT_KEY is set"""
+    secret = settings.jwt_config.fingerprint_key or settings.jwt_config.jwt_secret_key
+    return hashlib.sha256(b"fingerprint:" + secret.encode()).digest()
+
 
 class BaseAuthService(AbstractAuthService, ABC):
+    """
+    Fingerprints are stored and put into tokens in a versioned format:
+    v1 - base64 of the fingerprint JSON, hashed by sha256 into the fph claim, still read for sessions created before v2;
+    v2 - "v2:<keyed hash>", 128 bit blake2b of the fingerprint, with ":<base64 of the JSON>" if raw data is kept
+    """
+
+    fingerprint_key: bytes = _fingerprint_key()
+    fingerprint_keep_raw: bool = settings.jwt_config.fingerprint_keep_raw
+
+    @classmethod
+    def _fingerprint_digest(cls, fingerprint: dict) -> str:
+        data = orjson.dumps(fingerprint, option=orjson.OPT_SORT_KEYS)
+        digest = hashlib.blake2b(data, key=cls.fingerprint_key, digest_size=16).digest()
+        return f"{FINGERPRINT_VERSION}:{base64.urlsafe_b64encode(digest).rstrip(b'=').decode()}"
+
+    @classmethod
+    def encode_fingerprint(cls, fingerprint: dict) -> str:
+        """
+        Encode the fingerprint of the request to store it with the session
+        Args:
+            fingerprint: user agent and ip of the request
+        Returns:
+            v2 fingerprint
+        """
+        encoded = cls._fingerprint_digest(fingerprint)
+        if cls.fingerprint_keep_raw:
+            encoded += ":" + base64.urlsafe_b64encode(orjson.dumps(fingerprint)).decode()
+        return encoded
+
     @staticmethod
-    def encode_fingerprint(fingerprint: dict) -> str:
+    def encode_fingerprint_v1(fingerprint: dict) -> str:
         fingerprint_json = json.dumps(fingerprint)
         fingerprint_base64 = base64.b64encode(fingerprint_json.encode()).decode()
         return fingerprint_base64
+
+    @staticmethod
+    def decode_fingerprint(encoded: str) -> dict:
+        """
+        Decode the stored fingerprint of any version
+        Args:
+            encoded: stored fingerprint
+        Returns:
+            data of v1 and raw v2 fingerprints, the version and the hash of v2 ones
+        """
+        if not encoded.startswith(f"{FINGERPRINT_VERSION}:"):
+            return json.loads(base64.b64decode(encoded).decode())
+        version, digest, *raw = encoded.split(":", 2)
+        data = orjson.loads(base64.urlsafe_b64decode(raw[0])) if raw else {}
+        return {**data, "version": version, "hash": digest}
+
+    @staticmethod
+    def hash_fingerprint(fingerprint: str) -> str:
+        """
+        Hash of the encoded fingerprint for the fph claim, v2 fingerprints are hashes already
+        Args:
+            fingerprint: encoded fingerprint
+        Returns:
+            "v2:<hash>" or sha256 hex digest of v1 fingerprints
+        """
+        if fingerprint.startswith(f"{FINGERPRINT_VERSION}:"):
+            return ":".join(fingerprint.split(":", 2)[:2])
+        return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+    @classmethod
+    def fingerprint_matches(cls, fph: str, fingerprint: dict) -> bool:
+        """
+        Compare the fph claim with the fingerprint of the request in the version of the claim
+        Args:
+            fph: fph claim of the token
+            fingerprint: user agent and ip of the request
+        Returns:
+            bool
+        """
+        if fph.startswith(f"{FINGERPRINT_VERSION}:"):
+            return hmac.compare_digest(fph, cls._fingerprint_digest(fingerprint))
+        return hmac.compare_digest(fph, hashlib.sha256(cls.encode_fingerprint_v1(fingerprint).encode()).hexdigest())
@@ -0,0 +1,83 @@
+import glob
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from jwt.algorithms import get_default_algorithms
+
+from core.config import settings
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "EdDSA")
+
+
+class SigningKey:
+    """Parsed key of the key ring, keys without the private part only verify tokens signed before rotation"""
+
+    __slots__ = ("kid", "private_key", "public_key")
+
+    def __init__(self, kid: str, private_key: Any, public_key: Any) -> None:
+        self.kid = kid
+        self.private_key = private_key
+        self.public_key = public_key
+
+
+class KeyRing:
+    """
+    Asymmetric keys of tokens by kid. TokenCodec signs tokens with the active key and puts its kid in the header,
+    so consumers verify them locally with the public keys published in JWKS.
+    Rotation: add the new key and publish it, switch the active kid, remove the old key after tokens expire
+    """
+
+    def __init__(self, algorithm: str, keys: Dict[str, SigningKey], active_kid: str) -> None:
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Key ring supports {', '.join(ASYMMETRIC_ALGORITHMS)}, not {algorithm}")
+        if active_kid not in keys or keys[active_kid].private_key is None:
+            raise ValueError(f"Private key of the active kid {active_kid} is not loaded")
+        self.algorithm = algorithm
+        self.keys = keys
+        self.active = keys[active_kid]
+        jwks = {"keys": [self._to_jwk(key) for key in keys.values()]}
+        self.jwks_json = json.dumps(jwks, sort_keys=True).encode()
+        self.jwks_etag = f'"{hashlib.sha256(self.jwks_json).hexdigest()[:32]}"'
+
+    @classmethod
+    def from_directory(cls, path: str, algorithm: str, active_kid: str) -> "KeyRing":
+        """
+        Load PEM keys of the directory once, the kid of a key is its file name without .pem
+        Args:
+            path: directory with private keys and public keys of retired private keys
+            algorithm: RS256, RS384, RS512 or EdDSA
+            active_kid: kid of the key signing new tokens
+        Returns:
+            key ring
+        """
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+        keys = {}
+        for file_path in sorted(glob.glob(os.path.join(path, "*.pem"))):
+            kid = os.path.basename(file_path)[: -len(".pem")]
+            with open(file_path, "rb") as file:
+                data = file.read()
+            if b"PRIVATE KEY" in data:
+                private_key = load_pem_private_key(data, password=None)
+                keys[kid] = SigningKey(kid, private_key, private_key.public_key())
+            else:
+                keys[kid] = SigningKey(kid, None, load_pem_public_key(data))
+        return cls(algorithm, keys, active_kid)
+
+    def _to_jwk(self, key: SigningKey) -> dict:
+        jwk = get_default_algorithms()[self.algorithm].to_jwk(key.public_key, as_dict=True)
+        return {**jwk, "kid": key.kid, "alg": self.algorithm, "use": "sig"}
+
+
+@lru_cache()
+def get_key_ring() -> Optional[KeyRing]:
+    """
+    Key ring of ENCODE_ALGORITHM loaded from JWT_SIGNING_KEYS_DIR, None for HS algorithms signed with JWT_SECRET_KEY
+    """
+    config = settings.jwt_config
+    if config.encode_algorithm not in ASYMMETRIC_ALGORITHMS:
+        return None
+    return KeyRing.from_directory(config.signing_keys_dir, config.encode_algorithm, config.active_kid)
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from functools import lru_cache
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from common.bloom_filter import BloomFilter
+from common.constants import EXPIRE_ACCESS_TOKEN
+from core.config import settings
+from repository.redis_implementation.session_repository import SessionRepository
+
+
+class SessionRevocationFilter:
+    """
+    In-process filter of blocked session ids.
+    Filled from the blocked sessions on start and then from the revocation channel,
+    a miss means that the session is not blocked, a hit has to be confirmed in redis.
+    Blocked sessions expire with access tokens, so the filter keeps two generations
+    and drops the older one every EXPIRE_ACCESS_TOKEN seconds.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, generation_ttl: int = EXPIRE_ACCESS_TOKEN) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.generation_ttl = generation_ttl
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._rotated_at = time.monotonic()
+        self.synced = False
+        self.hits = 0
+        self.misses = 0
+
+    def _rotate(self) -> None:
+        if time.monotonic() - self._rotated_at < self.generation_ttl:
+            return
+        self._previous = self._current
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._rotated_at = time.monotonic()
+
+    def add(self, session_id: str) -> None:
+        self._rotate()
+        self._current.add(session_id)
+
+    def might_be_blocked(self, session_id: str) -> bool:
+        self._rotate()
+        if session_id in self._current or session_id in self._previous:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    async def _seed(self, redis: Redis) -> None:
+        pattern = SessionRepository.create_blocked_session_key("*", "*")
+        async for key in redis.scan_iter(match=pattern, count=1000):
+            self.add(key.decode().rsplit(":", 1)[1])
+
+    async def run(self, redis: Redis, retry_interval: float = 1.0) -> None:
+        """
+        Keep the filter in sync with redis: subscribe to the revocation channel,
+        then load already blocked sessions, so nothing is missed between both.
+        The filter is not used while the subscription is down and is reloaded on reconnect
+        Args:
+            redis: redis client
+            retry_interval: pause before reconnect
+        """
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(SessionRepository.revocation_channel)
+                await self._seed(redis)
+                self.synced = True
+                logger.info("Session revocation filter is synced")
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self.add(message["data"].decode())
+            except RedisError as e:
+                self.synced = False
+                logger.warning(f"Session revocation filter lost redis connection: {e}")
+                await asyncio.sleep(retry_interval)
+            finally:
+                self.synced = False
+                await pubsub.reset()
+
+    def stats(self) -> dict:
+        return {
+            "synced": self.synced,
+            "hits": self.hits,
+            "misses": self.misses,
+            "items": self._current.count + self._previous.count,
+            "memory_bytes": self._current.memory_bytes + self._previous.memory_bytes,
+        }
+
+
+@lru_cache()
+def get_revocation_filter() -> SessionRevocationFilter:
+    return SessionRevocationFilter(
+        capacity=settings.jwt_config.revocation_filter_capacity,
+        error_rate=settings.jwt_config.revocation_filter_error_rate,
+    )
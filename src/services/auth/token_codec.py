@@ -0,0 +1,242 @@
+import base64
+import binascii
+import hashlib
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import jwt
+import orjson
+from jwt.algorithms import get_default_algorithms
+
+from common.constants import EXPIRE_ACCESS_TOKEN, SECRET_SIGNED_ALGORITHM
+from common.ttl_cache import TTLCache
+from core.config import settings
+from services.auth.key_ring import KeyRing, get_key_ring
+
+
+def b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+class TokenClaims:
+    """Claims of a verified token identifying the user, a light replacement of AuthEntity on the hot path"""
+
+    __slots__ = ("user_id", "is_superuser", "sid", "fph")
+
+    def __init__(self, user_id: str, is_superuser: bool = False, sid: Optional[str] = None, fph: Optional[str] = None):
+        self.user_id = user_id
+        self.is_superuser = is_superuser
+        self.sid = sid
+        self.fph = fph
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "TokenClaims":
+        """
+        Take the claims from the verified payload
+        Args:
+            payload: payload of the token
+        Returns:
+            claims
+        Raises:
+            ValueError: the claims are missing or have wrong types
+        """
+        user_id = payload.get("user_id")
+        is_superuser = payload.get("is_superuser", False)
+        sid = payload.get("sid")
+        fph = payload.get("fph")
+        if (
+                not isinstance(user_id, str)
+                or not isinstance(is_superuser, bool)
+                or not isinstance(sid, (str, type(None)))
+                or not isinstance(fph, (str, type(None)))
+        ):
+            raise ValueError("Invalid claims of the token")
+        return cls(user_id, is_superuser, sid, fph)
+
+    def dict(self, exclude_none: bool = False) -> dict:
+        fields = {"user_id": self.user_id, "is_superuser": self.is_superuser, "sid": self.sid, "fph": self.fph}
+        return {key: value for key, value in fields.items() if value is not None} if exclude_none else fields
+
+
+class TokenKey:
+    """Parsed key of one algorithm and kid with its header segment serialized once"""
+
+    __slots__ = ("algorithm", "kid", "header_segment", "_algorithm", "_signing_key", "_verifying_key")
+
+    def __init__(self, algorithm: str, signing_key: Any, verifying_key: Any, kid: Optional[str] = None) -> None:
+        self.algorithm = algorithm
+        self.kid = kid
+        self._algorithm = get_default_algorithms()[algorithm]
+        self._signing_key = self._algorithm.prepare_key(signing_key) if signing_key is not None else None
+        self._verifying_key = self._algorithm.prepare_key(verifying_key)
+        header = {"alg": algorithm, "typ": "JWT"} if kid is None else {"alg": algorithm, "kid": kid, "typ": "JWT"}
+        self.header_segment = b64url_encode(orjson.dumps(header, option=orjson.OPT_SORT_KEYS))
+
+    def sign(self, signing_input: bytes) -> bytes:
+        return self._algorithm.sign(signing_input, self._signing_key)
+
+    def verify(self, signing_input: bytes, signature: bytes) -> bool:
+        return self._algorithm.verify(signing_input, self._verifying_key, signature)
+
+
+class TokenCodec:
+    """
+    Encodes and verifies JWT with keys parsed once. Headers of the known keys are compared as raw segments,
+    so only tokens with an unknown header have it parsed. Errors are the ones of PyJWT
+    """
+
+    def __init__(self, signing_key: TokenKey, verifying_keys: Dict[Optional[str], TokenKey]) -> None:
+        """
+        Args:
+            signing_key: key signing new tokens
+            verifying_keys: keys by kid, the key of None verifies tokens without kid
+        """
+        self.signing_key = signing_key
+        self.verifying_keys = verifying_keys
+        self._keys_by_header = {key.header_segment: key for key in verifying_keys.values()}
+
+    def encode(self, payload: dict) -> str:
+        signing_input = self.signing_key.header_segment + b"." + b64url_encode(orjson.dumps(payload))
+        return (signing_input + b"." + b64url_encode(self.signing_key.sign(signing_input))).decode()
+
+    def _key_of_header(self, header_segment: bytes) -> TokenKey:
+        if (key := self._keys_by_header.get(header_segment)) is not None:
+            return key
+        try:
+            header = orjson.loads(b64url_decode(header_segment))
+        except (binascii.Error, orjson.JSONDecodeError, ValueError):
+            raise jwt.DecodeError("Invalid header padding")
+        if not isinstance(header, dict):
+            raise jwt.DecodeError("Invalid header string: must be a json object")
+        if (key := self.verifying_keys.get(header.get("kid"))) is None:
+            raise jwt.InvalidKeyError("Unknown kid of the token")
+        if header.get("alg") != key.algorithm:
+            raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+        return key
+
+    def decode(self, token: str) -> dict:
+        """
+        Verify the signature, exp, nbf and iat of the token
+        Args:
+            token: encoded token
+        Returns:
+            payload
+        """
+        try:
+            signing_input, signature_segment = token.encode().rsplit(b".", 1)
+            header_segment, payload_segment = signing_input.split(b".", 1)
+            signature = b64url_decode(signature_segment)
+        except (ValueError, binascii.Error):
+            raise jwt.DecodeError("Not enough segments")
+        key = self._key_of_header(header_segment)
+        if not key.verify(signing_input, signature):
+            raise jwt.InvalidSignatureError("Signature verification failed")
+        try:
+            payload = orjson.loads(b64url_decode(payload_segment))
+        except (binascii.Error, orjson.JSONDecodeError, ValueError):
+            raise jwt.DecodeError("Invalid payload padding")
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload string: must be a json object")
+        now = time.time()
+        try:
+            if "exp" in payload and int(payload["exp"]) <= now:
+                raise jwt.ExpiredSignatureError("Signature has expired")
+            if "nbf" in payload and int(payload["nbf"]) > now:
+                raise jwt.ImmatureSignatureError("The token is not yet valid (nbf)")
+            if "iat" in payload and int(payload["iat"]) > now:
+                raise jwt.ImmatureSignatureError("The token is not yet valid (iat)")
+        except (TypeError, ValueError):
+            raise jwt.DecodeError("Time claims must be integers")
+        return payload
+
+
+class VerifiedTokenCache:
+    """
+    Claims of verified tokens by digest of the token until its exp, a token presented again skips the signature
+    verification and decoding. Only the verification is cached: sessions of the claims are still checked
+    on every request, so revoked sessions are rejected while their tokens are cached
+    """
+
+    def __init__(self, max_size: int, max_ttl: float) -> None:
+        """
+        Args:
+            max_size: max count of tokens, least recently used ones are evicted
+            max_ttl: max lifetime of an entry, bounds long-lived refresh tokens
+        """
+        self.max_ttl = max_ttl
+        self._cache = TTLCache(max_size=max_size, ttl=max_ttl)
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[TokenClaims]:
+        return self._cache.get(self.digest(token))
+
+    def set(self, token: str, claims: TokenClaims, expire_timestamp: Any) -> None:
+        """
+        Cache the claims of the verified token until its exp, tokens without exp are not cached
+        Args:
+            token: verified token
+            claims: claims of the token
+            expire_timestamp: exp of the token
+        """
+        if not isinstance(expire_timestamp, (int, float)):
+            return
+        ttl = min(expire_timestamp - time.time(), self.max_ttl)
+        if ttl > 0:
+            self._cache.set(self.digest(token), claims, ttl)
+
+    def discard(self, token: str) -> None:
+        self._cache.delete(self.digest(token))
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+def create_token_codec(
+        jwt_secret_key: str,
+        encode_algorithm: str,
+        key_ring: Optional[KeyRing] = None,
+        accept_secret_signed: bool = True,
+) -> TokenCodec:
+    """
+    Codec signing with the active key of the key ring or with the shared secret without it
+    Args:
+        jwt_secret_key: shared secret
+        encode_algorithm: algorithm of the shared secret when there is no key ring
+        key_ring: asymmetric keys
+        accept_secret_signed: with the key ring tokens without kid are still verified with the shared secret
+    Returns:
+        codec
+    """
+    if key_ring is None:
+        key = TokenKey(encode_algorithm, jwt_secret_key, jwt_secret_key)
+        return TokenCodec(key, {None: key})
+    keys: Dict[Optional[str], TokenKey] = {
+        kid: TokenKey(key_ring.algorithm, key.private_key, key.public_key, kid) for kid, key in key_ring.keys.items()
+    }
+    if accept_secret_signed:
+        keys[None] = TokenKey(SECRET_SIGNED_ALGORITHM, jwt_secret_key, jwt_secret_key)
+    return TokenCodec(keys[key_ring.active.kid], keys)
+
+
+@lru_cache()
+def get_token_codec() -> TokenCodec:
+    config = settings.jwt_config
+    return create_token_codec(
+        config.jwt_secret_key, config.encode_algorithm, get_key_ring(), config.accept_secret_signed
+    )
+
+
+@lru_cache()
+def get_verified_token_cache() -> Optional[VerifiedTokenCache]:
+    """Cache of verified tokens, None if JWT_VERIFIED_TOKEN_CACHE_SIZE is 0"""
+    if settings.jwt_config.verified_token_cache_size <= 0:
+        return None
+    return VerifiedTokenCache(settings.jwt_config.verified_token_cache_size, EXPIRE_ACCESS_TOKEN)
@@ -0,0 +1,163 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import AsyncContextManager, Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.constants import OUTBOX_CREATE_USER_BALANCE
+from common.tracing import KIND_CONSUMER, get_tracer, parse_traceparent
+from core.config import settings
+from db.postgres.models.outbox import OutboxEvent
+from db.postgres.session_manager import db_manager
+from repository.grpc_implementation.transaction_repository import get_grpc_transaction_repository
+from repository.interfaces.grpc.abc_transaction_repository import AbstractTransactionRepository
+from repository.postgres_implementation.outbox_repository import SQLOutboxRepository
+
+
+class OutboxDispatcher:
+    """
+    Delivers outbox events written together with the changes that caused them.
+    Events are leased by batches in a short transaction with FOR UPDATE SKIP LOCKED, so several dispatchers
+    can run at once, and delivered outside of it, so no rows stay locked while the calls are in flight.
+    Failed events are retried with exponential backoff until max_attempts
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], AsyncContextManager[AsyncSession]],
+            transaction_repository: AbstractTransactionRepository,
+            batch_size: int,
+            concurrency: int,
+            poll_interval: float,
+            max_attempts: int,
+            backoff_base: float,
+            backoff_max: float,
+            lease: float,
+    ) -> None:
+        self.session_factory = session_factory
+        self.transaction_repository = transaction_repository
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.handlers: Dict[str, Callable[[OutboxEvent], Awaitable]] = {
+            OUTBOX_CREATE_USER_BALANCE: self.create_user_balance,
+        }
+        self.dispatched = 0
+        self.failed = 0
+        self.lag_seconds_last = 0.0
+        self.lag_seconds_max = 0.0
+        self.pending = 0
+        self.dead = 0
+        self.oldest_pending_age_seconds = 0.0
+
+    async def create_user_balance(self, event: OutboxEvent) -> None:
+        await self.transaction_repository.create_user_balance(
+            user_id=event.payload["user_id"], idempotency_key=event.idempotency_key
+        )
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+
+    async def _handle(self, event: OutboxEvent, semaphore: asyncio.Semaphore) -> Optional[str]:
+        async with semaphore:
+            try:
+                with get_tracer().span(
+                        f"outbox {event.event_type}",
+                        KIND_CONSUMER,
+                        parent=parse_traceparent(event.payload.get("traceparent")),
+                        attributes={"outbox.event_id": str(event.id), "outbox.attempts": event.attempts},
+                ):
+                    await self.handlers[event.event_type](event)
+            except Exception as e:
+                return f"{type(e).__name__}: {e}"
+
+    async def dispatch_batch(self) -> int:
+        """
+        Lease ready events, deliver them concurrently without a transaction and save the results in a new one
+        Returns:
+            count of claimed events
+        """
+        async with self.session_factory() as session:
+            repository = SQLOutboxRepository(session)
+            events = await repository.claim_events(self.batch_size, self.max_attempts, self.lease)
+            await repository.commit()
+        if not events:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+        errors = await asyncio.gather(*(self._handle(event, semaphore) for event in events))
+        now = datetime.utcnow()
+        async with self.session_factory() as session:
+            repository = SQLOutboxRepository(session)
+            dispatched = []
+            for event, error in zip(events, errors):
+                if error is None:
+                    dispatched.append(event.id)
+                    lag = (now - event.created_at).total_seconds()
+                    self.lag_seconds_last = lag
+                    self.lag_seconds_max = max(self.lag_seconds_max, lag)
+                    continue
+                self.failed += 1
+                await repository.mark_failed(event.id, error, now + timedelta(seconds=self.backoff(event.attempts)))
+                log = logger.error if event.attempts >= self.max_attempts else logger.warning
+                log(f"Outbox event {event.id} {event.event_type} failed, attempt {event.attempts}: {error}")
+            await repository.mark_dispatched(dispatched)
+            await repository.commit()
+        self.dispatched += len(dispatched)
+        return len(events)
+
+    async def refresh_pending_stats(self) -> None:
+        async with self.session_factory() as session:
+            self.pending, self.dead, oldest = await SQLOutboxRepository(session).pending_stats(self.max_attempts)
+        self.oldest_pending_age_seconds = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+
+    async def run(self) -> None:
+        """Dispatch events until cancelled, full batches are followed by the next one without waiting"""
+        logger.info("Outbox dispatcher is started")
+        stats_refreshed_at = 0.0
+        while True:
+            try:
+                claimed = await self.dispatch_batch()
+                if time.monotonic() - stats_refreshed_at >= self.poll_interval:
+                    await self.refresh_pending_stats()
+                    stats_refreshed_at = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.opt(exception=e).error(f"Outbox dispatcher error: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> dict:
+        return {
+            "dispatched": self.dispatched,
+            "failed": self.failed,
+            "pending": self.pending,
+            "dead": self.dead,
+            "oldest_pending_age_seconds": self.oldest_pending_age_seconds,
+            "lag_seconds_last": self.lag_seconds_last,
+            "lag_seconds_max": self.lag_seconds_max,
+        }
+
+
+@lru_cache()
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    config = settings.outbox
+    return OutboxDispatcher(
+        session_factory=db_manager.async_session,
+        transaction_repository=get_grpc_transaction_repository(),
+        batch_size=config.batch_size,
+        concurrency=config.concurrency,
+        poll_interval=config.poll_interval,
+        max_attempts=config.max_attempts,
+        backoff_base=config.backoff_base,
+        backoff_max=config.backoff_max,
+        lease=config.lease,
+    )
@@ -1,6 +1,6 @@
 import uuid
 from abc import ABC, abstractmethod
-from typing import Optional, Union
+from typing import List, Optional, Sequence, Union
 
 from repository.interfaces.entity.abc_user_repository import AbstractUserRepository
 from schemas.request.user import (
@@ -34,6 +34,10 @@ class AbstractUserService(ABC):
     async def check_user_existing(self, user_id: str) -> UserResponse:
         ...
 
+    @abstractmethod
+    async def check_users_existing(self, user_ids: Sequence[str]) -> List[UserResponse]:
+        ...
+
     @abstractmethod
     async def password_change(self, user_id: Union[str, uuid.UUID], password_schema: UserChangePasswordSchema):
         ...
@@ -0,0 +1,101 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from core.config import settings
+
+pwd_context = CryptContext(**settings.password_hash.context_params)
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+def verify_and_update_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs password hashing in an executor, so it does not block the event loop.
+    At most max_concurrency hashes are submitted at once, the rest wait in the queue
+    """
+
+    def __init__(self, executor: Executor, max_concurrency: int) -> None:
+        self._executor = executor
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.queue_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+
+    async def _run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        queued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        started_at = time.perf_counter()
+        self.queue_seconds_total += started_at - queued_at
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._semaphore.release()
+            self.in_flight -= 1
+            self.completed += 1
+            self.run_seconds_total += time.perf_counter() - started_at
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify the password and rehash it if its hash uses a deprecated scheme or other cost
+        Args:
+            password: password to verify
+            hashed_password: stored hash
+        Returns:
+            verification result and the new hash or None if the stored one is up to date
+        """
+        return await self._run(verify_and_update_password, password, hashed_password)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "queue_seconds_total": self.queue_seconds_total,
+            "run_seconds_total": self.run_seconds_total,
+        }
+
+
+@lru_cache()
+def get_password_hasher() -> PasswordHasher:
+    config = settings.password_hash
+    if config.executor == "process":
+        executor = ProcessPoolExecutor(max_workers=config.workers, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        executor = ThreadPoolExecutor(max_workers=config.workers, thread_name_prefix="password_hasher")
+    return PasswordHasher(executor=executor, max_concurrency=config.max_concurrency)
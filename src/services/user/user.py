@@ -1,16 +1,18 @@
+import contextlib
 import uuid
 from datetime import datetime
-from typing import Union
-
-from passlib.context import CryptContext
+from typing import AsyncIterator, List, Sequence, Union
 
 from common.exceptions import UserAlreadyExists, IntegrityDataError
 from common.exceptions.auth import WrongPassword
-from db.postgres.connection import get_postgres_session
-from repository.grpc_implementation.transaction_repository import get_grpc_transaction_repository
+from db.postgres.session_manager import db_manager
+from common.constants import OUTBOX_CREATE_USER_BALANCE
+from common.metrics import timed
+from common.tracing import current_traceparent
+from repository.interfaces.entity.abc_outbox_repository import AbstractOutboxRepository
 from repository.interfaces.entity.abc_user_repository import AbstractUserRepository
-from repository.interfaces.grpc.abc_transaction_repository import AbstractTransactionRepository
-from repository.postgres_implementation.user_repository import SQLUserRepository
+from repository.postgres_implementation.cached_user_repository import get_user_repository
+from repository.postgres_implementation.outbox_repository import SQLOutboxRepository
 from schemas.entities.user_entity import UserEntity
 from schemas.request.user import (
     UserLoginSchema,
@@ -18,41 +20,62 @@ from schemas.request.user import (
 )
 from schemas.response.user import UserResponse
 from services.user.abc_user import AbstractUserService
-
-pwd_context = CryptContext(schemes=["bcrypt"])
+from services.user.password_hasher import PasswordHasher, get_password_hasher
 
 
 class UserService(AbstractUserService):
     def __init__(
             self,
             user_repository: AbstractUserRepository,
-            transaction_repository: AbstractTransactionRepository,
+            outbox_repository: AbstractOutboxRepository,
+            password_hasher: PasswordHasher,
     ) -> None:
         self.user_repository = user_repository
-        self.transaction_repository = transaction_repository
+        self.outbox_repository = outbox_repository
+        self.password_hasher = password_hasher
         self.class_entity = UserEntity
 
-    @staticmethod
-    def _verify_password(plan_password: str, hashed_password: str) -> bool:
+    async def _verify_password(self, plan_password: str, hashed_password: str) -> bool:
         """Password validation."""
-        return pwd_context.verify(plan_password, hashed_password)
+        return await self.password_hasher.verify(plan_password, hashed_password)
 
+    @timed("user", "create_user")
     async def create_user(self, user_schema: UserRegistrationSchema) -> UserResponse:
-        """Creating a user."""
-        if await self.user_repository.get_user_by_field(email=user_schema.email, raise_if_notfound=False):
+        """Creating a user, the balance is created by the outbox dispatcher after the commit."""
+        with timed("user", "password_hash"):
+            user_schema.password = await self.password_hasher.hash(user_schema.password)
+        with timed("user", "db_insert_user"):
+            user_db = await self.user_repository.create_user(**user_schema.dict())
+        if not user_db:
             raise UserAlreadyExists("This email has already been registered. Log in or reset the password.")
-        user_schema.password = pwd_context.encrypt(user_schema.password)
-        user_db = await self.user_repository.create_user(**user_schema.dict())
-        await self.transaction_repository.create_user_balance(user_id=str(user_db.id))
+        with timed("user", "db_add_outbox_event"):
+            await self.outbox_repository.add_event(
+                event_type=OUTBOX_CREATE_USER_BALANCE,
+                aggregate_id=user_db.id,
+                idempotency_key=f"{OUTBOX_CREATE_USER_BALANCE}:{user_db.id}",
+                payload={"user_id": str(user_db.id), "traceparent": current_traceparent()},
+            )
+        with timed("user", "db_commit"):
+            await self.user_repository.commit()
         return UserResponse.from_orm(user_db)
 
+    @timed("user", "login")
     async def login(self, login_schema: UserLoginSchema) -> UserResponse:
         """Authorization of user."""
-        user_db = await self.user_repository.get_user_by_field(email=login_schema.email)
-        if not self._verify_password(login_schema.password, user_db.password):
+        with timed("user", "db_get_user"):
+            user_db = await self.user_repository.get_user_by_field(return_entity=False, email=login_schema.email)
+        with timed("user", "password_verify"):
+            verified, new_hash = await self.password_hasher.verify_and_update(
+                login_schema.password, user_db.password
+            )
+        if not verified:
             raise WrongPassword("Incorrect email or password.")
+        if new_hash:
+            with timed("user", "db_update_password"):
+                await self.user_repository.update_user_fields(user_db, password=new_hash)
         return UserResponse.from_orm(user_db)
 
+    @timed("user", "change_info")
     async def change_info(self, user_id: Union[str, uuid.UUID], info_schema: UserChangeInfoSchema) -> UserResponse:
         """Changing user information"""
         user_db = await self.user_repository.get_user_by_field(return_entity=False, id=user_id)
@@ -64,18 +87,23 @@ class UserService(AbstractUserService):
         await self.user_repository.update_user_fields(user_db, **schema)
         return UserResponse.from_orm(user_db)
 
+    @timed("user", "password_change")
     async def password_change(self, user_id: Union[str, uuid.UUID], password_schema: UserChangePasswordSchema):
         """Changing the user's password"""
         user_db = await self.user_repository.get_user_by_field(return_entity=False, id=user_id)
         await self.user_repository.update_user_fields(
-            user_db, password=pwd_context.encrypt(password_schema.new_password), updated_at=datetime.utcnow()
+            user_db,
+            password=await self.password_hasher.hash(password_schema.new_password),
+            updated_at=datetime.utcnow(),
         )
 
+    @timed("user", "user_info")
     async def user_info(self, user_id: Union[str, uuid.UUID]) -> UserResponse:
         """Getting user information"""
         user_db = await self.user_repository.get_user_by_field(id=user_id)
         return UserResponse.from_orm(user_db)
 
+    @timed("user", "verify_user_password")
     async def verify_user_password(self, user_id: Union[str, uuid.UUID], password: str):
         """
         Verifying the user's password
@@ -83,10 +111,11 @@ class UserService(AbstractUserService):
             user_id: id of user
             password: password to verify
         """
-        user_db = await self.user_repository.get_user_by_field(id=user_id)
-        if not self._verify_password(password, user_db.password):
+        user_db = await self.user_repository.get_user_by_field(return_entity=False, id=user_id)
+        if not await self._verify_password(password, user_db.password):
             raise WrongPassword("Incorrect password.")
 
+    @timed("user", "check_user_existing")
     async def check_user_existing(self, user_id: str) -> UserResponse:
         try:
             uuid.UUID(user_id)
@@ -95,10 +124,30 @@ class UserService(AbstractUserService):
         if user_db := await self.user_repository.get_user_by_field(id=user_id, raise_if_notfound=False):
             return UserResponse.from_orm(user_db)
 
+    @timed("user", "check_users_existing")
+    async def check_users_existing(self, user_ids: Sequence[str]) -> List[UserResponse]:
+        """
+        Getting existing users by ids in one lookup
+        Args:
+            user_ids: ids of users
+        Returns:
+            existing users in order of the ids, duplicates and missing users are skipped
+        """
+        try:
+            user_ids = list(dict.fromkeys(str(uuid.UUID(user_id)) for user_id in user_ids))
+        except ValueError:
+            raise IntegrityDataError("Invalid user id.")
+        return [UserResponse.from_orm(user_db) for user_db in await self.user_repository.get_users_by_ids(user_ids)]
+
 
-async def get_user_service():
-    session = await get_postgres_session()
-    return UserService(
-        user_repository=SQLUserRepository(session=session),
-        transaction_repository=get_grpc_transaction_repository()
-    )
+@contextlib.asynccontextmanager
+async def get_user_service() -> AsyncIterator[UserService]:
+    """
+    User service with its own session checked out from the pool of db_manager, the session is closed on exit
+    """
+    async with db_manager.async_session() as session:
+        yield UserService(
+            user_repository=get_user_repository(session),
+            outbox_repository=SQLOutboxRepository(session),
+            password_hasher=get_password_hasher(),
+        )
@@ -14,5 +14,11 @@ class GRPCClient:
     async def check_user_existing(self, request):
         return await self.stub.CheckUserExisting(request, metadata=self.metadata)
 
+    async def check_users_existing(self, request):
+        return await self.stub.CheckUsersExisting(request, metadata=self.metadata)
+
+    async def stream_users_existing(self, request):
+        return [response async for response in self.stub.StreamUsersExisting(request, metadata=self.metadata)]
+
 
 grpc_client = GRPCClient()
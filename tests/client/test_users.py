@@ -0,0 +1,33 @@
+import uuid
+from typing import List
+
+from core.config import settings
+from db.postgres.session_manager import db_manager
+from repository.postgres_implementation.user_repository import SQLUserRepository
+
+
+async def create_users(count: int) -> List[str]:
+    """Create users in the database of the server under test, returns their ids"""
+    db_manager.init(settings.postgres.database_url, connect_args=settings.postgres.connect_args)
+    try:
+        async with db_manager.async_session() as session:
+            repository = SQLUserRepository(session)
+            users = [
+                await repository.create_user(email=f"grpc-test-{uuid.uuid4().hex}@example.com", password="-")
+                for _ in range(count)
+            ]
+            await repository.commit()
+    finally:
+        await db_manager.close()
+    return [str(user.id) for user in users]
+
+
+async def delete_users(user_ids: List[str]) -> None:
+    db_manager.init(settings.postgres.database_url, connect_args=settings.postgres.connect_args)
+    try:
+        async with db_manager.async_session() as session:
+            repository = SQLUserRepository(session)
+            for user_id in user_ids:
+                await repository.delete_user(user_id)
+    finally:
+        await db_manager.close()
@@ -0,0 +1,44 @@
+import asyncio
+import uuid
+
+import pytest
+
+from clients.grpc.proto.auth import auth_pb2
+from core.config import settings
+from tests.client.test_client import grpc_client
+from tests.client.test_users import create_users, delete_users
+
+
+@pytest.fixture(scope="module")
+def known_ids():
+    user_ids = asyncio.get_event_loop().run_until_complete(create_users(3))
+    yield user_ids
+    asyncio.get_event_loop().run_until_complete(delete_users(user_ids))
+
+
+def users_existing_request(known_ids):
+    """Known users spread over more than one batch of GRPC_USERS_BATCH_SIZE ids, with missing and repeated ids"""
+    missing_ids = [str(uuid.uuid4()) for _ in range(settings.grpc_server.users_batch_size)]
+    middle = len(missing_ids) // 2
+    return auth_pb2.CheckUsersExistingRequest(
+        user_ids=[
+            known_ids[0],
+            *missing_ids[:middle],
+            known_ids[1],
+            *missing_ids[middle:],
+            known_ids[2],
+            known_ids[0],
+        ]
+    )
+
+
+def test_GRPCAsyncServerUsersExisting(known_ids):
+    request = users_existing_request(known_ids)
+    result = asyncio.get_event_loop().run_until_complete(grpc_client.check_users_existing(request))
+    assert sorted(user.id for user in result.users) == sorted(known_ids)
+
+
+def test_GRPCAsyncServerStreamUsersExisting(known_ids):
+    request = users_existing_request(known_ids)
+    result = asyncio.get_event_loop().run_until_complete(grpc_client.stream_users_existing(request))
+    assert sorted(response.id for response in result) == sorted(known_ids)
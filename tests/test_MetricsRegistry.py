@@ -0,0 +1,35 @@
+import math
+
+from common.metrics import MetricsRegistry
+
+
+def test_MetricsRegistryRender():
+    registry = MetricsRegistry()
+    registry.counter("test_requests_total", "Requests", ("method",)).inc("GET", amount=2)
+    registry.histogram("test_duration_seconds", "Duration", buckets=(0.1, 1.0)).observe(0.5)
+    registry.register_collector(
+        "test_filter",
+        lambda: {"synced": True, "stale": False, "size": 3, "ratio": 0.25, "mode": "async", "pool": {"in_use": 1}},
+    )
+
+    rendered = registry.render()
+    samples = dict(line.rsplit(" ", 1) for line in rendered.splitlines() if not line.startswith("#"))
+
+    assert rendered.endswith("\n")
+    assert samples == {
+        'test_requests_total{method="GET"}': "2",
+        'test_duration_seconds_bucket{le="0.1"}': "0",
+        'test_duration_seconds_bucket{le="1.0"}': "1",
+        'test_duration_seconds_bucket{le="+Inf"}': "1",
+        "test_duration_seconds_sum": "0.5",
+        "test_duration_seconds_count": "1",
+        "test_filter_synced": "1",
+        "test_filter_stale": "0",
+        "test_filter_size": "3",
+        "test_filter_ratio": "0.25",
+        "test_filter_pool_in_use": "1",
+    }
+    for value in samples.values():
+        assert value == "+Inf" or not math.isnan(float(value))
+    assert "# TYPE test_filter_synced gauge" in rendered
+    assert "# TYPE test_duration_seconds histogram" in rendered
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeServer, aioredis
+
+from repository.redis_implementation.session_repository import SessionRepository
+
+EXPIRE = 600
+BLOCKED_EXPIRE = 60
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "hash_tags"])
+def repository(request, monkeypatch):
+    monkeypatch.setattr(SessionRepository, "hash_tags", request.param)
+    return SessionRepository(aioredis.FakeRedis(server=FakeServer()))
+
+
+def keys(repository: SessionRepository) -> set:
+    return {key.decode() for key in run(repository.redis.keys("*"))}
+
+
+def session_keys(repository: SessionRepository, user_id: str, access_token: str, refresh_token: str) -> set:
+    return {
+        repository.create_access_key(user_id, access_token),
+        repository.create_refresh_key(user_id, refresh_token),
+        repository.create_refresh_index_key(user_id, refresh_token),
+    }
+
+
+def test_SessionRepositorySetSession(repository):
+    run(repository.set_session("user", "access", "refresh", "fingerprint", EXPIRE))
+
+    assert keys(repository) == {
+        repository.create_sessions_key("user"),
+        *session_keys(repository, "user", "access", "refresh"),
+    }
+    session_id = repository.token_digest("refresh")
+    entries = run(repository.redis.hgetall(repository.create_sessions_key("user")))
+    assert {key.decode(): value.decode() for key, value in entries.items()} == {
+        key: session_id for key in session_keys(repository, "user", "access", "refresh")
+    }
+    assert run(repository.get(repository.create_refresh_key("user", "refresh"))) == "fingerprint"
+    assert run(repository.get(repository.create_access_key("user", "access"))) == "refresh"
+    assert run(repository.has_refresh("user", "refresh"))
+    assert 0 < run(repository.redis.ttl(repository.create_access_key("user", "access"))) <= EXPIRE
+
+
+def test_SessionRepositoryRotateSession(repository):
+    run(repository.set_session("user", "access", "refresh", "fingerprint", EXPIRE))
+    run(repository.set_session("user", "other_access", "other_refresh", "fingerprint", EXPIRE))
+
+    assert run(repository.rotate_session("user", "refresh", "access2", "refresh2", "fp2", EXPIRE, BLOCKED_EXPIRE))
+
+    assert keys(repository) == {
+        repository.create_sessions_key("user"),
+        repository.create_blocked_session_key("user", repository.token_digest("refresh")),
+        *session_keys(repository, "user", "access2", "refresh2"),
+        *session_keys(repository, "user", "other_access", "other_refresh"),
+    }
+    assert not run(repository.has_refresh("user", "refresh"))
+    assert run(repository.is_session_blocked("user", repository.token_digest("refresh")))
+    assert run(repository.get(repository.create_refresh_key("user", "refresh2"))) == "fp2"
+
+
+def test_SessionRepositoryRotateRotatedSession(repository):
+    run(repository.set_session("user", "access", "refresh", "fingerprint", EXPIRE))
+    run(repository.rotate_session("user", "refresh", "access2", "refresh2", "fp2", EXPIRE, BLOCKED_EXPIRE))
+    before = keys(repository)
+
+    assert not run(repository.rotate_session("user", "refresh", "access3", "refresh3", "fp3", EXPIRE, BLOCKED_EXPIRE))
+
+    assert keys(repository) == before
+
+
+def test_SessionRepositoryRevokeSession(repository):
+    run(repository.set_session("user", "access", "refresh", "fingerprint", EXPIRE))
+    run(repository.set_session("user", "other_access", "other_refresh", "fingerprint", EXPIRE))
+
+    assert run(repository.revoke_session("user", "access", BLOCKED_EXPIRE)) == [repository.token_digest("refresh")]
+
+    assert keys(repository) == {
+        repository.create_sessions_key("user"),
+        repository.create_blocked_key("user", "access"),
+        repository.create_blocked_session_key("user", repository.token_digest("refresh")),
+        *session_keys(repository, "user", "other_access", "other_refresh"),
+    }
+    assert not run(repository.rotate_session("user", "refresh", "access2", "refresh2", "fp2", EXPIRE, BLOCKED_EXPIRE))
+
+
+def test_SessionRepositoryRevokeAllSessions(repository):
+    run(repository.set_session("user", "access", "refresh", "fingerprint", EXPIRE))
+    run(repository.set_session("user", "other_access", "other_refresh", "fingerprint", EXPIRE))
+    run(repository.set_session("another_user", "another_access", "another_refresh", "fingerprint", EXPIRE))
+
+    session_ids = run(repository.revoke_all_sessions("user", "access", BLOCKED_EXPIRE))
+
+    assert sorted(session_ids) == sorted([repository.token_digest("refresh"), repository.token_digest("other_refresh")])
+    assert keys(repository) == {
+        repository.create_blocked_key("user", "access"),
+        *(repository.create_blocked_session_key("user", session_id) for session_id in session_ids),
+        repository.create_sessions_key("another_user"),
+        *session_keys(repository, "another_user", "another_access", "another_refresh"),
+    }
+
+
+def test_SessionRepositoryRevokeLegacySession(repository):
+    run(repository.redis.set(repository.create_access_key("user", "access"), "refresh", ex=EXPIRE))
+    run(repository.redis.set(repository.create_refresh_key("user", "refresh"), "fingerprint", ex=EXPIRE))
+    run(repository.redis.set(repository.create_refresh_index_key("user", "refresh"), "user", ex=EXPIRE))
+
+    assert run(repository.revoke_session("user", "access", BLOCKED_EXPIRE)) == []
+
+    assert keys(repository) == {repository.create_blocked_key("user", "access")}
+    assert 0 < run(repository.redis.ttl(repository.create_blocked_key("user", "access"))) <= BLOCKED_EXPIRE
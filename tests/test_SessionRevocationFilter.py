@@ -0,0 +1,125 @@
+import asyncio
+import uuid
+
+import pytest
+from fakeredis import FakeServer, aioredis
+
+from common.ttl_cache import TTLCache
+from repository.redis_implementation.session_repository import SessionRepository
+from services.auth.auth import AuthService
+from services.auth.revocation import SessionRevocationFilter
+
+GENERATION_TTL = 60
+BLOCKED_EXPIRE = 60
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def expire_generation(revocation_filter: SessionRevocationFilter) -> None:
+    revocation_filter._rotated_at -= revocation_filter.generation_ttl
+
+
+class Timer:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingSessionRepository(SessionRepository):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.blocked_checks = 0
+
+    async def is_session_blocked(self, user_id: str, session_id: str) -> bool:
+        self.blocked_checks += 1
+        return await super().is_session_blocked(user_id, session_id)
+
+
+@pytest.fixture
+def cache_client():
+    return CountingSessionRepository(aioredis.FakeRedis(server=FakeServer()))
+
+
+def block_session(cache_client: SessionRepository, user_id: str, session_id: str) -> None:
+    run(cache_client.redis.set(cache_client.create_blocked_session_key(user_id, session_id), 1, ex=BLOCKED_EXPIRE))
+
+
+def test_SessionRevocationFilterNoFalseNegatives():
+    revocation_filter = SessionRevocationFilter(capacity=1000, error_rate=0.01, generation_ttl=GENERATION_TTL)
+    session_ids = [uuid.uuid4().hex for _ in range(1000)]
+    for session_id in session_ids:
+        revocation_filter.add(session_id)
+
+    assert all(revocation_filter.might_be_blocked(session_id) for session_id in session_ids)
+    false_positives = sum(revocation_filter.might_be_blocked(uuid.uuid4().hex) for _ in range(1000))
+    assert false_positives < 50
+
+
+def test_SessionRevocationFilterGenerationRotation():
+    revocation_filter = SessionRevocationFilter(capacity=100, error_rate=0.01, generation_ttl=GENERATION_TTL)
+    revocation_filter.add("first")
+
+    expire_generation(revocation_filter)
+    revocation_filter.add("second")
+
+    assert revocation_filter.might_be_blocked("first")
+    assert revocation_filter.might_be_blocked("second")
+
+    expire_generation(revocation_filter)
+
+    assert not revocation_filter.might_be_blocked("first")
+    assert revocation_filter.might_be_blocked("second")
+
+    expire_generation(revocation_filter)
+
+    assert not revocation_filter.might_be_blocked("second")
+    assert revocation_filter.stats()["items"] == 0
+
+
+def test_SessionRevocationFilterSynced(cache_client):
+    revocation_filter = SessionRevocationFilter(capacity=100, error_rate=0.01)
+    revocation_filter.synced = True
+    service = AuthService(cache_client, "secret", None, revocation_filter=revocation_filter)
+    block_session(cache_client, "user", "blocked")
+    revocation_filter.add("blocked")
+
+    assert not run(service.is_session_blocked("user", "alive"))
+    assert cache_client.blocked_checks == 0
+    assert run(service.is_session_blocked("user", "blocked"))
+    assert cache_client.blocked_checks == 1
+
+
+def test_SessionRevocationFilterNotSynced(cache_client):
+    revocation_filter = SessionRevocationFilter(capacity=100, error_rate=0.01)
+    service = AuthService(cache_client, "secret", None, revocation_filter=revocation_filter)
+    block_session(cache_client, "user", "blocked")
+
+    assert run(service.is_session_blocked("user", "blocked"))
+    assert not run(service.is_session_blocked("user", "alive"))
+    assert cache_client.blocked_checks == 2
+    assert revocation_filter.stats()["hits"] == revocation_filter.stats()["misses"] == 0
+
+
+def test_SessionRevocationFilterRevocationCache(cache_client):
+    timer = Timer()
+    revocation_cache = TTLCache(max_size=10, ttl=5, timer=timer)
+    service = AuthService(cache_client, "secret", None, revocation_cache=revocation_cache)
+
+    assert not run(service.is_session_blocked("user", "session"))
+    block_session(cache_client, "user", "session")
+    assert not run(service.is_session_blocked("user", "session"))
+    assert cache_client.blocked_checks == 1
+
+    timer.now += 5
+
+    assert run(service.is_session_blocked("user", "session"))
+    assert cache_client.blocked_checks == 2
+
+    service.mark_sessions_blocked("marked")
+
+    assert run(service.is_session_blocked("user", "marked"))
+    assert cache_client.blocked_checks == 2
@@ -0,0 +1,168 @@
+import time
+
+import jwt
+import pytest
+
+from services.auth import token_codec as token_codec_module
+from services.auth.token_codec import (
+    TokenClaims,
+    TokenCodec,
+    TokenKey,
+    VerifiedTokenCache,
+    b64url_encode,
+    create_token_codec,
+)
+
+SECRET = "test-secret-key-of-the-token-codec"
+OTHER_SECRET = "other-secret-key-of-the-token-codec"
+ALGORITHM = "HS256"
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def codec() -> TokenCodec:
+    return create_token_codec(SECRET, ALGORITHM)
+
+
+@pytest.fixture
+def key_codec() -> TokenCodec:
+    first = TokenKey("HS256", SECRET, SECRET, kid="first")
+    second = TokenKey("HS512", OTHER_SECRET, OTHER_SECRET, kid="second")
+    return TokenCodec(first, {"first": first, "second": second})
+
+
+def pyjwt_decode(token: str, key: str = SECRET, algorithm: str = ALGORITHM) -> dict:
+    return jwt.decode(token, key, algorithms=[algorithm])
+
+
+def decode_error(decode, token: str):
+    try:
+        decode(token)
+    except jwt.PyJWTError as e:
+        return type(e)
+    return None
+
+
+def replace_header(token: str, header: bytes) -> str:
+    return ".".join([b64url_encode(header).decode(), *token.split(".")[1:]])
+
+
+def test_TokenCodecRoundTrip(codec):
+    payload = {"user_id": "user", "is_superuser": False, "sid": "session", "exp": int(time.time()) + 60}
+
+    token = codec.encode(payload)
+
+    assert codec.decode(token) == payload
+    assert pyjwt_decode(token) == payload
+    assert jwt.get_unverified_header(token) == {"alg": ALGORITHM, "typ": "JWT"}
+    assert codec.decode(jwt.encode(payload, SECRET, algorithm=ALGORITHM)) == payload
+
+
+def test_TokenCodecBadSignature(codec):
+    token = jwt.encode({"user_id": "user"}, OTHER_SECRET, algorithm=ALGORITHM)
+    header, payload, signature = codec.encode({"user_id": "user"}).split(".")
+    tampered = ".".join([header, b64url_encode(b'{"user_id":"admin"}').decode(), signature])
+
+    for bad_token in (token, tampered):
+        assert decode_error(codec.decode, bad_token) is jwt.InvalidSignatureError
+        assert decode_error(pyjwt_decode, bad_token) is jwt.InvalidSignatureError
+
+
+@pytest.mark.parametrize(
+    "claims, error",
+    [
+        ({"exp": -60}, jwt.ExpiredSignatureError),
+        ({"exp": 0}, jwt.ExpiredSignatureError),
+        ({"exp": 60}, None),
+        ({"nbf": 60}, jwt.ImmatureSignatureError),
+        ({"nbf": 0}, None),
+        ({"nbf": -60}, None),
+        ({"iat": 60}, jwt.ImmatureSignatureError),
+        ({"iat": -60}, None),
+        ({"exp": "soon"}, jwt.DecodeError),
+    ],
+)
+def test_TokenCodecTimeClaims(codec, claims, error):
+    now = int(time.time())
+    payload = {"user_id": "user"}
+    for key, value in claims.items():
+        payload[key] = now + value if isinstance(value, int) else value
+    token = jwt.encode(payload, SECRET, algorithm=ALGORITHM)
+
+    assert decode_error(codec.decode, token) is error
+    assert decode_error(pyjwt_decode, token) is error
+
+
+@pytest.mark.parametrize(
+    "header, error",
+    [
+        (b'{"typ":"JWT","alg":"HS256"}', jwt.InvalidSignatureError),
+        (b'{"alg":"none","typ":"JWT"}', jwt.InvalidAlgorithmError),
+        (b'{"alg":"HS512","typ":"JWT"}', jwt.InvalidAlgorithmError),
+        (b'["HS256"]', jwt.DecodeError),
+        (b"not json", jwt.DecodeError),
+    ],
+)
+def test_TokenCodecTamperedHeader(codec, header, error):
+    token = replace_header(codec.encode({"user_id": "user"}), header)
+
+    assert decode_error(codec.decode, token) is error
+    assert decode_error(pyjwt_decode, token) is error
+
+
+def test_TokenCodecKid(key_codec):
+    token = key_codec.encode({"user_id": "user"})
+    other_token = jwt.encode({"user_id": "user"}, OTHER_SECRET, algorithm="HS512", headers={"kid": "second"})
+
+    assert jwt.get_unverified_header(token)["kid"] == "first"
+    assert pyjwt_decode(token) == key_codec.decode(token) == {"user_id": "user"}
+    assert key_codec.decode(other_token) == {"user_id": "user"}
+
+    unknown_kid = jwt.encode({"user_id": "user"}, SECRET, algorithm=ALGORITHM, headers={"kid": "unknown"})
+    no_kid = jwt.encode({"user_id": "user"}, SECRET, algorithm=ALGORITHM)
+    wrong_alg = jwt.encode({"user_id": "user"}, SECRET, algorithm="HS512", headers={"kid": "first"})
+    wrong_key = jwt.encode({"user_id": "user"}, SECRET, algorithm="HS512", headers={"kid": "second"})
+
+    assert decode_error(key_codec.decode, unknown_kid) is jwt.InvalidKeyError
+    assert decode_error(key_codec.decode, no_kid) is jwt.InvalidKeyError
+    assert decode_error(key_codec.decode, wrong_alg) is jwt.InvalidAlgorithmError
+    assert decode_error(key_codec.decode, wrong_key) is jwt.InvalidSignatureError
+
+
+def test_VerifiedTokenCacheExpiration(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(token_codec_module.time, "time", clock)
+    cache = VerifiedTokenCache(max_size=10, max_ttl=60)
+    cache._cache._timer = clock
+    claims = TokenClaims("user")
+
+    cache.set("short", claims, clock.now + 5)
+    cache.set("long", claims, clock.now + 3600)
+    cache.set("expired", claims, clock.now)
+    cache.set("no_exp", claims, None)
+
+    assert cache.get("short") is claims
+    assert cache.get("long") is claims
+    assert cache.get("expired") is None
+    assert cache.get("no_exp") is None
+
+    clock.now += 5
+
+    assert cache.get("short") is None
+    assert cache.get("long") is claims
+
+    clock.now += 55
+
+    assert cache.get("long") is None
+
+    cache.set("discarded", claims, clock.now + 5)
+    cache.discard("discarded")
+
+    assert cache.get("discarded") is None